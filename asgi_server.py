@@ -0,0 +1,329 @@
+# asgi_server.py
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs
+
+import fpl_async
+import fpl_client
+import tracing
+from batch_report import SHARED_PATHS, build_traced_report_sections, fallback_paths, init_worker, manager_paths
+from fpl_server import STREAM_MIMETYPES, build_team_analysis
+from fpl_team_loader import get_current_gameweek, report_paths
+from personality import get_random_line
+from report_cache import ReportCache
+from singleflight import AsyncSingleFlight
+
+# Async twin of fpl_server: same routes and responses, but upstream calls are
+# non-blocking (fpl_async, bounded by its global semaphore) and report building
+# runs in a process pool, so one process can keep hundreds of reports in flight.
+# Responses carry the same Server-Timing header (report stages timed in the
+# worker included), ?debug_timing=1 works the same and totals are at /metrics.
+#
+#   uvicorn asgi_server:app --port 5151
+
+REPORT_TIMEOUT = 30.0
+ANALYZE_TIMEOUT = 15.0
+REPORT_WORKERS = os.cpu_count()
+
+_analyze_flight = AsyncSingleFlight()
+_report_flight = AsyncSingleFlight()
+_report_cache = ReportCache(max_entries=512)
+
+_pool = None
+_pool_versions = None
+
+
+def encode_json(data):
+    # Same encoding as Flask's app.json, so both servers hand out the same ETags
+    return json.dumps(data, sort_keys=True).encode("utf-8")
+
+
+def get_report_pool():
+    """
+    Returns the report worker pool. Workers are spawned seeded with the shared
+    payloads (bootstrap, fixtures), so the pool is replaced whenever those change;
+    reports already running on the old one still finish.
+    """
+    global _pool, _pool_versions
+    versions = tuple(fpl_client.get_version(path) for path in SHARED_PATHS)
+    if _pool is None or versions != _pool_versions:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(
+            max_workers=REPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker, initargs=(fpl_client.export_entries(SHARED_PATHS),)
+        )
+        _pool_versions = versions
+    return _pool
+
+
+# ========== Routes ==========
+
+async def home(query, headers):
+    return 200, {"Content-Type": "text/html; charset=utf-8"}, get_random_line("greeting").encode("utf-8")
+
+
+async def goodbye(query, headers):
+    return 200, {"Content-Type": "text/html; charset=utf-8"}, get_random_line("farewell").encode("utf-8")
+
+
+async def error_test(query, headers):
+    return 200, {"Content-Type": "text/html; charset=utf-8"}, get_random_line("error").encode("utf-8")
+
+
+async def load_shared_data():
+    # Raises when bootstrap or fixtures can't be had, so nothing below falls
+    # back to a blocking fetch on the event loop
+    await asyncio.gather(*(fpl_async.fetch_json(path) for path in SHARED_PATHS))
+
+
+async def load_team_analysis(manager_id):
+    try:
+        await load_shared_data()
+        await fpl_async.prefetch([f"entry/{manager_id}/event/{get_current_gameweek()}/picks/"])
+    except Exception:
+        pass  # build_team_analysis reports what is missing
+    return await asyncio.to_thread(build_team_analysis, manager_id)
+
+
+async def analyze_team(query, headers):
+    manager_id = query.get("id")
+    if not manager_id:
+        return json_response(400, {"error": "Missing Manager ID"})
+
+    try:
+        with tracing.stage("analysis"):
+            analysis = await asyncio.wait_for(
+                _analyze_flight.do(manager_id, lambda: load_team_analysis(manager_id)), ANALYZE_TIMEOUT
+            )
+    except asyncio.TimeoutError:
+        analysis = {"error": f"Timed out after {ANALYZE_TIMEOUT:.0f}s"}
+
+    if "error" in analysis:
+        return json_response(500, {
+            "error": analysis["error"],
+            "note": get_random_line("error")
+        })
+
+    return json_response(200, {**analysis, "signoff": get_random_line("farewell")})
+
+
+async def render_report(key):
+    """
+    Fetches the manager's fallback picks if needed, then builds the report in a
+    worker process and caches (etag, body, sections) as fpl_server does.
+    """
+    manager_id, gameweek, _ = key
+    fallback = fallback_paths(manager_id, gameweek, get_current_gameweek())
+    await fpl_async.prefetch(fallback)
+    entries = fpl_client.export_entries(manager_paths(manager_id, gameweek) + fallback)
+
+    sections, stages = await asyncio.get_running_loop().run_in_executor(
+        get_report_pool(), build_traced_report_sections, manager_id, gameweek, entries
+    )
+    # The worker's stages land in the trace of the request that started the build
+    for name, seconds in stages.items():
+        tracing.record(name, seconds)
+    report = {}
+    for _, fields in sections:
+        report.update(fields)
+    with tracing.stage("serialize"):
+        body = encode_json(report)
+    rendered = (hashlib.sha1(body).hexdigest(), body, sections)
+    _report_cache.put(key, rendered)
+    return rendered
+
+
+async def load_report(manager_id, gameweek):
+    paths = report_paths(manager_id, gameweek)
+    with tracing.stage("upstream"):
+        await asyncio.gather(load_shared_data(), fpl_async.prefetch(paths))
+    key = (manager_id, gameweek, tuple(fpl_client.get_version(path) for path in paths))
+    cached = _report_cache.get(key)
+    tracing.note("cache", "miss" if cached is None else "hit")
+    tracing.cache_lookup("report", "miss" if cached is None else "hit")
+    if cached is None:
+        cached = await _report_flight.do(key, lambda: render_report(key))
+    return cached
+
+
+async def full_report(query, headers):
+    manager_id = query.get("manager_id")
+    try:
+        gameweek = int(query.get("gw", 34))
+    except ValueError:
+        gameweek = 34
+
+    if not manager_id:
+        return json_response(400, {"error": "Missing Manager ID"})
+
+    try:
+        etag, body, _ = await asyncio.wait_for(load_report(manager_id, gameweek), REPORT_TIMEOUT)
+    except asyncio.TimeoutError:
+        # The build carries on in the background and is cached for the retry
+        return json_response(504, {
+            "error": f"Report is taking longer than {REPORT_TIMEOUT:.0f}s, try again shortly",
+            "note": get_random_line("error")
+        })
+    except Exception as e:
+        return json_response(500, {
+            "error": f"Failed to generate report: {str(e)}",
+            "note": get_random_line("error")
+        })
+
+    response_headers = {"Content-Type": "application/json", "ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if etag_matches(headers.get("if-none-match"), etag):
+        return 304, response_headers, b""
+    return 200, response_headers, body
+
+
+def encode_section(name, fields, fmt):
+    payload = json.dumps({"section": name, "data": fields}, sort_keys=True)
+    if fmt == "sse":
+        return f"event: {name}\ndata: {payload}\n\n".encode("utf-8")
+    return (payload + "\n").encode("utf-8")
+
+
+async def stream_report_sections(manager_id, gameweek, fmt):
+    """
+    fpl_server's stream format: every section, then "done" with the ETag. Reports
+    are built whole in a worker process, so a new report's sections all follow
+    once it is done; a cached one is replayed at once.
+    """
+    try:
+        etag, _, sections = await asyncio.wait_for(load_report(manager_id, gameweek), REPORT_TIMEOUT)
+        for name, fields in sections:
+            yield encode_section(name, fields, fmt)
+        yield encode_section("done", {"etag": etag}, fmt)
+    except Exception as e:
+        yield encode_section("error", {
+            "error": f"Failed to generate report: {str(e) or type(e).__name__}",
+            "note": get_random_line("error")
+        }, fmt)
+
+
+async def stream_report(query, headers):
+    manager_id = query.get("manager_id")
+    try:
+        gameweek = int(query.get("gw", 34))
+    except ValueError:
+        gameweek = 34
+    fmt = query.get("format", "ndjson")
+
+    if not manager_id:
+        return json_response(400, {"error": "Missing Manager ID"})
+    if fmt not in STREAM_MIMETYPES:
+        return json_response(400, {"error": f"Unknown format '{fmt}', use ndjson or sse"})
+
+    response_headers = {"Content-Type": STREAM_MIMETYPES[fmt], "Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return 200, response_headers, stream_report_sections(manager_id, gameweek, fmt)
+
+
+async def metrics(query, headers):
+    """Request, stage, upstream and cache metrics in the Prometheus text format."""
+    return 200, {"Content-Type": "text/plain; version=0.0.4"}, tracing.registry.render().encode("utf-8")
+
+
+ROUTES = {
+    "/": home,
+    "/farewell": goodbye,
+    "/error-test": error_test,
+    "/analyze": analyze_team,
+    "/api/report": full_report,
+    "/api/report/stream": stream_report,
+    "/metrics": metrics,
+}
+
+
+# ========== ASGI Plumbing ==========
+
+def json_response(status, data):
+    return status, {"Content-Type": "application/json"}, encode_json(data)
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/").strip('"') for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await fpl_async.close()
+                if _pool is not None:
+                    _pool.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    token = tracing.begin()
+    try:
+        await handle(scope, send)
+    finally:
+        tracing.end(token)
+
+
+def with_debug_timing(headers, body, trace):
+    """?debug_timing=1: the trace's breakdown added to a JSON object body, which is then no longer cacheable."""
+    if headers.get("Content-Type") != "application/json" or not body:
+        return headers, body
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        return headers, body
+    data["debug_timing"] = trace.breakdown()
+    headers = {k: v for k, v in headers.items() if k != "ETag"}
+    headers["Cache-Control"] = "no-store"
+    return headers, encode_json(data)
+
+
+async def handle(scope, send):
+    query = {k: v[0] for k, v in parse_qs(scope["query_string"].decode("latin-1")).items()}
+    route = ROUTES.get(scope["path"])
+    if route is None:
+        status, headers, body = json_response(404, {"error": "Not found"})
+    elif scope["method"] not in ("GET", "HEAD"):
+        status, headers, body = json_response(405, {"error": "Method not allowed"})
+    else:
+        request_headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        status, headers, body = await route(query, request_headers)
+
+    trace = tracing.current()
+    streamed = not isinstance(body, bytes)
+    if query.get("debug_timing") == "1" and not streamed:
+        headers, body = with_debug_timing(headers, body, trace)
+    headers = dict(headers, **{"Server-Timing": trace.server_timing()})
+    if not streamed:
+        headers["Content-Length"] = str(len(body))
+    tracing.http_request(scope["path"] if route else "unmatched", status, trace.elapsed())
+
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()],
+    })
+    if not streamed:
+        await send({"type": "http.response.body", "body": body if scope["method"] != "HEAD" else b""})
+        return
+    if scope["method"] != "HEAD":
+        async for chunk in body:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("asgi_server:app", port=5151)
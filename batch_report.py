@@ -0,0 +1,177 @@
+# batch_report.py
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import fpl_client
+import tracing
+from fpl_team_loader import get_current_gameweek, get_league_entries, report_paths
+
+SHARED_PATHS = ["bootstrap-static/", "fixtures/"]
+# Seeded payloads stay fresh in workers for the whole batch
+WORKER_TTL = 24 * 60 * 60
+
+
+def collect_manager_payloads(manager_id, gameweek, current_gw):
+    """
+    Fetches everything one manager's report reads (entry, history, picks, plus the
+    fallback gameweeks used when picks for `gameweek` don't exist yet) and returns
+    the cache entries, 404s included, ready to seed into a worker.
+    """
+    paths = manager_paths(manager_id, gameweek)
+    fpl_client.prefetch(paths)
+
+    fallback = fallback_paths(manager_id, gameweek, current_gw)
+    if fallback:
+        fpl_client.prefetch(fallback)
+        paths += fallback
+
+    return fpl_client.export_entries(paths)
+
+
+def manager_paths(manager_id, gameweek):
+    """The per-manager upstream paths a report reads (everything but SHARED_PATHS)."""
+    return [p for p in report_paths(manager_id, gameweek) if p not in SHARED_PATHS]
+
+
+def fallback_paths(manager_id, gameweek, current_gw):
+    """
+    Picks the report falls back to when the manager has none for `gameweek` yet
+    (checked against what is already cached); empty when no fallback is needed.
+    """
+    if fpl_client.get_version(f"entry/{manager_id}/event/{gameweek}/picks/") not in (None, "404"):
+        return []
+    return [
+        f"entry/{manager_id}/event/{gameweek - 1}/picks/",
+        f"entry/{manager_id}/event/{current_gw}/picks/",
+    ]
+
+
+def init_worker(shared_entries):
+    fpl_client.seed(shared_entries, ttl=WORKER_TTL)
+
+
+def build_report_sections(manager_id, gameweek, entries):
+    """
+    Runs in a worker process: seeds the manager's payloads and returns the report
+    as its list of (section, fields).
+    """
+    from weekly_report import iter_gameweek_report
+
+    fpl_client.seed(entries, ttl=WORKER_TTL)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return list(tracing.timed_sections(iter_gameweek_report(gameweek_number=gameweek, manager_id=manager_id)))
+
+
+def build_traced_report_sections(manager_id, gameweek, entries):
+    """
+    build_report_sections under a trace of its own, returning (sections, {stage:
+    seconds}) so the server that asked for the report can add the worker's stages
+    to its request's Server-Timing.
+    """
+    token = tracing.begin()
+    try:
+        sections = build_report_sections(manager_id, gameweek, entries)
+        return sections, dict(tracing.current().stages)
+    finally:
+        tracing.end(token)
+
+
+def _build_report_line(manager_id, gameweek, entries):
+    """
+    Runs in a worker process: builds one report and returns (ok, NDJSON line).
+    """
+    try:
+        report = {}
+        for _, fields in build_report_sections(manager_id, gameweek, entries):
+            report.update(fields)
+        return True, json.dumps({"manager_id": manager_id, "gameweek": gameweek, "report": report})
+    except Exception as e:
+        return False, json.dumps({"manager_id": manager_id, "gameweek": gameweek, "error": str(e)})
+
+
+def run_batch(manager_ids, gameweek, output_path, workers=None, fetch_concurrency=16):
+    """
+    Generates reports for many managers. Shared data is fetched once and seeded into
+    every worker process; per-manager payloads are fetched with at most
+    `fetch_concurrency` managers in flight and handed to the process pool as they
+    arrive. Workers are spawned rather than forked so they never inherit
+    fpl_client's fetch threads or locks. Reports are streamed to `output_path` as NDJSON in completion order.
+    Returns (reports written, errors, elapsed seconds).
+    """
+    start = time.perf_counter()
+    fpl_client.prefetch(SHARED_PATHS)
+    shared = fpl_client.export_entries(SHARED_PATHS)
+    if len(shared) != len(SHARED_PATHS):
+        raise RuntimeError("Could not fetch bootstrap-static/ and fixtures/.")
+    current_gw = get_current_gameweek()
+
+    written = errors = 0
+    with ThreadPoolExecutor(max_workers=fetch_concurrency) as fetchers, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                initializer=init_worker, initargs=(shared,)) as pool, \
+            open(output_path, "w") as out:
+
+        pending = {
+            fetchers.submit(collect_manager_payloads, m, gameweek, current_gw): ("fetch", m)
+            for m in manager_ids
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, manager_id = pending.pop(future)
+                if stage == "fetch":
+                    try:
+                        entries = future.result()
+                    except Exception as e:
+                        out.write(json.dumps({"manager_id": manager_id, "gameweek": gameweek, "error": str(e)}) + "\n")
+                        errors += 1
+                        continue
+                    pending[pool.submit(_build_report_line, manager_id, gameweek, entries)] = ("report", manager_id)
+                else:
+                    ok, line = future.result()
+                    out.write(line + "\n")
+                    written += 1
+                    if not ok:
+                        errors += 1
+                    if written % 50 == 0:
+                        elapsed = time.perf_counter() - start
+                        print(f"📈 {written}/{len(manager_ids)} reports, {written / elapsed:.1f} managers/s")
+
+    return written, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Sir Botty reports for many managers.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--managers", nargs="+", help="Manager IDs")
+    source.add_argument("--league", type=int, help="Classic league ID; reports every member")
+    parser.add_argument("--gameweek", type=int, help="Gameweek to report on (default: current)")
+    parser.add_argument("--output", default="reports.ndjson", help="NDJSON output file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Report worker processes")
+    parser.add_argument("--fetch-concurrency", type=int, default=16, help="Managers fetched at once")
+    args = parser.parse_args()
+
+    if args.league:
+        manager_ids = [str(e["entry"]) for e in get_league_entries(args.league)]
+        print(f"🏟️ League {args.league}: {len(manager_ids)} managers")
+    else:
+        manager_ids = args.managers
+    gameweek = args.gameweek or get_current_gameweek()
+
+    written, errors, elapsed = run_batch(
+        manager_ids, gameweek, args.output,
+        workers=args.workers, fetch_concurrency=args.fetch_concurrency
+    )
+    print(f"✅ {written} reports ({errors} errors) for GW{gameweek} in {elapsed:.1f}s — "
+          f"{written / elapsed:.1f} managers/s → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
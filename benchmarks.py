@@ -0,0 +1,198 @@
+# benchmarks.py
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import fpl_client
+import mock_fpl_server
+from data_enrichment import enrich_player_data
+from form_trend import analyze_form_trends
+from fpl_team_loader import get_team_players, report_paths
+from player_table import get_player_table
+from player_utils import calculate_predicted_gameweek_score, enrich_players_with_fixtures
+from sirbotty_logic import convert_ids_to_names, summarize_team
+from synthetic_data import SyntheticSeason
+from transfer_optimizer import suggest_best_transfers_for_manager
+from weekly_report import generate_gameweek_report
+from xi_selector import pick_starting_xi
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+# The synthetic season's double gameweek, with one blank behind it
+DEFAULT_GAMEWEEK = 33
+DEFAULT_MANAGERS = 500
+# Full reports run a chip solve each, so they get a smaller sample
+REPORT_MANAGERS = 5
+# A median this much slower than the baseline's is a regression...
+DEFAULT_THRESHOLD = 0.25
+THRESHOLDS = {"generate_gameweek_report": 0.35}
+# ...as long as it is also slower by at least this much (timer noise on tiny calls)
+MIN_REGRESSION_MS = 0.02
+# Seeded payloads never expire while the suite runs
+SEED_TTL = 24 * 3600
+
+
+class Workload:
+    """
+    The inputs every benchmark draws from: a synthetic season loaded into
+    fpl_client's cache, plus each sampled manager's report-ready squad (loaded,
+    enriched and form-trended the way the weekly report does it) and pick summary.
+    """
+
+    def __init__(self, seed=0, gameweek=DEFAULT_GAMEWEEK, managers=DEFAULT_MANAGERS):
+        self.gameweek = gameweek
+        self.season = SyntheticSeason(seed=seed, current_gameweek=gameweek, n_managers=managers)
+        self.manager_ids = list(self.season.manager_ids())
+
+        paths = {path for m in self.manager_ids for path in report_paths(m, gameweek)}
+        fpl_client.clear_cache()
+        fpl_client.seed(self.season.cache_entries(sorted(paths)), ttl=SEED_TTL)
+        self.fixtures = fpl_client.get_fixtures()
+        self.table = get_player_table()
+
+        self.squads, self.summaries = [], []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for manager_id in self.manager_ids:
+                players = get_team_players(manager_id, gameweek)[0]
+                players = analyze_form_trends(enrich_player_data(players, {}, {}))
+                self.squads.append(enrich_players_with_fixtures(players, self.fixtures, gameweek))
+                self.summaries.append(summarize_team(self.season.picks(manager_id, gameweek)))
+
+
+def benchmark_calls(workload):
+    """{benchmark: [zero-argument calls]} — one call per manager, timed one at a time."""
+    gw = workload.gameweek
+    return {
+        "enrich_players_with_fixtures": [
+            lambda s=s: enrich_players_with_fixtures(s, workload.fixtures, gw) for s in workload.squads
+        ],
+        "calculate_predicted_gameweek_score": [
+            lambda s=s: calculate_predicted_gameweek_score(s) for s in workload.squads
+        ],
+        "pick_starting_xi": [lambda s=s: pick_starting_xi(s) for s in workload.squads],
+        "convert_ids_to_names": [
+            lambda s=s: convert_ids_to_names(s, workload.table) for s in workload.summaries
+        ],
+        "suggest_best_transfers_for_manager": [
+            lambda m=m: suggest_best_transfers_for_manager(m, gw) for m in workload.manager_ids
+        ],
+        "generate_gameweek_report": [
+            lambda m=m: generate_gameweek_report(gw, m) for m in workload.manager_ids[:REPORT_MANAGERS]
+        ],
+    }
+
+
+def time_calls(calls, repeat=3):
+    """Runs every call once untimed (to warm shared indexes), then `repeat` timed rounds; ms per call."""
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for call in calls:
+            call()
+        for _ in range(repeat):
+            for call in calls:
+                start = time.perf_counter()
+                call()
+                timings.append((time.perf_counter() - start) * 1000)
+    timings = np.asarray(timings)
+    return {
+        "calls": len(timings),
+        "median_ms": round(float(np.median(timings)), 4),
+        "p95_ms": round(float(np.percentile(timings, 95)), 4),
+    }
+
+
+def compare(results, baseline):
+    """
+    Medians against a baseline; prints each change and returns the regressions as
+    [(benchmark, baseline ms, now ms)].
+    """
+    regressions = []
+    print("\n🔍 Median against baseline:")
+    for name, stats in results.items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before:
+            print(f"     {name:<38} (no baseline)")
+            continue
+        old, new = before["median_ms"], stats["median_ms"]
+        threshold = THRESHOLDS.get(name, DEFAULT_THRESHOLD)
+        change = (new - old) / old if old else 0.0
+        regressed = change > threshold and new - old > MIN_REGRESSION_MS
+        flag = "⚠️" if regressed else "  "
+        print(f"  {flag} {name:<38}{old:>10.3f} → {new:<10.3f}({change:+.0%}, limit +{threshold:.0%})")
+        if regressed:
+            regressions.append((name, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time Sir Botty's hot paths on a synthetic full season.")
+    parser.add_argument("--only", action="append", help="Run just this benchmark (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed rounds per benchmark")
+    parser.add_argument("--managers", type=int, default=DEFAULT_MANAGERS, help="Squads to benchmark over")
+    parser.add_argument("--gameweek", type=int, default=DEFAULT_GAMEWEEK)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args()
+
+    # Anything the seeded cache misses is answered by the same season, never the real API
+    upstream = mock_fpl_server.start(source=SyntheticSeason(args.seed, args.gameweek, args.managers).encoded)
+    fpl_client.FPL_BASE_URL = upstream.base_url
+
+    start = time.perf_counter()
+    workload = Workload(args.seed, args.gameweek, args.managers)
+    print(f"🧬 Synthetic season: {len(workload.season.elements)} players, {len(workload.fixtures)} fixtures, "
+          f"{len(workload.manager_ids)} squads for GW{args.gameweek} ({time.perf_counter() - start:.1f}s to build)")
+
+    calls = benchmark_calls(workload)
+    unknown = set(args.only or []) - set(calls)
+    if unknown:
+        sys.exit(f"❌ Unknown benchmark(s): {', '.join(sorted(unknown))} (have {', '.join(calls)})")
+
+    results = {}
+    print(f"\n  {'benchmark':<38}{'calls':>7}{'median':>11}{'p95':>11}  (ms per call)")
+    for name, batch in calls.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = time_calls(batch, args.repeat)
+        stats = results[name]
+        print(f"  {name:<38}{stats['calls']:>7}{stats['median_ms']:>11.3f}{stats['p95_ms']:>11.3f}")
+
+    if upstream.requests:
+        print(f"\nℹ️ {sum(upstream.requests.values())} requests missed the seeded cache")
+
+    if args.update_baseline:
+        baseline = {"seed": args.seed, "gameweek": args.gameweek, "managers": args.managers, "benchmarks": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline["benchmarks"] = json.load(f).get("benchmarks", {})
+        baseline["benchmarks"].update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️ No baseline at {args.baseline} (run with --update-baseline to create one)")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    workload_args = {"seed": args.seed, "gameweek": args.gameweek, "managers": args.managers}
+    if any(baseline.get(k) != v for k, v in workload_args.items()):
+        print(f"\nℹ️ Baseline was recorded with a different workload "
+              f"({', '.join(f'{k} {baseline.get(k)}' for k in workload_args)}); timings may not compare")
+    regressions = compare(results, baseline)
+    if regressions:
+        sys.exit(f"❌ {len(regressions)} benchmark regressions")
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
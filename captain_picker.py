@@ -1,17 +1,40 @@
-def pick_captains(players):
+def _reason(player):
+    reason = f"xG+xA: {player['xG'] + player['xA']:.2f}, form {player['form']}"
+    if "projected_points" in player:
+        reason = f"Projected {player['projected_points']:.1f} pts, " + reason
+    return reason
+
+def pick_captains(players, captaincy=None):
     # Filter out players with at least one fixture this gameweek
     eligible = [p for p in players if p.get("number_of_fixtures", 0) > 0]
 
+    # Simulated (captain, vice) pairs, best expected armband points first
+    eligible_names = {p["name"] for p in eligible}
+    for pair in captaincy or []:
+        if pair["captain"] in eligible_names and pair["vice_captain"] in eligible_names:
+            return {
+                "captain": {
+                    "name": pair["captain"],
+                    "reason": f"Expected {pair['expected_armband_points']:.1f} armband pts with vice cover, "
+                              f"plays in {pair['captain_play_probability']:.0%} of simulations"
+                },
+                "vice_captain": {
+                    "name": pair["vice_captain"],
+                    "reason": "Best cover if the captain doesn't play"
+                }
+            }
+
     if not eligible:
         return {
             "captain": {"name": "None", "reason": "No eligible players this gameweek"},
             "vice_captain": {"name": "None", "reason": "No eligible players this gameweek"}
         }
 
-    # Sort by attacking threat, form, and minutes
+    # Sort by projected points, then attacking threat, form, and minutes
     sorted_players = sorted(
         eligible,
         key=lambda p: (
+            p.get("projected_points", 0),
             p.get("xG", 0) + p.get("xA", 0),
             p.get("form", 0),
             p.get("expected_minutes", 0)
@@ -26,7 +49,7 @@ def pick_captains(players):
         return {
             "captain": {
                 "name": captain["name"],
-                "reason": f"Only eligible player: xG+xA: {captain['xG'] + captain['xA']:.2f}, form {captain['form']}"
+                "reason": f"Only eligible player: {_reason(captain)}"
             },
             "vice_captain": {
                 "name": "None",
@@ -37,10 +60,10 @@ def pick_captains(players):
     return {
         "captain": {
             "name": captain["name"],
-            "reason": f"xG+xA: {captain['xG'] + captain['xA']:.2f}, form {captain['form']}"
+            "reason": _reason(captain)
         },
         "vice_captain": {
             "name": vice["name"],
-            "reason": f"xG+xA: {vice['xG'] + vice['xA']:.2f}, form {vice['form']}"
+            "reason": _reason(vice)
         }
     }
\ No newline at end of file
@@ -0,0 +1,225 @@
+# chip_planner.py
+
+import threading
+
+import numpy as np
+import requests
+
+import fpl_client
+from fixture_index import get_fixture_index
+from projection import get_projection
+from squad_solver import solve_squad
+from transfer_optimizer import get_manager_data, get_manager_picks
+from xi_selector import select_xi_batch
+
+CHIPS = {"wildcard": "Wildcard", "freehit": "Free Hit", "bboost": "Bench Boost", "3xc": "Triple Captain"}
+# Each chip can be played once in each half of the season
+CHIP_WINDOWS = [(1, 19), (20, 38)]
+LAST_GAMEWEEK = 38
+WILDCARD_HORIZON = 5
+# Wildcard / Free Hit squads are solved per £2m of budget (rounded down, so never
+# over budget) and shared by every manager in that band
+BUDGET_STEP = 20
+SOLVE_TIME = 0.02
+
+
+def remaining_chips(chip_history, start_gameweek):
+    """
+    Chip instances still playable from start_gameweek as (chip, first gw, last gw),
+    given the manager's history["chips"] ([{"name", "event"}]).
+    """
+    used = {(c["name"], c["event"]) for c in chip_history}
+    instances = []
+    for chip in CHIPS:
+        for first, last in CHIP_WINDOWS:
+            if last < start_gameweek:
+                continue
+            if any(name == chip and first <= event <= last for name, event in used):
+                continue
+            instances.append((chip, max(first, start_gameweek), last))
+    return instances
+
+
+_chip_squads = {}
+_chip_squads_source = None
+_chip_squads_lock = threading.Lock()
+
+
+def _chip_squad_rows(projection, chip, gameweek, budget):
+    """
+    Rows of the Wildcard (optimised for WILDCARD_HORIZON gameweeks) or Free Hit
+    (this gameweek only) squad for a budget, cached per projection snapshot.
+    Budgets are rounded down to BUDGET_STEP so nearby managers share a solve.
+    """
+    global _chip_squads_source
+    budget = budget - budget % BUDGET_STEP
+    key = (chip, gameweek, budget)
+    with _chip_squads_lock:
+        if _chip_squads_source is not projection:
+            _chip_squads.clear()
+            _chip_squads_source = projection
+        rows = _chip_squads.get(key)
+    if rows is not None:
+        return rows
+
+    if chip == "freehit":
+        points, bench_weight = projection.gameweek(gameweek), 0.05
+    else:
+        points, bench_weight = projection.window(gameweek, WILDCARD_HORIZON), 0.25
+    squad = solve_squad(projection.table, points, budget=budget, bench_weight=bench_weight,
+                        time_limit=SOLVE_TIME, bound=False, restarts=0)["squad"]
+    rows = projection.table.rows([p["id"] for p in squad])
+    with _chip_squads_lock:
+        _chip_squads[key] = rows
+    return rows
+
+
+def _xi_by_gameweek(projection, rows, gameweeks):
+    """Best-XI projected points of a squad in each gameweek, plus the batch XI masks."""
+    points = projection.points[rows][:, gameweeks].T
+    element_type = np.broadcast_to(projection.table.element_type[rows], points.shape)
+    xi, _, starters = select_xi_batch(points, element_type)
+    return xi, points, starters
+
+
+def chip_gains(projection, squad_ids, budget, start_gameweek):
+    """
+    Expected gain of each chip in every gameweek from start_gameweek, against
+    holding the current squad:
+
+        Bench Boost     bench points of the held squad
+        Triple Captain  one more helping of the best starter
+        Free Hit        best Free Hit XI minus the held XI that week
+        Wildcard        Wildcard squad's XI minus the held XI over the next
+                        WILDCARD_HORIZON gameweeks
+
+    Returns (gameweeks, {chip: gains array}). Gains are floored at zero.
+    """
+    gameweeks = np.arange(start_gameweek, LAST_GAMEWEEK + 1)
+    rows = projection.table.rows(squad_ids)
+    held_xi, points, starters = _xi_by_gameweek(projection, rows, gameweeks)
+
+    gains = {
+        "bboost": points.sum(axis=1) - held_xi,
+        "3xc": np.where(starters, points, 0.0).max(axis=1),
+        "freehit": np.zeros(len(gameweeks)),
+        "wildcard": np.zeros(len(gameweeks))
+    }
+    held = dict(zip(gameweeks.tolist(), held_xi))
+    for k, gw in enumerate(gameweeks.tolist()):
+        fh_rows = _chip_squad_rows(projection, "freehit", gw, budget)
+        gains["freehit"][k] = _xi_by_gameweek(projection, fh_rows, [gw])[0][0] - held[gw]
+
+        window = [g for g in range(gw, gw + WILDCARD_HORIZON) if g in held]
+        wc_rows = _chip_squad_rows(projection, "wildcard", gw, budget)
+        wc_xi = _xi_by_gameweek(projection, wc_rows, window)[0]
+        gains["wildcard"][k] = float(np.sum(wc_xi - [held[g] for g in window]))
+
+    return gameweeks, {chip: np.maximum(gain, 0.0) for chip, gain in gains.items()}
+
+
+def plan_chip_calendar(gameweeks, gains, instances):
+    """
+    Assigns chip instances to gameweeks by dynamic programming over (gameweek,
+    bitmask of instances used): at most one chip per gameweek, each instance only
+    inside its window. Returns (total gain, [(gameweek, chip, gain)]).
+    """
+    n = len(instances)
+    masks = np.arange(2 ** n)
+    value = np.zeros(2 ** n)
+    choices = []
+    for k in range(len(gameweeks) - 1, -1, -1):
+        gw = int(gameweeks[k])
+        best, choice = value.copy(), np.full(2 ** n, -1)
+        for i, (chip, first, last) in enumerate(instances):
+            if not first <= gw <= last:
+                continue
+            bit = 1 << i
+            candidate = np.where(masks & bit, -np.inf, gains[chip][k] + value[masks | bit])
+            better = candidate > best
+            best = np.where(better, candidate, best)
+            choice = np.where(better, i, choice)
+        value = best
+        choices.append(choice)
+    choices.reverse()
+
+    calendar, mask = [], 0
+    for k, gw in enumerate(gameweeks.tolist()):
+        i = int(choices[k][mask])
+        if i >= 0:
+            chip = instances[i][0]
+            calendar.append((gw, chip, float(gains[chip][k])))
+            mask |= 1 << i
+    return float(value[0]), calendar
+
+
+def plan_chips(projection, fixture_index, squad_ids, budget, chip_history, start_gameweek, top_n=3):
+    """
+    Chip calendar for a squad: when to play each remaining chip, its expected gain,
+    and each chip's best alternative weeks.
+    """
+    instances = remaining_chips(chip_history, start_gameweek)
+    gameweeks, gains = chip_gains(projection, squad_ids, budget, start_gameweek)
+    total, calendar = plan_chip_calendar(gameweeks, gains, instances)
+
+    teams = projection.table.team[projection.table.rows(squad_ids)]
+
+    def squad_fixtures(gw):
+        counts = fixture_index.team_counts(teams, gw)
+        return {"doubles": int((counts >= 2).sum()), "blanks": int((counts == 0).sum())}
+
+    return {
+        "start_gameweek": start_gameweek,
+        "chips_remaining": [CHIPS[chip] for chip, _, _ in instances],
+        "expected_gain": round(total, 1),
+        "calendar": [
+            {"gameweek": gw, "chip": chip, "name": CHIPS[chip], "expected_gain": round(gain, 1), **squad_fixtures(gw)}
+            for gw, chip, gain in calendar
+        ],
+        "best_weeks": {
+            CHIPS[chip]: [
+                {"gameweek": int(gameweeks[k]), "expected_gain": round(float(gains[chip][k]), 1)}
+                for k in np.argsort(-gains[chip], kind="stable")[:top_n]
+            ]
+            for chip in CHIPS if any(c == chip for c, _, _ in instances)
+        }
+    }
+
+
+def plan_chips_for_manager(manager_id, start_gameweek, picks_gameweek=None):
+    """
+    Chip calendar for a manager's squad from `picks_gameweek` (defaults to
+    start_gameweek), with the budget taken as bank plus current squad value. None
+    if the manager's chip history can't be fetched, so the report goes on without it.
+    """
+    picks_gameweek = picks_gameweek or start_gameweek
+    projection = get_projection()
+    picks = get_manager_picks(manager_id, picks_gameweek).get("picks", [])
+    squad_ids = [p["element"] for p in picks]
+    bank = get_manager_data(manager_id).get("bank", 0)
+    budget = bank + int(projection.table.now_cost[projection.table.rows(squad_ids)].sum())
+    try:
+        history = fpl_client.get_manager_history(manager_id)
+    except requests.RequestException as e:
+        print(f"⚠️ No chip plan, couldn't load the chip history: {e}")
+        return None
+
+    return plan_chips(projection, get_fixture_index(), squad_ids, budget,
+                      history.get("chips", []), start_gameweek)
+
+
+if __name__ == "__main__":
+    # python chip_planner.py <manager_id> <start_gameweek>
+    import sys
+    import time
+
+    manager_id, gameweek = sys.argv[1], int(sys.argv[2])
+    start = time.perf_counter()
+    plan = plan_chips_for_manager(manager_id, gameweek)
+    if plan is None:
+        sys.exit(1)
+    print(f"🗓️ Chip plan from GW{gameweek} (+{plan['expected_gain']} pts, "
+          f"{time.perf_counter() - start:.2f}s):")
+    for entry in plan["calendar"]:
+        print(f"  GW{entry['gameweek']}: {entry['name']} (+{entry['expected_gain']} pts, "
+              f"{entry['doubles']} doubles, {entry['blanks']} blanks)")
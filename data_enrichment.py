@@ -1,12 +1,28 @@
+from history_warehouse import get_history_warehouse
+
+# Gameweeks of history behind the per-game xG/xA
+XG_WINDOW = 5
+
 def enrich_player_data(players, understat_data=None, injury_data=None):
     enriched = []
 
+    warehouse = get_history_warehouse()
+    if warehouse is not None:
+        xg = warehouse.per_appearance("expected_goals", XG_WINDOW)
+        xa = warehouse.per_appearance("expected_assists", XG_WINDOW)
+
     for p in players:
         player = p.copy()
 
-        # Estimate xG/xA using form as a proxy
-        player["xG"] = round(player.get("form", 0) * 0.55, 2)
-        player["xA"] = round(player.get("form", 0) * 0.3, 2)
+        # xG/xA per game over recent gameweeks from the history warehouse;
+        # without it (or recent minutes) estimate them using form as a proxy
+        row = warehouse.row(player.get("id", -1)) if warehouse is not None else -1
+        if row >= 0 and xg[row] == xg[row]:
+            player["xG"] = round(float(xg[row]), 2)
+            player["xA"] = round(float(xa[row]), 2)
+        else:
+            player["xG"] = round(player.get("form", 0) * 0.55, 2)
+            player["xA"] = round(player.get("form", 0) * 0.3, 2)
         player["shots"] = round(player.get("form", 0) * 2)
 
         # Use FPL injury flag as health indicator
@@ -0,0 +1,149 @@
+# fixture_index.py
+
+import threading
+
+import numpy as np
+
+import fpl_client
+
+SEASON_GAMEWEEKS = 38
+
+
+class FixtureIndex:
+    """
+    Dense team × gameweek view of fixtures/, built once per fixtures snapshot.
+
+    count[t, g]           fixtures team t plays in gameweek g (0 = blank, ≥2 = double)
+    opponent[t, g, s]     opponent team ID of the s-th of those fixtures (0 = none)
+    difficulty[t, g, s]   how hard that fixture is for team t (its FDR)
+    is_home[t, g, s]      whether team t is at home
+
+    Each side gets its own rating, as the FPL feed gives it: team_h_difficulty for
+    the home side, team_a_difficulty for the away side. Fixtures without a gameweek
+    (postponed, unscheduled) are left out.
+    """
+
+    def __init__(self, fixtures):
+        scheduled = [f for f in fixtures if f.get("event")]
+        n_teams = max([max(f["team_h"], f["team_a"]) for f in scheduled], default=20) + 1
+        n_gameweeks = max([f["event"] for f in scheduled], default=SEASON_GAMEWEEKS)
+        n_gameweeks = max(n_gameweeks, SEASON_GAMEWEEKS) + 1
+
+        count = np.zeros((n_teams, n_gameweeks), dtype=np.int8)
+        for f in scheduled:
+            count[f["team_h"], f["event"]] += 1
+            count[f["team_a"], f["event"]] += 1
+        slots = max(int(count.max(initial=0)), 1)
+
+        self.count = count
+        self.opponent = np.zeros((n_teams, n_gameweeks, slots), dtype=np.int16)
+        self.difficulty = np.zeros((n_teams, n_gameweeks, slots), dtype=np.int8)
+        self.is_home = np.zeros((n_teams, n_gameweeks, slots), dtype=bool)
+        self.finished = np.zeros((n_teams, n_gameweeks, slots), dtype=bool)
+
+        filled = np.zeros((n_teams, n_gameweeks), dtype=np.int8)
+        # Per-team fixture list in schedule order, for "next k opponents"
+        self._schedule = {}
+        ordered = sorted(scheduled, key=lambda f: (f["event"], f.get("kickoff_time") or "", f.get("id", 0)))
+        for f in ordered:
+            g = f["event"]
+            for team_id, opp_id, diff, home in [
+                (f["team_h"], f["team_a"], f["team_h_difficulty"], True),
+                (f["team_a"], f["team_h"], f["team_a_difficulty"], False)
+            ]:
+                s = filled[team_id, g]
+                self.opponent[team_id, g, s] = opp_id
+                self.difficulty[team_id, g, s] = diff
+                self.is_home[team_id, g, s] = home
+                self.finished[team_id, g, s] = bool(f.get("finished"))
+                filled[team_id, g] += 1
+                self._schedule.setdefault(team_id, []).append(
+                    (g, opp_id, diff, home, bool(f.get("finished")))
+                )
+
+        # first_from[t, g]: position in team t's schedule of its first fixture in gw ≥ g
+        self._first_from = np.zeros((n_teams, n_gameweeks + 1), dtype=np.int16)
+        self._first_unfinished = {}
+        for team_id, schedule in self._schedule.items():
+            events = np.array([entry[0] for entry in schedule])
+            self._first_from[team_id] = np.searchsorted(events, np.arange(n_gameweeks + 1), side="left")
+            self._first_unfinished[team_id] = next(
+                (i for i, entry in enumerate(schedule) if not entry[4]), len(schedule)
+            )
+
+        # Difficulty of each team's first fixture in a gameweek, 3 (neutral) when blank
+        self.first_difficulty = np.where(count > 0, self.difficulty[:, :, 0], 3).astype(np.int8)
+
+    def _in_range(self, team_id, gameweek):
+        return 0 <= team_id < self.count.shape[0] and 0 <= gameweek < self.count.shape[1]
+
+    def fixture_count(self, team_id, gameweek):
+        return int(self.count[team_id, gameweek]) if self._in_range(team_id, gameweek) else 0
+
+    def is_blank(self, team_id, gameweek):
+        return self.fixture_count(team_id, gameweek) == 0
+
+    def is_double(self, team_id, gameweek):
+        return self.fixture_count(team_id, gameweek) >= 2
+
+    def fixtures(self, team_id, gameweek):
+        """Fixtures for team T in gameweek g as [{"opponent_id", "difficulty", "is_home"}]."""
+        return [
+            {
+                "opponent_id": int(self.opponent[team_id, gameweek, s]),
+                "difficulty": int(self.difficulty[team_id, gameweek, s]),
+                "is_home": bool(self.is_home[team_id, gameweek, s])
+            }
+            for s in range(self.fixture_count(team_id, gameweek))
+        ]
+
+    def next_opponents(self, team_id, gameweek=None, k=1):
+        """
+        Up to k fixtures from gameweek onwards (or from the team's first unfinished
+        fixture when gameweek is None), as dicts with "event" added.
+        """
+        schedule = self._schedule.get(team_id, [])
+        if gameweek is None:
+            start = self._first_unfinished.get(team_id, len(schedule))
+        elif 0 <= gameweek < self._first_from.shape[1]:
+            start = int(self._first_from[team_id, gameweek])
+        else:
+            start = len(schedule)
+        return [
+            {"event": g, "opponent_id": opp, "difficulty": diff, "is_home": home}
+            for g, opp, diff, home, _ in schedule[start:start + k]
+        ]
+
+    def team_counts(self, team_ids, gameweek):
+        """Vectorised fixture counts for an array of team IDs in one gameweek."""
+        if not 0 <= gameweek < self.count.shape[1]:
+            return np.zeros(len(team_ids), dtype=np.int8)
+        return self.count[team_ids, gameweek]
+
+    def team_difficulty(self, team_ids, gameweek):
+        """Vectorised first-fixture difficulty (3 when blank) for team IDs in one gameweek."""
+        if not 0 <= gameweek < self.count.shape[1]:
+            return np.full(len(team_ids), 3, dtype=np.int8)
+        return self.first_difficulty[team_ids, gameweek]
+
+
+_index = None
+_index_source = None
+_index_lock = threading.Lock()
+
+
+def get_fixture_index(fixtures=None):
+    """
+    Returns the FixtureIndex for the current fixtures snapshot, rebuilding it only
+    when fpl_client hands back a new fixtures payload. Passing a fixtures list that
+    isn't the cached snapshot builds a one-off index for it instead.
+    """
+    global _index, _index_source
+    current = fpl_client.get_fixtures()
+    if fixtures is not None and fixtures is not current:
+        return FixtureIndex(fixtures)
+    with _index_lock:
+        if _index is None or _index_source is not current:
+            _index = FixtureIndex(current)
+            _index_source = current
+        return _index
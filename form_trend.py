@@ -1,14 +1,29 @@
 import json
 
+from history_warehouse import GAMEWEEKS, get_history_warehouse
+
+# Recent gameweeks compared against the season when the history warehouse is built
+TREND_WINDOW = 4
+
 def load_players(filepath="mock_fpl_players.json"):
     with open(filepath, "r") as f:
         return json.load(f)
 
 def analyze_form_trends(players):
+    # Points per game played lately vs all season, from the warehouse when it has
+    # the player; otherwise FPL's form vs points_per_game
+    warehouse = get_history_warehouse()
+    if warehouse is not None:
+        recent = warehouse.per_appearance("total_points", TREND_WINDOW)
+        season = warehouse.per_appearance("total_points", GAMEWEEKS)
+
     for player in players:
         form = player["form"]
         avg_points = player["points_per_game"]
-        
+        row = warehouse.row(player.get("id", -1)) if warehouse is not None else -1
+        if row >= 0 and recent[row] == recent[row]:  # NaN when no recent minutes
+            form, avg_points = recent[row], season[row]
+
         if form > avg_points + 0.5:
             trend = "⬆️ trending up"
         elif form < avg_points - 0.5:
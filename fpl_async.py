@@ -0,0 +1,133 @@
+# fpl_async.py
+
+import asyncio
+
+import httpx
+import requests
+
+import fpl_client
+import snapshot_store
+import tracing
+from resilience import RETRY_STATUSES, CircuitOpenError, backoff_delays, hedged_async, retry_after
+from singleflight import AsyncSingleFlight
+
+# Upstream requests in flight at once across the whole process
+UPSTREAM_CONCURRENCY = 32
+
+_client = None
+_semaphore = None
+_inflight = AsyncSingleFlight()
+
+
+def get_client():
+    """
+    Returns the shared non-blocking HTTP client and the semaphore bounding outbound
+    concurrency. Both belong to the running event loop, so they are made lazily.
+    """
+    global _client, _semaphore
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(fpl_client.READ_TIMEOUT, connect=fpl_client.CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=UPSTREAM_CONCURRENCY,
+                                max_keepalive_connections=UPSTREAM_CONCURRENCY)
+        )
+        _semaphore = asyncio.Semaphore(UPSTREAM_CONCURRENCY)
+    return _client, _semaphore
+
+
+async def close():
+    global _client, _semaphore
+    if _client is not None:
+        await _client.aclose()
+        _client, _semaphore = None, None
+
+
+async def fetch_json(path, ttl=None):
+    """
+    fpl_client.fetch_json without blocking the event loop. Reads and writes the same
+    cache, so synchronous code run afterwards (in a thread or, once the entries are
+    exported, a worker process) finds the payloads already there. Follows the same
+    resilience policy and shares its rate limiter and circuit breaker. Upstream
+    failures surface as the requests exceptions the rest of the code expects.
+    """
+    ttl = fpl_client.ttl_for(path) if ttl is None else ttl
+
+    entry, fresh = fpl_client.get_entry(path)
+    tracing.cache_lookup("fpl", fpl_client.lookup_result(entry, fresh))
+    if fresh:
+        if entry.get("missing"):
+            raise fpl_client.not_found(path)
+        return entry["data"]
+
+    return (await _inflight.do(path, lambda: _download(path, entry, ttl)))["data"]
+
+
+async def _download(path, entry, ttl):
+    if snapshot_store.is_replaying() or snapshot_store.is_recording():
+        # Recorded / replayed runs go through the blocking client, which owns that
+        await asyncio.to_thread(fpl_client.fetch_json, path, ttl)
+        return fpl_client.get_entry(path)[0]
+
+    try:
+        res = await _get(path, fpl_client.conditional_headers(entry))
+    except requests.RequestException as e:
+        return fpl_client.serve_stale(path, entry, e)
+
+    if res.status_code not in (304, 404) and res.status_code >= 400:
+        raise requests.HTTPError(f"{res.status_code} Error for url: {res.url}", response=res)
+    return fpl_client.store_response(path, entry, ttl, res.status_code, res.content, res.headers)
+
+
+async def _attempt(client, semaphore, url, headers):
+    try:
+        async with semaphore:
+            return await client.get(url, headers=headers)
+    except httpx.TimeoutException as e:
+        raise requests.Timeout(f"Timed out fetching {url}: {e}") from e
+    except httpx.HTTPError as e:
+        raise requests.ConnectionError(f"Could not fetch {url}: {e}") from e
+
+
+async def _rate_limit():
+    await asyncio.sleep(fpl_client.rate_limiter.reserve())
+
+
+async def _get(path, headers):
+    """fpl_client._get for the event loop: breaker, rate limit, hedging and retries."""
+    client, semaphore = get_client()
+    url = f"{fpl_client.FPL_BASE_URL}/{path}"
+    breaker = fpl_client.breaker
+    delays = backoff_delays(fpl_client.MAX_RETRIES)
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"FPL API circuit open, not fetching {path}")
+        await _rate_limit()
+
+        res = None
+        try:
+            res = await hedged_async(lambda: _attempt(client, semaphore, url, headers),
+                                     fpl_client.hedge_after_for(path), before_hedge=_rate_limit)
+        except requests.RequestException as e:
+            tracing.upstream_request(path, "error", 0)
+            error = e
+        except BaseException:
+            # Cancelled (e.g. the client went away) or a local error: free a half-open trial
+            breaker.release()
+            raise
+        else:
+            tracing.upstream_request(path, res.status_code, len(res.content))
+            if res.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return res
+            error = requests.HTTPError(f"{res.status_code} Error for url: {url}", response=res)
+        breaker.record_failure()
+
+        delay = next(delays, None)
+        if delay is None:
+            raise error
+        await asyncio.sleep(max(delay, retry_after(res)) if res is not None else delay)
+
+
+async def prefetch(paths):
+    """Warms the cache for several endpoints concurrently; failures are left to the reader."""
+    await asyncio.gather(*(fetch_json(path) for path in paths), return_exceptions=True)
@@ -0,0 +1,358 @@
+# fpl_client.py
+
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import snapshot_store
+import tracing
+from resilience import RETRY_STATUSES, CircuitBreaker, CircuitOpenError, TokenBucket, backoff_delays, hedged, retry_after
+from singleflight import SingleFlight
+
+# Overridable so everything (worker processes included) can point at a mock server
+FPL_BASE_URL = os.environ.get("FPL_BASE_URL", "https://fantasy.premierleague.com/api")
+
+# Seconds a cached payload is served before we revalidate it upstream.
+# bootstrap-static and fixtures are ~1.5 MB and only change a few times a day.
+DEFAULT_TTL = 60
+ENDPOINT_TTLS = {
+    "bootstrap-static/": 300,
+    "fixtures/": 300,
+}
+
+# 404s (e.g. picks for a gameweek whose deadline hasn't passed) are remembered briefly
+NOT_FOUND_TTL = 30
+
+POOL_SIZE = 20
+
+# Payloads kept in-process, least recently used dropped first. Expired entries are
+# kept (they still make revalidation a cheap 304) but count towards the bound, so
+# every manager ever looked up doesn't stay in memory for good.
+MAX_CACHE_ENTRIES = 10_000
+
+# Resilience policy for every upstream call (see resilience.py)
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+MAX_RETRIES = 3
+# A request still unanswered after this many seconds gets a duplicate raced against
+# it; later for the big shared payloads, whose download alone takes a while
+HEDGE_AFTER = 1.5
+ENDPOINT_HEDGE_AFTER = {
+    "bootstrap-static/": 5.0,
+    "fixtures/": 5.0,
+}
+RATE_LIMIT = 20        # requests per second
+RATE_BURST = 40
+# While upstream is failing, the last good payload is re-served for this long per attempt
+STALE_TTL = 30
+
+rate_limiter = TokenBucket(RATE_LIMIT, RATE_BURST)
+breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+
+_session = None
+_session_lock = threading.Lock()
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_inflight = SingleFlight()
+
+# Sized to the connection pool so concurrent fetches never queue for a socket
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="fpl-fetch")
+# Runs the actual requests (and their hedges), so it never waits on _executor
+_request_executor = ThreadPoolExecutor(max_workers=2 * POOL_SIZE, thread_name_prefix="fpl-request")
+
+
+def get_session():
+    """
+    Returns the shared keep-alive session used for every FPL API call.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def ttl_for(path):
+    return ENDPOINT_TTLS.get(path, DEFAULT_TTL)
+
+
+def hedge_after_for(path):
+    return ENDPOINT_HEDGE_AFTER.get(path, HEDGE_AFTER)
+
+
+def fetch_json(path, ttl=None):
+    """
+    Fetches an FPL API endpoint (e.g. "bootstrap-static/") through the shared session.
+    Payloads are cached in-process for `ttl` seconds; once stale they are revalidated
+    with If-None-Match / If-Modified-Since so an unchanged resource costs a 304.
+    Concurrent misses for the same endpoint share a single download.
+    Cached payloads are shared between callers and must be treated as read-only.
+    """
+    ttl = ttl_for(path) if ttl is None else ttl
+
+    entry, fresh = get_entry(path)
+    tracing.cache_lookup("fpl", lookup_result(entry, fresh))
+    if fresh:
+        if entry.get("missing"):
+            raise not_found(path)
+        return entry["data"]
+
+    return _inflight.do(path, lambda: _download(path, entry, ttl))["data"]
+
+
+def lookup_result(entry, fresh):
+    """How a cache lookup went: "hit", "revalidate" (expired, so a conditional GET) or "miss"."""
+    if fresh:
+        return "hit"
+    return "miss" if entry is None else "revalidate"
+
+
+def not_found(path):
+    res = requests.Response()
+    res.status_code = 404
+    res.url = f"{FPL_BASE_URL}/{path}"
+    return requests.HTTPError(f"404 Client Error: Not Found for url: {res.url}", response=res)
+
+
+def conditional_headers(entry):
+    """Revalidation headers for a cached entry (empty if there is none)."""
+    headers = {}
+    if entry:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def _download(path, entry, ttl):
+    headers = conditional_headers(entry)
+
+    if snapshot_store.is_replaying():
+        res = snapshot_store.replay(path)
+    else:
+        try:
+            res = _get(path, headers)
+        except requests.RequestException as e:
+            return serve_stale(path, entry, e)
+        if snapshot_store.is_recording() and res.status_code != 304:
+            snapshot_store.record(path, res)
+
+    if res.status_code not in (304, 404):
+        res.raise_for_status()
+    return store_response(path, entry, ttl, res.status_code, res.content, res.headers)
+
+
+def _get(path, headers):
+    """
+    One upstream GET under the resilience policy: refused while the circuit is
+    open, rate limited, bounded by timeouts, hedged when slow and retried with
+    jittered backoff on any transport error (connection, timeout, broken or
+    undecodable body) and 429/5xx responses.
+    """
+    url = f"{FPL_BASE_URL}/{path}"
+    delays = backoff_delays(MAX_RETRIES)
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"FPL API circuit open, not fetching {path}")
+        rate_limiter.acquire()
+
+        res = None
+        try:
+            # The hedge is a real upstream request too, so it takes its own token
+            res = hedged(
+                lambda: get_session().get(url, headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)),
+                hedge_after_for(path), _request_executor, before_hedge=rate_limiter.acquire
+            )
+        except requests.RequestException as e:
+            tracing.upstream_request(path, "error", 0)
+            error = e
+        except BaseException:
+            # Not an upstream failure (a local error): free a half-open trial
+            breaker.release()
+            raise
+        else:
+            tracing.upstream_request(path, res.status_code, len(res.content))
+            if res.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return res
+            error = requests.HTTPError(f"{res.status_code} Error for url: {url}", response=res)
+        breaker.record_failure()
+
+        delay = next(delays, None)
+        if delay is None:
+            raise error
+        time.sleep(max(delay, retry_after(res)) if res is not None else delay)
+
+
+def serve_stale(path, entry, error):
+    """
+    Falls back to the last good payload for `path` when upstream fails: the cached
+    entry if there is one (kept for another STALE_TTL seconds), else a recorded
+    snapshot on disk. Re-raises `error` when there is neither.
+    """
+    if entry is None:
+        try:
+            res = snapshot_store.replay(path)
+        except requests.RequestException:
+            raise error
+        tracing.cache_lookup("fpl", "stale")
+        print(f"⚠️ {path} unavailable ({error}); serving the recorded snapshot")
+        return store_response(path, None, STALE_TTL, res.status_code, res.content, res.headers)
+
+    print(f"⚠️ {path} unavailable ({error}); serving the last good copy")
+    tracing.cache_lookup("fpl", "stale")
+    entry = dict(entry, expires=time.monotonic() + STALE_TTL)
+    with _cache_lock:
+        _cache_put(path, entry)
+    if entry.get("missing"):
+        raise not_found(path)
+    return entry
+
+
+def store_response(path, entry, ttl, status_code, content, headers):
+    """
+    Caches an upstream response for `path` given the entry it revalidated (or None)
+    and returns the new entry: a 304 extends the old one, a 404 is remembered as
+    missing and raised, anything else is parsed as the new payload. Shared by the
+    blocking downloads above and the async client in fpl_async.
+    """
+    if status_code == 304 and entry:
+        entry = dict(entry, expires=time.monotonic() + ttl)
+    elif status_code == 404:
+        entry = {
+            "data": None,
+            "missing": True,
+            "version": "404",
+            "etag": None,
+            "last_modified": None,
+            "expires": time.monotonic() + min(ttl, NOT_FOUND_TTL),
+        }
+        with _cache_lock:
+            _cache_put(path, entry)
+        raise not_found(path)
+    else:
+        entry = {
+            "data": json.loads(content),
+            "version": hashlib.sha1(content).hexdigest(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "expires": time.monotonic() + ttl,
+        }
+
+    with _cache_lock:
+        _cache_put(path, entry)
+    return entry
+
+
+def get_entry(path):
+    """
+    Returns (entry, fresh) for a cached path: the raw cache entry (None if not
+    cached) and whether it can be served without revalidating.
+    """
+    with _cache_lock:
+        entry = _cache.get(path)
+        if entry is not None:
+            _cache.move_to_end(path)
+    return entry, bool(entry) and entry["expires"] > time.monotonic()
+
+
+def _cache_put(path, entry):
+    """Stores an entry as the most recently used, evicting past MAX_CACHE_ENTRIES. Hold _cache_lock."""
+    _cache[path] = entry
+    _cache.move_to_end(path)
+    while len(_cache) > MAX_CACHE_ENTRIES:
+        _cache.popitem(last=False)
+
+
+def get_version(path):
+    """
+    Returns a content hash of the cached payload for `path` (None if not cached).
+    It only changes when upstream actually returns different bytes.
+    """
+    with _cache_lock:
+        entry = _cache.get(path)
+    return entry["version"] if entry else None
+
+
+def fetch_all(*calls):
+    """
+    Runs independent zero-argument fetch callables at the same time and returns
+    their results in order, so latency is bounded by the slowest call rather than
+    the sum. The first exception raised by any call is re-raised.
+    """
+    futures = [_executor.submit(contextvars.copy_context().run, call) for call in calls]
+    return [f.result() for f in futures]
+
+
+def prefetch(paths):
+    """
+    Warms the cache for several endpoints concurrently and waits for them all.
+    Failures are ignored here; the caller that actually needs the payload will
+    raise (or fall back) as usual when it asks for it.
+    """
+    wait([_executor.submit(contextvars.copy_context().run, fetch_json, path) for path in paths])
+
+
+def export_entries(paths):
+    """
+    Returns the cached entries for `paths` (those that are cached) in a picklable
+    form, so another process can seed its own cache with them.
+    """
+    with _cache_lock:
+        return {
+            path: {k: v for k, v in _cache[path].items() if k != "expires"}
+            for path in paths if path in _cache
+        }
+
+
+def seed(entries, ttl=None):
+    """
+    Installs entries from export_entries() into this process's cache. They are served
+    for `ttl` seconds (each endpoint's default when None) before revalidating.
+    """
+    now = time.monotonic()
+    with _cache_lock:
+        for path, entry in entries.items():
+            lifetime = ttl_for(path) if ttl is None else ttl
+            _cache_put(path, dict(entry, expires=now + lifetime))
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+# ========== Endpoint Helpers ==========
+
+def get_bootstrap_data():
+    return fetch_json("bootstrap-static/")
+
+def get_fixtures():
+    return fetch_json("fixtures/")
+
+def get_manager_data(manager_id):
+    return fetch_json(f"entry/{manager_id}/")
+
+def get_manager_picks(manager_id, gameweek):
+    return fetch_json(f"entry/{manager_id}/event/{gameweek}/picks/")
+
+def get_manager_history(manager_id):
+    return fetch_json(f"entry/{manager_id}/history/")
+
+def get_league_standings(league_id, page=1):
+    return fetch_json(f"leagues-classic/{league_id}/standings/?page_standings={page}")
@@ -1,16 +1,66 @@
-from flask import Flask, request, jsonify
+import contextvars
+import hashlib
+import threading
+
+from flask import Flask, g, request, jsonify
 from personality import get_random_line
-from player_utils import get_manager_team, get_player_metadata, build_player_lookup
+from player_utils import get_manager_team, build_player_lookup
+from player_table import get_player_table
 from sirbotty_logic import (
     summarize_team,
     convert_ids_to_names,
     recommend_captain,
     recommend_transfers
 )
-from weekly_report import generate_gameweek_report  # NEW
+from weekly_report import iter_gameweek_report
+from fpl_team_loader import get_report_data_version
+from report_cache import ReportCache
+from singleflight import SingleFlight
+import tracing
 
 app = Flask(__name__)
 
+# Concurrent requests for the same manager (and gameweek) share one computation
+_analyze_flight = SingleFlight()
+
+# Rendered reports keyed by (manager_id, gw, upstream data version), stored as
+# (etag, body, sections) so the streaming endpoint can replay them
+_report_cache = ReportCache(max_entries=512)
+
+STREAM_MIMETYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+# Every response reports its pipeline stages in a Server-Timing header, and
+# ?debug_timing=1 adds the same breakdown (plus upstream and cache counts) to
+# JSON bodies. Process-wide totals are exported at /metrics.
+
+@app.before_request
+def start_trace():
+    g.trace_token = tracing.begin()
+
+@app.after_request
+def add_server_timing(response):
+    trace = tracing.current()
+    if trace is None:
+        return response
+    if request.args.get("debug_timing") == "1":
+        data = response.get_json(silent=True) if response.is_json and not response.is_streamed else None
+        if isinstance(data, dict):
+            data["debug_timing"] = trace.breakdown()
+            response.set_data(app.json.dumps(data))
+            # The body is no longer the cached representation
+            response.headers.pop("ETag", None)
+            response.cache_control.no_store = True
+    response.headers["Server-Timing"] = trace.server_timing()
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    tracing.http_request(route, response.status_code, trace.elapsed())
+    return response
+
+@app.teardown_request
+def end_trace(exc):
+    token = g.pop("trace_token", None)
+    if token is not None:
+        tracing.end(token)
+
 # ========== Basic Routes with Personality ==========
 
 @app.route("/")
@@ -27,38 +77,136 @@ def error_test():
 
 # ========== Legacy Botty Lite Analyzer ==========
 
-@app.route("/analyze", methods=["GET"])
-def analyze_team():
-    manager_id = request.args.get("id")
-    if not manager_id:
-        return jsonify({"error": "Missing Manager ID"}), 400
-
+def build_team_analysis(manager_id):
     team_data = get_manager_team(manager_id)
-    metadata = get_player_metadata()
-    player_lookup = build_player_lookup()
-
     if "error" in team_data:
-        return jsonify({
-            "error": team_data["error"],
-            "note": get_random_line("error")
-        }), 500
+        return {"error": team_data["error"]}
+
+    table = get_player_table()
+    player_lookup = build_player_lookup()
 
     summary = summarize_team(team_data)
-    named_team = convert_ids_to_names(summary, metadata)
+    named_team = convert_ids_to_names(summary, table)
     captain_pick = recommend_captain(summary["starting_player_ids"], player_lookup)
     transfer_suggestions = recommend_transfers(summary["starting_player_ids"], player_lookup)
 
-    return jsonify({
+    return {
         "message": f"Sir Botty is analyzing team {manager_id}...",
         "team": named_team,
         "captain_recommendation": captain_pick,
         "transfers": transfer_suggestions,
-        "tip": f"Sir Botty says to trust in {captain_pick['captain']} — unless he’s mysteriously benched.",
-        "signoff": get_random_line("farewell")
-    })
+        "tip": f"Sir Botty says to trust in {captain_pick['captain']} — unless he’s mysteriously benched."
+    }
+
+@app.route("/analyze", methods=["GET"])
+def analyze_team():
+    manager_id = request.args.get("id")
+    if not manager_id:
+        return jsonify({"error": "Missing Manager ID"}), 400
+
+    with tracing.stage("analysis"):
+        analysis = _analyze_flight.do(manager_id, lambda: build_team_analysis(manager_id))
+
+    if "error" in analysis:
+        return jsonify({
+            "error": analysis["error"],
+            "note": get_random_line("error")
+        }), 500
+
+    return jsonify({**analysis, "signoff": get_random_line("farewell")})
 
 # ========== NEW Full Weekly Report API ==========
 
+def store_report(key, sections):
+    """
+    Serializes a finished report's sections and caches (etag, body, sections).
+    """
+    report = {}
+    for _, fields in sections:
+        report.update(fields)
+    with tracing.stage("serialize"):
+        body = app.json.dumps(report).encode("utf-8")
+    rendered = (hashlib.sha1(body).hexdigest(), body, sections)
+    _report_cache.put(key, rendered)
+    return rendered
+
+class ReportBuild:
+    """
+    One in-progress report build. Sections are appended as the generator yields
+    them, so a streaming request can follow along while a plain request just
+    waits for the finished (etag, body, sections).
+    """
+
+    def __init__(self):
+        self.sections = []
+        self.rendered = None
+        self.error = None
+        self.finished = False
+        self._cond = threading.Condition()
+
+    def run(self, key):
+        manager_id, gameweek, _ = key
+        try:
+            sections = iter_gameweek_report(gameweek_number=gameweek, manager_id=manager_id)
+            for section in tracing.timed_sections(sections):
+                with self._cond:
+                    self.sections.append(section)
+                    self._cond.notify_all()
+            rendered = store_report(key, list(self.sections))
+        except Exception as e:
+            rendered, error = None, e
+        else:
+            error = None
+        with self._cond:
+            self.rendered, self.error, self.finished = rendered, error, True
+            self._cond.notify_all()
+        with _report_builds_lock:
+            _report_builds.pop(key, None)
+
+    def follow(self):
+        """Yields every section, waiting for the ones still being built; raises the build's error."""
+        seen = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.finished or len(self.sections) > seen)
+                new, finished, error = self.sections[seen:], self.finished, self.error
+            yield from new
+            seen += len(new)
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+    def wait(self):
+        """The finished (etag, body, sections); raises the build's error."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.finished)
+        if self.error is not None:
+            raise self.error
+        return self.rendered
+
+
+# Builds in progress by cache key: /api/report and /api/report/stream requests
+# for the same report share one, whoever arrives first
+_report_builds = {}
+_report_builds_lock = threading.Lock()
+
+def report_build(key):
+    """
+    The build for a report cache key, started on a background thread if none is in
+    flight (so a streaming client hanging up doesn't cut it short for the others).
+    Returns None if the report landed in the cache in the meantime.
+    """
+    with _report_builds_lock:
+        build = _report_builds.get(key)
+        if build is None:
+            if _report_cache.get(key) is not None:
+                return None
+            build = _report_builds[key] = ReportBuild()
+            # Copied context: the build's stages land in the starting request's trace
+            threading.Thread(target=contextvars.copy_context().run, args=(build.run, key), daemon=True).start()
+    return build
+
 @app.route("/api/report", methods=["GET"])
 def full_report():
     manager_id = request.args.get("manager_id")
@@ -68,14 +216,89 @@ def full_report():
         return jsonify({"error": "Missing Manager ID"}), 400
 
     try:
-        report = generate_gameweek_report(gameweek_number=gameweek, manager_id=manager_id)
-        return jsonify(report)
+        with tracing.stage("upstream"):
+            key = (manager_id, gameweek, get_report_data_version(manager_id, gameweek))
+        cached = _report_cache.get(key)
+        tracing.note("cache", "miss" if cached is None else "hit")
+        tracing.cache_lookup("report", "miss" if cached is None else "hit")
+        if cached is None:
+            build = report_build(key)
+            cached = build.wait() if build else _report_cache.get(key)
+
+        etag, body, _ = cached
+        response = app.response_class(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({
             "error": f"Failed to generate report: {str(e)}",
             "note": get_random_line("error")
         }), 500
 
+def encode_section(name, fields, fmt):
+    payload = app.json.dumps({"section": name, "data": fields})
+    if fmt == "sse":
+        return f"event: {name}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+def stream_report_sections(manager_id, gameweek, fmt):
+    """
+    Yields encoded report sections as soon as each is ready, then a "done" section
+    carrying the report's ETag. A report already in the cache is replayed at once;
+    otherwise the stream follows the report's build, joining one already in flight.
+    """
+    try:
+        key = (manager_id, gameweek, get_report_data_version(manager_id, gameweek))
+        cached = _report_cache.get(key)
+        tracing.cache_lookup("report", "miss" if cached is None else "hit")
+        build = report_build(key) if cached is None else None
+        if build is not None:
+            for name, fields in build.follow():
+                yield encode_section(name, fields, fmt)
+            cached = build.rendered
+        else:
+            cached = cached or _report_cache.get(key)
+            for name, fields in cached[2]:
+                yield encode_section(name, fields, fmt)
+        yield encode_section("done", {"etag": cached[0]}, fmt)
+    except Exception as e:
+        yield encode_section("error", {
+            "error": f"Failed to generate report: {str(e)}",
+            "note": get_random_line("error")
+        }, fmt)
+
+@app.route("/api/report/stream", methods=["GET"])
+def stream_report():
+    """
+    Streaming /api/report: one {"section", "data"} object per section as NDJSON
+    (default) or Server-Sent Events (?format=sse). Merging every "data" object
+    gives the same report /api/report returns.
+    """
+    manager_id = request.args.get("manager_id")
+    gameweek = request.args.get("gw", default=34, type=int)
+    fmt = request.args.get("format", default="ndjson")
+
+    if not manager_id:
+        return jsonify({"error": "Missing Manager ID"}), 400
+    if fmt not in STREAM_MIMETYPES:
+        return jsonify({"error": f"Unknown format '{fmt}', use ndjson or sse"}), 400
+
+    response = app.response_class(
+        stream_report_sections(manager_id, gameweek, fmt), mimetype=STREAM_MIMETYPES[fmt]
+    )
+    response.cache_control.no_cache = True
+    # Stop reverse proxies from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+# ========== Metrics ==========
+
+@app.route("/metrics")
+def metrics():
+    """Request, stage, upstream and cache metrics in the Prometheus text format."""
+    return app.response_class(tracing.registry.render(), mimetype="text/plain; version=0.0.4")
+
 # ========== Run Server ==========
 
 if __name__ == "__main__":
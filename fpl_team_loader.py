@@ -1,16 +1,15 @@
 import requests
 
-FPL_BASE_URL = "https://fantasy.premierleague.com/api"
+import fpl_client
+from fixture_index import get_fixture_index
+from player_table import get_player_table
+from projection import get_projection
 
 def get_bootstrap_data():
-    res = requests.get(f"{FPL_BASE_URL}/bootstrap-static/")
-    res.raise_for_status()
-    return res.json()
+    return fpl_client.get_bootstrap_data()
 
 def get_fixtures():
-    res = requests.get(f"{FPL_BASE_URL}/fixtures/")
-    res.raise_for_status()
-    return res.json()
+    return fpl_client.get_fixtures()
 
 def get_current_gameweek():
     events = get_bootstrap_data()["events"]
@@ -19,48 +18,87 @@ def get_current_gameweek():
             return event["id"]
     return max(e["id"] for e in events if e["is_next"])
 
+def is_not_found(error):
+    return isinstance(error, requests.HTTPError) and error.response is not None \
+        and error.response.status_code == 404
+
 def get_manager_picks(manager_id, gameweek):
+    """
+    The manager's picks for a gameweek; {"picks": []} if FPL has none (404, e.g.
+    the deadline hasn't passed). Any other upstream failure is raised rather than
+    passed off as an empty team.
+    """
     try:
-        url = f"{FPL_BASE_URL}/entry/{manager_id}/event/{gameweek}/picks/"
-        res = requests.get(url)
-        res.raise_for_status()
-        return res.json()
-    except Exception as e:
-        print(f"❌ Error fetching picks for GW{gameweek}: {e}")
+        return fpl_client.get_manager_picks(manager_id, gameweek)
+    except requests.HTTPError as e:
+        if not is_not_found(e):
+            raise
+        print(f"⚠️ No picks for GW{gameweek}")
         return {"picks": []}
 
 def get_manager_chips(manager_id):
+    """Lower-cased names of the chips the manager has played ([] for an unknown manager)."""
     try:
-        res = requests.get(f"{FPL_BASE_URL}/entry/{manager_id}/history/")
-        res.raise_for_status()
-        return [c["name"].lower() for c in res.json().get("chips", [])]
-    except:
+        history = fpl_client.get_manager_history(manager_id)
+    except requests.HTTPError as e:
+        if not is_not_found(e):
+            raise
         return []
-
-def get_team_players(manager_id, gameweek):
-    bootstrap = get_bootstrap_data()
-    picks_data = get_manager_picks(manager_id, gameweek)
-    fixtures = get_fixtures()
-    chips_used = get_manager_chips(manager_id)
-
-    players_info = bootstrap["elements"]
-    teams_info = {t["id"]: t["name"] for t in bootstrap["teams"]}
-    positions_info = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
-
-    player_dict = {p["id"]: p for p in players_info}
-    team_fixtures = {}
-
-    for f in fixtures:
-        if not f["finished"]:
-            for team_id, opponent_id, difficulty in [
-                (f["team_h"], f["team_a"], f["team_a_difficulty"]),
-                (f["team_a"], f["team_h"], f["team_h_difficulty"])
-            ]:
-                team_fixtures.setdefault(team_id, []).append({
-                    "opponent_id": opponent_id,
-                    "difficulty": difficulty,
-                    "event": f["event"]
-                })
+    return [c["name"].lower() for c in history.get("chips", [])]
+
+def get_league_entries(league_id):
+    """
+    Returns every row of a classic league's standings, following the paging.
+    """
+    entries = []
+    page = 1
+    while True:
+        standings = fpl_client.get_league_standings(league_id, page)["standings"]
+        entries.extend(standings.get("results", []))
+        if not standings.get("has_next"):
+            return entries
+        page += 1
+
+def report_paths(manager_id, gameweek):
+    return [
+        "bootstrap-static/",
+        "fixtures/",
+        f"entry/{manager_id}/",
+        f"entry/{manager_id}/history/",
+        f"entry/{manager_id}/event/{gameweek}/picks/",
+    ]
+
+def prefetch_manager_data(manager_id, gameweek):
+    """
+    Starts every upstream request a weekly report needs at once (shared data plus
+    the manager's entry, history and picks) so the loaders below hit a warm cache.
+    """
+    fpl_client.prefetch(report_paths(manager_id, gameweek))
+
+def get_report_data_version(manager_id, gameweek):
+    """
+    Returns the content versions of every upstream payload a report is built from,
+    bootstrap first. Two reports with the same version tuple are identical.
+    """
+    prefetch_manager_data(manager_id, gameweek)
+    return tuple(fpl_client.get_version(path) for path in report_paths(manager_id, gameweek))
+
+def get_team_players(manager_id, gameweek, target_gameweek=None):
+    """
+    Loads the manager's picks for `gameweek` and describes each player's fixtures in
+    `target_gameweek` (defaults to the same gameweek): first opponent, whether the
+    team blanks (no fixture) or doubles (two or more), and projected points.
+    """
+    table, picks_data, fixture_index, chips_used = fpl_client.fetch_all(
+        get_player_table,
+        lambda: get_manager_picks(manager_id, gameweek),
+        get_fixture_index,
+        lambda: get_manager_chips(manager_id),
+    )
+    fixture_gw = target_gameweek or gameweek
+    teams_info = table.team_names
+    projection = get_projection()
+    projected = projection.gameweek(fixture_gw)
 
     picks = picks_data.get("picks", [])
     if not picks:
@@ -69,16 +107,10 @@ def get_team_players(manager_id, gameweek):
     raw_ids = [p["element"] for p in picks]
     team_players = []
 
-    for pick in picks:
-        player_id = pick["element"]
-        player = player_dict.get(player_id)
-        if not player:
-            continue
-
-        team_id = player["team"]
-        fixtures_list = team_fixtures.get(team_id, [])
-        upcoming = [f for f in fixtures_list if f["event"]]
-        is_double = len(set(f["event"] for f in upcoming)) > 1
+    for row in table.rows(raw_ids):
+        team_id = int(table.team[row])
+        upcoming = fixture_index.fixtures(team_id, fixture_gw)
+        is_double = len(upcoming) >= 2
         is_blank = len(upcoming) == 0
 
         if upcoming:
@@ -90,30 +122,37 @@ def get_team_players(manager_id, gameweek):
             difficulty = 3
 
         team_players.append({
-            "id": player["id"],
-            "photo_id": player["photo"].split(".")[0],
+            "id": int(table.id[row]),
+            "photo_id": table.photo_id[row],
             "team_id": team_id,
-            "name": f"{player['first_name']} {player['second_name']}",
+            "name": table.name[row],
             "team": teams_info.get(team_id, "Unknown"),
-            "position": positions_info.get(player["element_type"], "UNK"),
-            "form": float(player["form"]),
-            "points_per_game": float(player["points_per_game"]),
-            "expected_minutes": int(player["minutes"]),
+            "position": table.position[row],
+            "form": float(table.form[row]),
+            "points_per_game": float(table.points_per_game[row]),
+            "expected_minutes": int(table.minutes[row]),
             "opponent_team": opponent_name,
             "opponent_difficulty": difficulty,
-            "injury_risk": player["news"] != "",
-            "injury_status": player["news"] or "None",
-            "return_date": player.get("return", ""),
+            "injury_risk": table.news[row] != "",
+            "injury_status": table.news[row] or "None",
+            "return_date": "",
             "double_gameweek": is_double,
-            "blank_gameweek": is_blank
+            "blank_gameweek": is_blank,
+            "projected_points": round(float(projected[row]), 2),
+            "play_probability": round(float(projection.play_probability[row]), 2)
         })
 
     return team_players, chips_used, raw_ids
 
 # ✅ NEW — Fallback for future gameweeks
-def fetch_latest_valid_team(manager_id):
+def fetch_latest_valid_team(manager_id, before_gw=None):
+    """
+    The most recent gameweek the manager has picks for, up to the current one
+    (or before `before_gw`), as (gameweek, picks data).
+    """
     current_gw = get_current_gameweek()
-    latest_valid_team = None
+    if before_gw is not None:
+        current_gw = min(current_gw, before_gw - 1)
     latest_gw = current_gw
 
     for gw in range(current_gw, 0, -1):
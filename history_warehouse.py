@@ -0,0 +1,206 @@
+# history_warehouse.py
+
+import argparse
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+import requests
+
+import fpl_client
+
+WAREHOUSE_FILE = os.environ.get(
+    "FPL_HISTORY_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "history_warehouse.npz")
+)
+GAMEWEEKS = 38
+# Per-fixture fields of element-summary history kept per player and gameweek
+# (double gameweeks are summed into one cell, blanks stay zero)
+STATS = (
+    "minutes", "total_points", "goals_scored", "assists", "clean_sheets",
+    "bonus", "expected_goals", "expected_assists",
+)
+# bootstrap fields that move whenever a player's history gains or corrects a
+# fixture; players whose values are unchanged are not fetched again
+FINGERPRINT_FIELDS = (
+    "team", "total_points", "minutes", "goals_scored", "assists", "clean_sheets",
+    "bonus", "expected_goals", "expected_assists",
+)
+
+
+def fingerprint(element):
+    values = "|".join(str(element.get(field)) for field in FINGERPRINT_FIELDS)
+    return hashlib.sha1(values.encode("utf-8")).hexdigest()[:16]
+
+
+class HistoryWarehouse:
+    """
+    Per-player gameweek history for the whole pool, stored column-wise: one
+    players × gameweeks float32 array per stat, a row per element ID and the
+    bootstrap fingerprint each row was ingested at. Rolling-window queries are
+    slices and sums over those arrays, with no network.
+    """
+
+    def __init__(self, element_ids, stats, fingerprints):
+        self.id = np.asarray(element_ids, dtype=np.int32)
+        self.stats = stats
+        self.fingerprints = np.asarray(fingerprints, dtype="U16")
+
+        self._row_of = np.full(int(self.id.max(initial=0)) + 1, -1, dtype=np.int32)
+        self._row_of[self.id] = np.arange(len(self.id), dtype=np.int32)
+
+    @classmethod
+    def empty(cls):
+        return cls([], {stat: np.zeros((0, GAMEWEEKS), dtype=np.float32) for stat in STATS}, [])
+
+    @classmethod
+    def load(cls, path=WAREHOUSE_FILE):
+        with np.load(path) as data:
+            return cls(data["element_id"], {stat: data[stat] for stat in STATS}, data["fingerprint"])
+
+    def save(self, path=WAREHOUSE_FILE):
+        # Written aside and swapped in, so readers never see half a file
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, element_id=self.id, fingerprint=self.fingerprints, **self.stats)
+        os.replace(tmp, path)
+
+    def __len__(self):
+        return len(self.id)
+
+    def row(self, player_id):
+        """Row index for a player ID, or -1 if unknown."""
+        if 0 <= player_id < len(self._row_of):
+            return int(self._row_of[player_id])
+        return -1
+
+    @property
+    def last_gameweek(self):
+        """The latest gameweek anyone has minutes in (0 for an empty warehouse)."""
+        played = np.nonzero(self.stats["minutes"].sum(axis=0))[0]
+        return int(played[-1]) + 1 if len(played) else 0
+
+    def _span(self, window, end):
+        end = self.last_gameweek if end is None else end
+        return max(0, end - window), end
+
+    def window(self, stat, window=5, end=None):
+        """Each player's total of `stat` over gameweeks end-window+1..end (end defaults to the latest)."""
+        start, end = self._span(window, end)
+        return self.stats[stat][:, start:end].sum(axis=1)
+
+    def appearances(self, window=5, end=None):
+        """Gameweeks each player got minutes in over the window."""
+        start, end = self._span(window, end)
+        return (self.stats["minutes"][:, start:end] > 0).sum(axis=1)
+
+    def per_appearance(self, stat, window=5, end=None):
+        """`stat` per gameweek played over the window; NaN for players who didn't play."""
+        played = self.appearances(window, end)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(played > 0, self.window(stat, window, end) / played, np.nan)
+
+    def rolling(self, stat, window=5):
+        """players × gameweeks array of `stat` summed over the `window` gameweeks up to each one."""
+        totals = np.cumsum(self.stats[stat], axis=1, dtype=np.float64)
+        shifted = np.zeros_like(totals)
+        shifted[:, window:] = totals[:, :-window]
+        return totals - shifted
+
+
+def _ingest(stats, row, history):
+    for fixture in history:
+        gw = fixture.get("round") or 0
+        if not 1 <= gw <= GAMEWEEKS:
+            continue
+        for stat in STATS:
+            stats[stat][row, gw - 1] += float(fixture.get(stat) or 0)
+
+
+def refresh(warehouse=None, bootstrap=None):
+    """
+    Brings the warehouse in line with the current bootstrap: rows for players whose
+    fingerprint is unchanged are copied over, everyone else (new, changed, or not
+    fetched last time) has element-summary/{id}/ fetched again. Players whose fetch
+    fails keep an empty fingerprint so the next refresh retries them.
+    Returns (warehouse, players fetched, players failed).
+    """
+    warehouse = warehouse if warehouse is not None else HistoryWarehouse.empty()
+    bootstrap = bootstrap or fpl_client.get_bootstrap_data()
+    elements = bootstrap["elements"]
+
+    ids = [p["id"] for p in elements]
+    fingerprints = [fingerprint(p) for p in elements]
+    stats = {stat: np.zeros((len(ids), GAMEWEEKS), dtype=np.float32) for stat in STATS}
+
+    stale = []
+    for row, (player_id, current) in enumerate(zip(ids, fingerprints)):
+        old = warehouse.row(player_id)
+        if old >= 0 and warehouse.fingerprints[old] == current:
+            for stat in STATS:
+                stats[stat][row] = warehouse.stats[stat][old]
+        else:
+            stale.append(row)
+
+    fpl_client.prefetch([f"element-summary/{ids[row]}/" for row in stale])
+    failed = 0
+    for row in stale:
+        try:
+            summary = fpl_client.fetch_json(f"element-summary/{ids[row]}/")
+        except requests.RequestException as e:
+            print(f"⚠️ No history for player {ids[row]}: {e}")
+            fingerprints[row] = ""
+            failed += 1
+            continue
+        _ingest(stats, row, summary.get("history", []))
+
+    return HistoryWarehouse(ids, stats, fingerprints), len(stale) - failed, failed
+
+
+_warehouse = None
+_warehouse_mtime = None
+_warehouse_lock = threading.Lock()
+
+
+def get_history_warehouse(path=WAREHOUSE_FILE):
+    """
+    The warehouse on disk, loaded once and reloaded when the file changes. Returns
+    None when none has been built, so callers can fall back to bootstrap-only data.
+    """
+    global _warehouse, _warehouse_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _warehouse_lock:
+        if _warehouse is None or mtime != _warehouse_mtime:
+            _warehouse = HistoryWarehouse.load(path)
+            _warehouse_mtime = mtime
+        return _warehouse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or incrementally refresh the player history warehouse.")
+    parser.add_argument("--file", default=WAREHOUSE_FILE, help="Warehouse .npz to refresh")
+    parser.add_argument("--window", type=int, default=5, help="Gameweeks for the summary query")
+    args = parser.parse_args()
+
+    warehouse = HistoryWarehouse.load(args.file) if os.path.exists(args.file) else None
+    start = time.perf_counter()
+    warehouse, fetched, failed = refresh(warehouse)
+    warehouse.save(args.file)
+    print(f"📦 {len(warehouse)} players up to GW{warehouse.last_gameweek}: fetched {fetched}, "
+          f"{failed} failed, {len(warehouse) - fetched - failed} unchanged ({time.perf_counter() - start:.1f}s)")
+
+    start = time.perf_counter()
+    xg = warehouse.window("expected_goals", args.window)
+    query_ms = (time.perf_counter() - start) * 1000
+    names = {p["id"]: p["web_name"] for p in fpl_client.get_bootstrap_data()["elements"]}
+    print(f"🔥 Top xG over the last {args.window} gameweeks ({query_ms:.2f} ms for the whole pool):")
+    for row in np.argsort(-xg)[:5]:
+        print(f"  {names.get(int(warehouse.id[row]), warehouse.id[row])}: {xg[row]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
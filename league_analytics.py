@@ -0,0 +1,158 @@
+# league_analytics.py
+
+import numpy as np
+import requests
+
+import fpl_client
+from fpl_team_loader import get_current_gameweek, get_league_entries
+from player_table import get_player_table
+
+
+class LeagueOwnership:
+    """
+    Picks of a whole mini-league as a manager × player uint8 matrix of multipliers
+    (0 = not owned or benched, 1 = starting, 2 = captain, 3 = triple captain; bench
+    boost puts the bench at 1), plus a parallel bit matrix of squad ownership.
+    Every league-wide figure is then a column reduction over these arrays.
+    """
+
+    def __init__(self, table, manager_ids, picks_by_manager):
+        self.table = table
+        self.manager_ids = list(manager_ids)
+        self._manager_row = {manager_id: m for m, manager_id in enumerate(self.manager_ids)}
+        self._eo = None
+
+        # Flatten every pick into parallel columns, then scatter them in one go
+        manager_col, player_ids, multipliers, captains = [], [], [], []
+        for m, manager_id in enumerate(self.manager_ids):
+            for p in picks_by_manager[manager_id]:
+                manager_col.append(m)
+                player_ids.append(p["element"])
+                multipliers.append(p["multiplier"])
+                captains.append(bool(p.get("is_captain")))
+
+        rows = np.array([table.row(i) for i in player_ids], dtype=np.int64)
+        known = rows >= 0
+        manager_col = np.array(manager_col, dtype=np.int64)[known]
+        rows = rows[known]
+
+        self.multiplier = np.zeros((len(self.manager_ids), len(table)), dtype=np.uint8)
+        self.owned = np.zeros((len(self.manager_ids), len(table)), dtype=bool)
+        self.multiplier[manager_col, rows] = np.array(multipliers, dtype=np.uint8)[known]
+        self.owned[manager_col, rows] = True
+        self.captain = np.bincount(
+            rows[np.array(captains, dtype=bool)[known]], minlength=len(table)
+        )
+
+    def __len__(self):
+        return len(self.manager_ids)
+
+    def ownership(self):
+        """Share of managers with the player anywhere in their squad (0-100)."""
+        return self.owned.mean(axis=0) * 100 if len(self) else np.zeros(len(self.table))
+
+    def effective_ownership(self):
+        """Average multiplier across the league (0-300): captains count twice, benched players not at all."""
+        if self._eo is None:
+            if not len(self):
+                self._eo = np.zeros(len(self.table))
+            else:
+                self._eo = self.multiplier.sum(axis=0, dtype=np.int64) / len(self) * 100
+        return self._eo
+
+    def captaincy_share(self):
+        """Share of managers captaining the player (0-100)."""
+        return self.captain / len(self) * 100 if len(self) else np.zeros(len(self.table))
+
+    def differentials(self, manager_id, top_n=5):
+        """
+        Where a manager's points will diverge from the league: "gains" are players
+        whose multiplier for this manager exceeds the league EO (points they make up
+        ground with), "threats" are high-EO players they don't field.
+        """
+        m = self._manager_row[manager_id]
+        stake = self.multiplier[m].astype(float) - self.effective_ownership() / 100
+
+        gains = np.argsort(-stake, kind="stable")[:top_n]
+        threats = np.argsort(stake, kind="stable")[:top_n]
+        return {
+            "gains": [dict(self._describe(r), stake=round(float(stake[r]), 2)) for r in gains if stake[r] > 0],
+            "threats": [dict(self._describe(r), stake=round(float(stake[r]), 2)) for r in threats if stake[r] < 0]
+        }
+
+    def _describe(self, row):
+        return {
+            "id": int(self.table.id[row]),
+            "name": self.table.name[row],
+            "team": self.table.team_names.get(int(self.table.team[row]), "Unknown"),
+            "position": self.table.position[row]
+        }
+
+    def top(self, values, top_n=10):
+        """The top_n players by one of the per-player arrays above."""
+        rows = np.argsort(-values, kind="stable")[:top_n]
+        return [dict(self._describe(r), value=round(float(values[r]), 1)) for r in rows if values[r] > 0]
+
+
+def fetch_league_picks(league_id, gameweek):
+    """
+    Pages through the league standings, then fetches every member's picks for the
+    gameweek concurrently. Managers without picks (joined later) are left out.
+    Returns (standings entries, {manager_id: picks}).
+    """
+    entries = get_league_entries(league_id)
+    paths = [f"entry/{e['entry']}/event/{gameweek}/picks/" for e in entries]
+    fpl_client.prefetch(paths)
+
+    picks_by_manager = {}
+    for e in entries:
+        try:
+            picks_by_manager[e["entry"]] = fpl_client.get_manager_picks(e["entry"], gameweek)["picks"]
+        except requests.RequestException as err:
+            print(f"⚠️ No GW{gameweek} picks for manager {e['entry']}: {err}")
+    return entries, picks_by_manager
+
+
+def analyze_league(league_id, gameweek=None, top_n=10):
+    """
+    Effective ownership, captaincy and per-manager differentials for a classic league.
+    """
+    gameweek = gameweek or get_current_gameweek()
+    entries, picks_by_manager = fetch_league_picks(league_id, gameweek)
+    league = LeagueOwnership(get_player_table(), list(picks_by_manager), picks_by_manager)
+
+    eo = league.effective_ownership()
+    return {
+        "league_id": league_id,
+        "gameweek": gameweek,
+        "managers": len(league),
+        "effective_ownership": league.top(eo, top_n),
+        "ownership": league.top(league.ownership(), top_n),
+        "captaincy": league.top(league.captaincy_share(), top_n),
+        "differentials": [
+            {
+                "manager_id": e["entry"],
+                "entry_name": e.get("entry_name"),
+                "rank": e.get("rank"),
+                **league.differentials(e["entry"], top_n=5)
+            }
+            for e in entries if e["entry"] in picks_by_manager
+        ]
+    }
+
+
+if __name__ == "__main__":
+    # python league_analytics.py <league_id> [gameweek]
+    import sys
+
+    league_id = int(sys.argv[1])
+    gameweek = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    result = analyze_league(league_id, gameweek)
+    print(f"🏟️ League {league_id}, GW{result['gameweek']}: {result['managers']} managers")
+    print("👑 Captaincy:")
+    for p in result["captaincy"]:
+        print(f"  {p['name']} ({p['team']}) – {p['value']}%")
+    print("📊 Effective ownership:")
+    for p in result["effective_ownership"]:
+        print(f"  {p['name']} ({p['team']}) – {p['value']}%")
@@ -0,0 +1,291 @@
+# load_test.py
+
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+
+import mock_fpl_server
+from synthetic_data import SyntheticSeason
+from tracing import parse_server_timing
+
+PERCENTILES = [50, 95, 99]
+ROUTES = {"report": "/api/report", "analyze": "/analyze"}
+SERVERS = {
+    "flask": lambda port: [sys.executable, "-c", f"from fpl_server import app; app.run(port={port}, threaded=True)"],
+    "asgi": lambda port: [sys.executable, "-m", "uvicorn", "asgi_server:app", "--port", str(port), "--log-level", "warning"],
+}
+# A p95 this much worse than the baseline's counts as a regression
+REGRESSION_TOLERANCE = 0.2
+
+
+def snapshot_managers(snapshot_dir):
+    """{gameweek: [manager IDs]} for every recorded set of picks in a snapshot directory."""
+    picks = {}
+    for name in os.listdir(snapshot_dir):
+        match = re.match(r"entry_(\d+)_event_(\d+)_picks\.json\.gz$", name)
+        if match:
+            picks.setdefault(int(match.group(2)), []).append(int(match.group(1)))
+    return picks
+
+
+class RequestMix:
+    """
+    Chooses what each request asks for: a route by weight, and a manager such
+    that about `hit_ratio` of requests repeat one asked for before (a report cache
+    hit once it is built) while the rest go to managers not seen yet. When the
+    unseen managers run out, every request is a repeat.
+    """
+
+    def __init__(self, manager_ids, route_weights, hit_ratio, seed=None):
+        self.rng = random.Random(seed)
+        self.cold = list(manager_ids)
+        self.rng.shuffle(self.cold)
+        self.hot = []
+        self.routes, self.weights = zip(*route_weights.items())
+        self.hit_ratio = hit_ratio
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            route = self.rng.choices(self.routes, self.weights)[0]
+            if self.hot and (not self.cold or self.rng.random() < self.hit_ratio):
+                return route, self.rng.choice(self.hot)
+            manager_id = self.cold.pop()
+            self.hot.append(manager_id)
+            return route, manager_id
+
+
+def send(session, base_url, route, manager_id, gameweek, timeout=120):
+    """One request; returns its result record (status None on a client-side failure)."""
+    params = {"manager_id": manager_id, "gw": gameweek} if route == "report" else {"id": manager_id}
+    start = time.perf_counter()
+    try:
+        res = session.get(base_url + ROUTES[route], params=params, timeout=timeout)
+        status = res.status_code
+        stages, notes = parse_server_timing(res.headers.get("Server-Timing"))
+    except requests.RequestException:
+        status, stages, notes = None, {}, {}
+    return {
+        "route": route,
+        "manager_id": manager_id,
+        "status": status,
+        "latency_ms": (time.perf_counter() - start) * 1000,
+        "stages": stages,
+        "cache": notes.get("cache"),
+    }
+
+
+def run_load(base_url, mix, gameweek, concurrency=16, duration=30.0, total=None):
+    """
+    Keeps `concurrency` clients busy until `duration` seconds pass (or `total`
+    requests have been sent). Returns (results, elapsed seconds).
+    """
+    results = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+    sent = [0]
+
+    def client():
+        session = requests.Session()
+        while time.perf_counter() - start < duration:
+            with lock:
+                if total is not None and sent[0] >= total:
+                    return
+                sent[0] += 1
+            result = send(session, base_url, *mix.next(), gameweek)
+            with lock:
+                results.append(result)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, time.perf_counter() - start
+
+
+def _percentiles(values):
+    values = np.asarray(values, dtype=float)
+    summary = dict(zip((f"p{q}" for q in PERCENTILES), np.percentile(values, PERCENTILES).round(1).tolist()))
+    summary["mean"] = round(float(values.mean()), 1)
+    return summary
+
+
+def summarize(results, elapsed):
+    """Throughput, error count, cache hit ratio and latency percentiles per route and stage."""
+    routes = {}
+    for route in sorted({r["route"] for r in results}):
+        rows = [r for r in results if r["route"] == route]
+        ok = [r for r in rows if r["status"] is not None and r["status"] < 500]
+        cached = [r for r in rows if r["cache"]]
+        stage_names = list(dict.fromkeys(name for r in ok for name in r["stages"]))  # pipeline order
+        routes[route] = {
+            "requests": len(rows),
+            "errors": len(rows) - len(ok),
+            "throughput": round(len(rows) / elapsed, 2),
+            "cache_hit_ratio": round(sum(r["cache"] == "hit" for r in cached) / len(cached), 2) if cached else None,
+            "latency_ms": _percentiles([r["latency_ms"] for r in rows]),
+            "stages_ms": {
+                name: _percentiles([r["stages"][name] for r in ok if name in r["stages"]])
+                for name in stage_names
+            },
+        }
+    return {
+        "requests": len(results),
+        "elapsed": round(elapsed, 2),
+        "throughput": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "routes": routes,
+    }
+
+
+def print_summary(summary):
+    print(f"📊 {summary['requests']} requests in {summary['elapsed']}s — {summary['throughput']} req/s")
+    for route, stats in summary["routes"].items():
+        latency = stats["latency_ms"]
+        hits = f", cache hits {stats['cache_hit_ratio']:.0%}" if stats["cache_hit_ratio"] is not None else ""
+        print(f"\n{ROUTES[route]}: {stats['requests']} requests, {stats['errors']} errors, "
+              f"{stats['throughput']} req/s{hits}")
+        print(f"  {'stage':<14}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+        for name, p in list(stats["stages_ms"].items()) + [("end-to-end", latency)]:
+            print(f"  {name:<14}{p['p50']:>10}{p['p95']:>10}{p['p99']:>10}")
+
+
+def compare(summary, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    p95 latency per route and stage against a baseline summary. Prints each change
+    and returns the ones worse than `tolerance` as [(route, stage, baseline, now)].
+    """
+    regressions = []
+    print(f"\n🔍 p95 against baseline (regression if > +{tolerance:.0%}):")
+    for route, stats in summary["routes"].items():
+        before = baseline.get("routes", {}).get(route)
+        if not before:
+            continue
+        pairs = [("end-to-end", before["latency_ms"], stats["latency_ms"])] + [
+            (name, before["stages_ms"][name], p)
+            for name, p in stats["stages_ms"].items() if name in before["stages_ms"]
+        ]
+        for name, old, new in pairs:
+            change = (new["p95"] - old["p95"]) / old["p95"] if old["p95"] else 0.0
+            flag = "⚠️" if change > tolerance else "  "
+            print(f"  {flag} {ROUTES[route]} {name:<14}{old['p95']:>10} → {new['p95']:<10}({change:+.0%})")
+            if change > tolerance:
+                regressions.append((route, name, old["p95"], new["p95"]))
+    return regressions
+
+
+def start_server(kind, port, upstream_url):
+    """Starts fpl_server (or asgi_server) in a subprocess pointed at the upstream; waits until it answers."""
+    env = dict(os.environ, FPL_BASE_URL=upstream_url)
+    process = subprocess.Popen(SERVERS[kind](port), env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except requests.RequestException:
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{kind} server did not start on port {port}")
+
+
+def parse_mix(text):
+    """"report=0.8,analyze=0.2" → {"report": 0.8, "analyze": 0.2}"""
+    mix = {}
+    for part in text.split(","):
+        route, _, weight = part.partition("=")
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"Unknown route '{route}' (use {', '.join(ROUTES)})")
+        mix[route] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Sir Botty server against the mock FPL API.")
+    upstream_data = parser.add_mutually_exclusive_group(required=True)
+    upstream_data.add_argument("--snapshots", help="snapshot_store recordings for the mock upstream")
+    upstream_data.add_argument("--synthetic", type=int, metavar="MANAGERS",
+                               help="Serve a synthetic season with this many managers instead")
+    parser.add_argument("--url", help="Test an already running server instead of starting one")
+    parser.add_argument("--server", choices=SERVERS, default="flask", help="Server to start (default flask)")
+    parser.add_argument("--port", type=int, default=5199)
+    parser.add_argument("--gameweek", type=int, help="Gameweek to request (default: most recorded, or GW20 for --synthetic)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run for")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument("--mix", type=parse_mix, default={"report": 0.8, "analyze": 0.2},
+                        help='Route weights, e.g. "report=0.8,analyze=0.2"')
+    parser.add_argument("--hit-ratio", type=float, default=0.5, help="Share of requests repeating a manager")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="Mock upstream latency (s)")
+    parser.add_argument("--upstream-jitter", type=float, default=0.05)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="Write the summary JSON here")
+    parser.add_argument("--compare", help="Baseline summary JSON; exit 1 on p95 regressions")
+    args = parser.parse_args()
+
+    source = None
+    if args.synthetic:
+        season = SyntheticSeason(args.seed or 0, args.gameweek or 20, args.synthetic)
+        source = season.encoded
+        gameweek, manager_ids = season.current_gameweek, list(season.manager_ids())
+    else:
+        managers = snapshot_managers(args.snapshots)
+        if not managers:
+            sys.exit(f"❌ No recorded picks in {args.snapshots}/")
+        gameweek = args.gameweek or max(managers, key=lambda gw: len(managers[gw]))
+        manager_ids = managers.get(gameweek, [])
+    print(f"🧪 {len(manager_ids)} managers with GW{gameweek} picks, concurrency {args.concurrency}")
+
+    upstream = mock_fpl_server.start(
+        config=mock_fpl_server.FaultConfig(latency=args.upstream_latency, jitter=args.upstream_jitter,
+                                           error_rate=args.upstream_error_rate),
+        snapshot_dir=args.snapshots, source=source
+    )
+    process = None
+    base_url = args.url
+    if not base_url:
+        process = start_server(args.server, args.port, upstream.base_url)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        mix = RequestMix(manager_ids, args.mix, args.hit_ratio, seed=args.seed)
+        # Let the server build its shared indexes before the clock starts
+        send(requests.Session(), base_url, "report", mix.next()[1], gameweek)
+        results, elapsed = run_load(base_url, mix, gameweek, args.concurrency, args.duration, args.requests)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    summary = summarize(results, elapsed)
+    summary.update(gameweek=gameweek, concurrency=args.concurrency, server=args.url or args.server,
+                   upstream_requests=sum(upstream.requests.values()))
+    print_summary(summary)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n💾 Summary written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(summary, json.load(f))
+        if regressions:
+            sys.exit(f"❌ {len(regressions)} p95 regressions")
+
+
+if __name__ == "__main__":
+    main()
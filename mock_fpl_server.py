@@ -0,0 +1,148 @@
+# mock_fpl_server.py
+
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import snapshot_store
+from synthetic_data import SyntheticSeason
+
+
+class FaultConfig:
+    """
+    What the mock does to each request: a base latency plus uniform jitter, a
+    share of requests that stall for `stall_seconds` (to trip client timeouts and
+    hedging) and a share answered with `error_status` instead of the payload.
+    Attributes can be changed while the server runs.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, stall_rate=0.0, stall_seconds=30.0,
+                 error_rate=0.0, error_status=503):
+        self.latency = latency
+        self.jitter = jitter
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+
+class MockFPLHandler(BaseHTTPRequestHandler):
+    """Serves /api/<path> from recorded snapshots, honouring If-None-Match."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        config = self.server.config
+        self.server.count(self.path)
+
+        delay = config.latency + random.uniform(0, config.jitter)
+        if random.random() < config.stall_rate:
+            delay = config.stall_seconds
+        time.sleep(delay)
+
+        if random.random() < config.error_rate:
+            self.send_error(config.error_status)
+            return
+
+        if not self.path.startswith("/api/"):
+            self.send_error(404)
+            return
+        try:
+            status, body, etag = self.server.source(self.path[len("/api/"):])
+        except requests.ConnectionError:
+            self.send_error(404)
+            return
+
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockFPLServer(ThreadingHTTPServer):
+    """
+    Stand-in for the FPL API. `source(path)` returns (status, body bytes, etag) or
+    raises requests.ConnectionError for unknown paths; by default it replays the
+    snapshot_store recordings in `snapshot_dir`. SyntheticSeason.encoded is a
+    drop-in source for a generated season.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, config=None, snapshot_dir=None, source=None):
+        super().__init__(address, MockFPLHandler)
+        self.config = config or FaultConfig()
+        self.snapshot_dir = snapshot_dir or snapshot_store.SNAPSHOT_DIR
+        self.source = source or self.replay_snapshot
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def replay_snapshot(self, path):
+        res = snapshot_store.replay(path, self.snapshot_dir)
+        etag = res.headers.get("ETag") or f'"{hashlib.sha1(res.content).hexdigest()}"'
+        return res.status_code, res.content, etag
+
+
+def start(port=0, config=None, snapshot_dir=None, source=None):
+    """Starts a mock server on a background thread and returns it (see .base_url)."""
+    server = MockFPLServer(("127.0.0.1", port), config, snapshot_dir, source)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the FPL API with fault injection.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--snapshots", default=snapshot_store.SNAPSHOT_DIR,
+                        help="Directory of snapshot_store recordings to serve")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds, up to this")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Share of requests that stall")
+    parser.add_argument("--stall-seconds", type=float, default=30.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Serve a generated season (synthetic_data) instead of snapshots")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic season seed")
+    parser.add_argument("--managers", type=int, default=5000, help="Synthetic managers (IDs from 1)")
+    parser.add_argument("--gameweek", type=int, default=20, help="Synthetic season's current gameweek")
+    args = parser.parse_args()
+
+    config = FaultConfig(args.latency, args.jitter, args.stall_rate, args.stall_seconds,
+                         args.error_rate, args.error_status)
+    source, serving = None, f"{args.snapshots}/"
+    if args.synthetic:
+        source = SyntheticSeason(args.seed, args.gameweek, args.managers).encoded
+        serving = f"a synthetic season (seed {args.seed}, {args.managers} managers, GW{args.gameweek})"
+    server = MockFPLServer(("127.0.0.1", args.port), config, args.snapshots, source)
+    print(f"🧪 Mock FPL API on {server.base_url} serving {serving} "
+          f"(FPL_BASE_URL={server.base_url} to use it)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# player_table.py
+
+import threading
+
+import numpy as np
+
+import fpl_client
+
+POSITIONS = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
+
+
+class PlayerTable:
+    """
+    Columnar view of bootstrap["elements"]: one NumPy array per field, one row per
+    player, plus an id → row index. Built once per bootstrap snapshot so filters
+    over the whole pool are array masks instead of per-player dict walks.
+    """
+
+    def __init__(self, bootstrap):
+        elements = bootstrap["elements"]
+
+        self.id = np.array([p["id"] for p in elements], dtype=np.int32)
+        self.team = np.array([p["team"] for p in elements], dtype=np.int16)
+        self.element_type = np.array([p["element_type"] for p in elements], dtype=np.int8)
+        self.now_cost = np.array([p["now_cost"] for p in elements], dtype=np.int16)
+        self.price = self.now_cost / 10.0
+        self.form = np.array([float(p["form"]) for p in elements])
+        self.points_per_game = np.array([float(p["points_per_game"]) for p in elements])
+        self.minutes = np.array([p["minutes"] for p in elements], dtype=np.int32)
+        self.total_points = np.array([p.get("total_points", 0) for p in elements], dtype=np.int32)
+        self.goals_scored = np.array([p.get("goals_scored", 0) for p in elements], dtype=np.int32)
+        self.assists = np.array([p.get("assists", 0) for p in elements], dtype=np.int32)
+        self.expected_goals = np.array([float(p.get("expected_goals") or 0) for p in elements])
+        self.expected_assists = np.array([float(p.get("expected_assists") or 0) for p in elements])
+        self.status = np.array([p["status"] for p in elements], dtype="U1")
+        # None upstream means "no news", i.e. fully available
+        self.chance_of_playing = np.array(
+            [100 if p.get("chance_of_playing_next_round") is None else p["chance_of_playing_next_round"]
+             for p in elements],
+            dtype=np.int16
+        )
+
+        self.name = np.array([f"{p['first_name']} {p['second_name']}" for p in elements], dtype=object)
+        self.photo_id = np.array([p["photo"].split(".")[0] for p in elements], dtype=object)
+        self.news = np.array([p["news"] for p in elements], dtype=object)
+
+        self.team_names = {t["id"]: t["name"] for t in bootstrap["teams"]}
+        self.position = np.array([POSITIONS.get(t, "UNK") for t in self.element_type], dtype=object)
+
+        self._row_of = np.full(int(self.id.max(initial=0)) + 1, -1, dtype=np.int32)
+        self._row_of[self.id] = np.arange(len(self.id), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.id)
+
+    def row(self, player_id):
+        """Row index for a player ID, or -1 if unknown."""
+        if 0 <= player_id < len(self._row_of):
+            return int(self._row_of[player_id])
+        return -1
+
+    def rows(self, player_ids):
+        """Row indices for known player IDs, in the given order (unknown IDs dropped)."""
+        ids = np.asarray(player_ids, dtype=np.int64)
+        ids = ids[(ids >= 0) & (ids < len(self._row_of))]
+        rows = self._row_of[ids]
+        return rows[rows >= 0]
+
+    def available_mask(self):
+        """Available or doubtful, the same filter the transfer optimizer has always used."""
+        return (self.status == "a") | (self.status == "d")
+
+    def in_ids_mask(self, player_ids):
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.rows(player_ids)] = True
+        return mask
+
+
+_table = None
+_table_version = None
+_table_lock = threading.Lock()
+
+
+def get_player_table():
+    """
+    Returns the PlayerTable for the current bootstrap snapshot, rebuilding it only
+    when fpl_client reports a new bootstrap version.
+    """
+    global _table, _table_version
+    bootstrap = fpl_client.get_bootstrap_data()
+    version = fpl_client.get_version("bootstrap-static/")
+    with _table_lock:
+        if _table is None or version != _table_version:
+            _table = PlayerTable(bootstrap)
+            _table_version = version
+        return _table
@@ -1,20 +1,13 @@
 # player_utils.py
 
-import requests
-from collections import defaultdict
-
-FPL_FIXTURES_URL = "https://fantasy.premierleague.com/api/fixtures/"
-FPL_BOOTSTRAP_URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
+import fpl_client
+from fixture_index import get_fixture_index
 
 def fetch_fixtures():
-    response = requests.get(FPL_FIXTURES_URL)
-    response.raise_for_status()
-    return response.json()
+    return fpl_client.get_fixtures()
 
 def get_current_gameweek():
-    response = requests.get(FPL_BOOTSTRAP_URL)
-    response.raise_for_status()
-    data = response.json()
+    data = fpl_client.get_bootstrap_data()
     events = data.get("events", [])
     for event in events:
         if event["is_current"]:
@@ -25,44 +18,22 @@ def enrich_players_with_fixtures(players, fixtures, current_gameweek):
     """
     Adds 'number_of_fixtures', 'opponent_team', and 'opponent_difficulty' to each player
     based on their team in the current gameweek.
-    Defaults to 1 fixture if fixture data is incomplete (e.g. future gameweeks).
+    Blank gameweeks get 0 fixtures and "No match".
     """
-    team_fixture_count = defaultdict(int)
-    team_fixtures = defaultdict(list)
+    fixture_index = get_fixture_index(fixtures)
 
     # Fetch team names for enrichment
-    bootstrap = requests.get(FPL_BOOTSTRAP_URL).json()
+    bootstrap = fpl_client.get_bootstrap_data()
     team_names = {team["id"]: team["name"] for team in bootstrap["teams"]}
 
-    for fixture in fixtures:
-        if fixture.get("event") != current_gameweek:
-            continue
-        team_h = fixture.get("team_h")
-        team_a = fixture.get("team_a")
-
-        if team_h:
-            team_fixture_count[team_h] += 1
-            team_fixtures[team_h].append({
-                "opponent": team_a,
-                "difficulty": fixture.get("team_a_difficulty", 3)
-            })
-
-        if team_a:
-            team_fixture_count[team_a] += 1
-            team_fixtures[team_a].append({
-                "opponent": team_h,
-                "difficulty": fixture.get("team_h_difficulty", 3)
-            })
-
     for player in players:
         team_id = player.get("team_id")
-        fixtures_for_team = team_fixtures.get(team_id, [])
+        fixtures_for_team = fixture_index.fixtures(team_id, current_gameweek) if team_id else []
         player["number_of_fixtures"] = len(fixtures_for_team)
 
         if fixtures_for_team:
             first_fixture = fixtures_for_team[0]
-            opp_team_id = first_fixture["opponent"]
-            player["opponent_team"] = team_names.get(opp_team_id, "Unknown")
+            player["opponent_team"] = team_names.get(first_fixture["opponent_id"], "Unknown")
             player["opponent_difficulty"] = first_fixture["difficulty"]
         else:
             player["opponent_team"] = "No match"
@@ -70,6 +41,40 @@ def enrich_players_with_fixtures(players, fixtures, current_gameweek):
 
     return players
 
+def get_manager_team(manager_id):
+    """
+    Returns the manager's picks for the current gameweek, or {"error": ...} if they
+    can't be loaded (private team, bad ID, upstream down).
+    """
+    try:
+        return fpl_client.get_manager_picks(manager_id, get_current_gameweek())
+    except Exception as e:
+        return {"error": f"Could not load team {manager_id}: {e}"}
+
+def get_player_metadata():
+    """
+    Returns the raw bootstrap 'elements' list (one dict per player).
+    """
+    return fpl_client.get_bootstrap_data()["elements"]
+
+def build_player_lookup():
+    """
+    Maps player ID → the fields the captain/transfer recommenders need,
+    with 'form' parsed to a float.
+    """
+    return {
+        p["id"]: {
+            "id": p["id"],
+            "name": f"{p['first_name']} {p['second_name']}",
+            "element_type": p["element_type"],
+            "form": float(p["form"]),
+            "total_points": p["total_points"],
+            "now_cost": p["now_cost"],
+            "chance_of_playing_next_round": p["chance_of_playing_next_round"]
+        }
+        for p in get_player_metadata()
+    }
+
 def calculate_predicted_gameweek_score(players):
     """
     Calculates total predicted gameweek score based on captaincy and fixture count.
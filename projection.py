@@ -0,0 +1,97 @@
+# projection.py
+
+import threading
+
+import numpy as np
+
+import fpl_client
+from fixture_index import get_fixture_index
+from player_table import get_player_table
+
+# Weight of recent form against season points-per-game in the per-fixture base
+FORM_WEIGHT = 0.6
+# Multiplier on the per-fixture base by fixture difficulty (index = FDR, 0 = unused)
+DIFFICULTY_FACTOR = np.array([0.0, 1.3, 1.15, 1.0, 0.85, 0.7])
+# Share of games a player doesn't start in which he still comes on
+CAMEO_RATE = 0.4
+
+
+class Projection:
+    """
+    Expected points for every player in every gameweek, as one players × gameweeks
+    matrix (rows follow the PlayerTable, columns are gameweek numbers):
+
+        points[r, g] = base[r] × minutes_share[r] × availability[r] × Σ_fixtures factor(FDR)
+
+    base is a form/ppg blend per appearance, minutes_share how much of the season's
+    available minutes the player has played so far, availability the chance of
+    playing (zero unless available or doubtful), and each fixture in gameweek g is
+    scaled by its difficulty, so blanks project zero and doubles roughly twice.
+    The matrix is read-only; everyone shares the one built for the current snapshot.
+    """
+
+    def __init__(self, table, fixture_index, finished_gameweeks):
+        self.table = table
+        self.fixture_index = fixture_index
+
+        self.base = FORM_WEIGHT * table.form + (1 - FORM_WEIGHT) * table.points_per_game
+        self.minutes_share = np.clip(table.minutes / (90.0 * max(finished_gameweeks, 1)), 0.0, 1.0)
+        self.availability = np.where(table.available_mask(), table.chance_of_playing / 100.0, 0.0)
+        # Chance of getting on the pitch in a single fixture
+        self.play_probability = self.availability * (
+            self.minutes_share + (1 - self.minutes_share) * CAMEO_RATE
+        )
+
+        # team × gameweek sum of difficulty factors over that gameweek's fixtures
+        slots = np.arange(fixture_index.difficulty.shape[2])
+        played = slots[None, None, :] < fixture_index.count[:, :, None]
+        team_factor = (DIFFICULTY_FACTOR[fixture_index.difficulty] * played).sum(axis=2)
+
+        per_player = self.base * self.minutes_share * self.availability
+        self.points = per_player[:, None] * team_factor[table.team]
+        self.points.setflags(write=False)
+
+    def gameweek(self, gameweek):
+        """Projected points for every player in one gameweek (zeros outside the season)."""
+        if not 0 <= gameweek < self.points.shape[1]:
+            return np.zeros(len(self.table))
+        return self.points[:, gameweek]
+
+    def window(self, start_gameweek, horizon):
+        """Projected points summed over `horizon` gameweeks from start_gameweek."""
+        stop = min(start_gameweek + horizon, self.points.shape[1])
+        return self.points[:, start_gameweek:stop].sum(axis=1)
+
+    def by_gameweek(self, start_gameweek, horizon):
+        """{gameweek: projected points} for each gameweek in the window."""
+        stop = min(start_gameweek + horizon, self.points.shape[1])
+        return {gw: self.points[:, gw] for gw in range(start_gameweek, stop)}
+
+    def for_players(self, player_ids, gameweek):
+        """{player ID: projected points} for the given IDs in one gameweek."""
+        rows = self.table.rows(player_ids)
+        return {int(self.table.id[r]): float(self.points[r, gameweek]) for r in rows} \
+            if 0 <= gameweek < self.points.shape[1] else {}
+
+
+_projection = None
+_projection_source = None
+_projection_lock = threading.Lock()
+
+
+def get_projection():
+    """
+    Returns the Projection for the current bootstrap and fixtures snapshots,
+    rebuilding it only when either changes.
+    """
+    global _projection, _projection_source
+    table = get_player_table()
+    fixture_index = get_fixture_index()
+
+    with _projection_lock:
+        if _projection_source != (table, fixture_index):
+            events = fpl_client.get_bootstrap_data().get("events", [])
+            finished = sum(1 for e in events if e.get("finished"))
+            _projection = Projection(table, fixture_index, finished)
+            _projection_source = (table, fixture_index)
+        return _projection
@@ -0,0 +1,49 @@
+# report_cache.py
+
+import threading
+from collections import OrderedDict
+
+
+class ReportCache:
+    """
+    Bounded LRU cache of rendered reports keyed by (manager_id, gameweek, data_version),
+    where data_version is the tuple from fpl_team_loader.get_report_data_version
+    (bootstrap version first). When a new bootstrap snapshot shows up, every entry
+    built from an older one is dropped.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bootstrap_version = None
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        bootstrap_version = key[2][0]
+        with self._lock:
+            if bootstrap_version != self._bootstrap_version:
+                self._invalidate_except(bootstrap_version)
+                self._bootstrap_version = bootstrap_version
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _invalidate_except(self, bootstrap_version):
+        stale = [k for k in self._entries if k[2][0] != bootstrap_version]
+        for k in stale:
+            del self._entries[k]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
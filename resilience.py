@@ -0,0 +1,165 @@
+# resilience.py
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import requests
+
+# Upstream statuses worth retrying; everything else is an answer
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Rate limiter: `rate` requests per second on average, bursts of up to `burst`.
+    reserve() takes a token and returns how long the caller must wait before
+    using it, so threads can sleep and coroutines can await the same bucket.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of calling upstream while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing upstream: after `failure_threshold` failures in a row
+    the circuit opens and calls are refused for `reset_timeout` seconds. Then one
+    trial call is let through (half-open); it closes the circuit on success and
+    reopens it on failure.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release(self):
+        """
+        Ends an allowed call that neither succeeded nor failed upstream (it was
+        cancelled or hit a local bug), so a half-open trial can't stay taken for good.
+        """
+        with self._lock:
+            self._trial_running = False
+
+
+def backoff_delays(retries, base=0.25, cap=4.0):
+    """Full-jitter exponential backoff: retry k waits uniformly up to min(cap, base·2^k)."""
+    for k in range(retries):
+        yield random.uniform(0, min(cap, base * 2 ** k))
+
+
+def retry_after(response, cap=30.0):
+    """Seconds asked for by a Retry-After header (0 if absent or not a number)."""
+    try:
+        return min(float(response.headers.get("Retry-After", 0)), cap)
+    except ValueError:
+        return 0.0
+
+
+def hedged(call, hedge_after, executor, before_hedge=None):
+    """
+    Runs call() and, if it hasn't answered within `hedge_after` seconds, races an
+    identical second call against it. Returns the first successful result; only
+    raises if both fail. Meant for idempotent requests; the loser runs to completion
+    in the background. before_hedge() runs just before the second call is sent
+    (e.g. to take a rate-limit token for it).
+    """
+    first = executor.submit(call)
+    done, _ = wait([first], timeout=hedge_after)
+    if done:
+        return first.result()
+
+    if before_hedge is not None:
+        before_hedge()
+    pending = {first, executor.submit(call)}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+async def hedged_async(make_call, hedge_after, before_hedge=None):
+    """
+    hedged() for coroutines: make_call() returns a fresh awaitable per attempt, and
+    before_hedge (if given) is a coroutine function awaited before the second one.
+    """
+    first = asyncio.ensure_future(make_call())
+    done, _ = await asyncio.wait({first}, timeout=hedge_after)
+    if done:
+        return first.result()
+
+    if before_hedge is not None:
+        await before_hedge()
+    pending = {first, asyncio.ensure_future(make_call())}
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return task.result()
+            error = task.exception()
+    raise error
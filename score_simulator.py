@@ -0,0 +1,230 @@
+# score_simulator.py
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fixture_index import get_fixture_index
+from projection import CAMEO_RATE, DIFFICULTY_FACTOR, get_projection
+from transfer_optimizer import get_manager_picks
+from xi_selector import auto_substitute
+
+GOAL_POINTS = np.array([0, 10, 6, 5, 4])         # by element_type
+CLEAN_SHEET_POINTS = np.array([0, 4, 4, 1, 0])
+ASSIST_POINTS = 3
+# Chance of keeping a clean sheet by the team's fixture difficulty
+CLEAN_SHEET_PROB = np.array([0.0, 0.5, 0.42, 0.32, 0.22, 0.14])
+# How much of a full game's attacking output a cameo gets
+CAMEO_SCALE = 0.3
+# Smallest minutes sample a per-90 rate is trusted on
+MIN_RATE_MINUTES = 270
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def squad_parameters(table, fixture_index, projection, picks, gameweek):
+    """
+    Everything the simulator needs for one squad in one gameweek, as plain arrays
+    (picklable, so batch runs can ship them to worker processes). `picks` are FPL
+    picks in squad order: the first 11 start, the rest are the bench in order.
+    Rates per fixture slot are zero where the team has no such fixture.
+    """
+    ids = [p["element"] for p in picks]
+    rows = np.array([table.row(i) for i in ids])
+    known = rows >= 0
+    picks = [p for p, k in zip(picks, known) if k]
+    rows = rows[known]
+
+    team = table.team[rows].astype(np.int64)
+    slots = fixture_index.difficulty.shape[2]
+    in_season = 0 <= gameweek < fixture_index.count.shape[1]
+    g = gameweek if in_season else 0
+    has_fixture = (np.arange(slots)[None, :] < fixture_index.count[team, g][:, None]) & in_season
+    difficulty = np.where(has_fixture, fixture_index.difficulty[team, g], 0)
+
+    full_games = np.maximum(table.minutes[rows], MIN_RATE_MINUTES) / 90.0
+    goals = np.where(table.expected_goals[rows] > 0, table.expected_goals[rows], table.goals_scored[rows])
+    assists = np.where(table.expected_assists[rows] > 0, table.expected_assists[rows], table.assists[rows])
+    attack = DIFFICULTY_FACTOR[difficulty] * has_fixture
+
+    start_prob = projection.availability[rows] * projection.minutes_share[rows]
+    cameo_prob = projection.availability[rows] * (1 - projection.minutes_share[rows]) * CAMEO_RATE
+
+    squad_teams, team_slot = np.unique(team, return_inverse=True)
+    team_difficulty = np.zeros((len(squad_teams), slots), dtype=np.int64)
+    team_difficulty[team_slot] = difficulty
+
+    return {
+        "ids": table.id[rows].astype(int).tolist(),
+        "names": table.name[rows].tolist(),
+        "element_type": table.element_type[rows].astype(np.int64),
+        "start_prob": (start_prob[:, None] * has_fixture).astype(np.float32),
+        "cameo_prob": (cameo_prob[:, None] * has_fixture).astype(np.float32),
+        "goal_rate": ((goals / full_games)[:, None] * attack).astype(np.float32),
+        "assist_rate": ((assists / full_games)[:, None] * attack).astype(np.float32),
+        "team_slot": team_slot,
+        "clean_sheet_prob": np.where(team_difficulty > 0, CLEAN_SHEET_PROB[team_difficulty], 0.0).astype(np.float32),
+        "captain": next((i for i, p in enumerate(picks) if p.get("is_captain")), 0),
+        "vice": next((i for i, p in enumerate(picks) if p.get("is_vice_captain")), 1),
+        "captain_multiplier": max([p.get("multiplier", 2) for p in picks if p.get("is_captain")] or [2]),
+        "starters": min(11, len(picks))
+    }
+
+
+class SquadSimulation:
+    """
+    n_draws simulated gameweeks for one squad. `points[d, i]` is what player i
+    scores in draw d (zero if he doesn't play), `played[d, i]` whether he got on
+    the pitch, `in_xi[d, i]` whether he counts after automatic substitutions and
+    `total[d]` the squad's gameweek score including the armband.
+    """
+
+    def __init__(self, params, points, played, in_xi, total):
+        self.params = params
+        self.points = points
+        self.played = played
+        self.in_xi = in_xi
+        self.total = total
+
+    def __len__(self):
+        return len(self.total)
+
+    def percentiles(self, q=PERCENTILES):
+        return dict(zip(q, np.percentile(self.total, q).round(1).tolist()))
+
+    def captain_ev(self):
+        """
+        Expected armband points for every (captain, vice) pair of starters: the
+        captain's points when he plays, the vice's when he doesn't. Returns an
+        n × n matrix; the diagonal is meaningless.
+        """
+        extra = self.params["captain_multiplier"] - 1
+        n = self.params["starters"]
+        points = self.points[:, :n]
+        missed = ~self.played[:, :n]
+        own = points.mean(axis=0)
+        cover = missed.T.astype(np.float32) @ points / len(self)
+        return extra * (own[:, None] + cover)
+
+    def best_captaincy(self, top_n=3):
+        ev = self.captain_ev()
+        np.fill_diagonal(ev, -np.inf)
+        order = np.argsort(-ev, axis=None, kind="stable")[:top_n]
+        names = self.params["names"]
+        play_rate = self.played.mean(axis=0)
+        return [
+            {
+                "captain": names[c], "captain_id": self.params["ids"][c],
+                "vice_captain": names[v], "vice_captain_id": self.params["ids"][v],
+                "expected_armband_points": round(float(ev[c, v]), 2),
+                "captain_play_probability": round(float(play_rate[c]), 2)
+            }
+            for c, v in (np.unravel_index(i, ev.shape) for i in order)
+        ]
+
+    def summary(self, top_pairs=3):
+        """JSON-ready summary: score distribution, percentiles and per-player figures."""
+        counts = np.bincount(np.clip(np.round(self.total), 0, None).astype(np.int64))
+        return {
+            "simulations": len(self),
+            "expected_score": round(float(self.total.mean()), 1),
+            "std": round(float(self.total.std()), 1),
+            "percentiles": self.percentiles(),
+            "distribution": (counts / len(self)).round(4).tolist(),
+            "captaincy": self.best_captaincy(top_pairs),
+            "players": [
+                {
+                    "id": self.params["ids"][i],
+                    "name": self.params["names"][i],
+                    "expected_points": round(float(self.points[:, i].mean()), 2),
+                    "play_probability": round(float(self.played[:, i].mean()), 2),
+                    "haul_probability": round(float((self.points[:, i] >= 10).mean()), 3)
+                }
+                for i in range(len(self.params["ids"]))
+            ]
+        }
+
+
+def simulate_squad(params, n_draws=100_000, seed=None):
+    """
+    Samples minutes, goals, assists and clean sheets for the whole squad across
+    n_draws gameweeks at once. Minutes come from chance of playing and share of
+    minutes played; goals and assists are Poisson around per-90 xG/xA scaled by
+    fixture difficulty; clean sheets are drawn once per club and fixture, so
+    teammates keep them together. Bonus, saves and cards are not modelled.
+    """
+    rng = np.random.default_rng(seed)
+    element_type = params["element_type"]
+    n, slots = params["start_prob"].shape
+
+    u = rng.random((n_draws, n, slots), dtype=np.float32)
+    full = u < params["start_prob"]
+    cameo = ~full & (u < params["start_prob"] + params["cameo_prob"])
+    minutes_scale = np.where(full, 1.0, np.where(cameo, CAMEO_SCALE, 0.0)).astype(np.float32)
+
+    goals = rng.poisson(params["goal_rate"] * minutes_scale)
+    assists = rng.poisson(params["assist_rate"] * minutes_scale)
+    team_clean_sheet = rng.random((n_draws,) + params["clean_sheet_prob"].shape, dtype=np.float32) \
+        < params["clean_sheet_prob"]
+    clean_sheet = team_clean_sheet[:, params["team_slot"], :] & full
+
+    per_fixture = (
+        2 * full + cameo
+        + goals * GOAL_POINTS[element_type][:, None]
+        + assists * ASSIST_POINTS
+        + clean_sheet * CLEAN_SHEET_POINTS[element_type][:, None]
+    )
+    points = per_fixture.sum(axis=2).astype(np.float32)
+    played = (full | cameo).any(axis=2)
+
+    in_xi = auto_substitute(params["element_type"], params["starters"], played)
+    captain, vice = params["captain"], params["vice"]
+    armband = np.where(
+        played[:, captain], points[:, captain],
+        np.where(played[:, vice] & in_xi[:, vice], points[:, vice], 0.0)
+    ) * (params["captain_multiplier"] - 1)
+    total = (points * in_xi).sum(axis=1) + armband
+
+    return SquadSimulation(params, points, played, in_xi, total)
+
+
+def _simulate_summary(params, n_draws, seed):
+    return simulate_squad(params, n_draws, seed).summary()
+
+
+def simulate_many(param_list, n_draws=100_000, workers=None, seed=None):
+    """
+    Summaries for many squads. With workers > 1 the squads are spread over a
+    process pool; the parameters are plain arrays, so workers need no FPL data.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(param_list))
+    if not workers or workers <= 1:
+        return [_simulate_summary(p, n_draws, s) for p, s in zip(param_list, seeds)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(_simulate_summary, param_list, [n_draws] * len(param_list), seeds))
+
+
+def simulate_manager(manager_id, picks_gameweek, gameweek=None, n_draws=100_000, seed=None):
+    """Simulates a manager's picks from `picks_gameweek` playing in `gameweek`."""
+    gameweek = gameweek or picks_gameweek
+    picks = get_manager_picks(manager_id, picks_gameweek).get("picks", [])
+    projection = get_projection()
+    params = squad_parameters(projection.table, get_fixture_index(), projection, picks, gameweek)
+    return simulate_squad(params, n_draws, seed)
+
+
+if __name__ == "__main__":
+    # python score_simulator.py <manager_id> <gameweek> [draws]
+    import sys
+    import time
+
+    manager_id, gameweek = sys.argv[1], int(sys.argv[2])
+    draws = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+
+    start = time.perf_counter()
+    summary = simulate_manager(manager_id, gameweek, n_draws=draws).summary()
+    print(f"🎲 {draws} simulations in {time.perf_counter() - start:.2f}s: "
+          f"{summary['expected_score']} ± {summary['std']} pts, percentiles {summary['percentiles']}")
+    for pair in summary["captaincy"]:
+        print(f"  (C) {pair['captain']} / (V) {pair['vice_captain']} – "
+              f"{pair['expected_armband_points']} armband pts")
@@ -1,4 +1,4 @@
-import requests
+from fixture_index import get_fixture_index
 
 def summarize_team(team_data):
     try:
@@ -19,7 +19,7 @@ def summarize_team(team_data):
         return {"error": str(e)}
 
 
-def convert_ids_to_names(summary, metadata):
+def convert_ids_to_names(summary, table):
     try:
         # Position lookup
         id_to_position = {
@@ -37,31 +37,31 @@ def convert_ids_to_names(summary, metadata):
             16: "Nottingham Forest", 17: "Sheffield Utd", 18: "Spurs", 19: "West Ham", 20: "Wolves"
         }
 
-        # Get fixtures data
-        fixtures_response = requests.get("https://fantasy.premierleague.com/api/fixtures/")
-        fixtures = fixtures_response.json()
-
-        # Build fixture map: team_id → next opponent and home/away
-        fixture_map = {}
-        for f in fixtures:
-            if not f["finished"] and f["event"] is not None:
-                home_id = f["team_h"]
-                away_id = f["team_a"]
-                if home_id not in fixture_map:
-                    fixture_map[home_id] = f"{team_lookup.get(away_id)} (H)"
-                if away_id not in fixture_map:
-                    fixture_map[away_id] = f"{team_lookup.get(home_id)} (A)"
-
-        # Build player ID → info
-        id_to_info = {
-            p["id"]: {
-                "name": f"{p['first_name']} {p['second_name']}",
-                "position": id_to_position.get(p["element_type"], "Unknown"),
-                "team": team_lookup.get(p["team"], "Unknown"),
-                "value": p["now_cost"] / 10,
-                "opponent": fixture_map.get(p["team"], "No fixture")
-            } for p in metadata
-        }
+        # Next unfinished fixture per team, from the shared fixture index
+        fixture_index = get_fixture_index()
+
+        def next_fixture(team_id):
+            upcoming = fixture_index.next_opponents(team_id, k=1)
+            if not upcoming:
+                return "No fixture"
+            f = upcoming[0]
+            return f"{team_lookup.get(f['opponent_id'])} ({'H' if f['is_home'] else 'A'})"
+
+        # Build player ID → info, only for the players in this squad
+        squad_ids = (
+            summary["starting_player_ids"] + summary["bench_player_ids"]
+            + [summary["captain_id"], summary["vice_captain_id"]]
+        )
+        id_to_info = {}
+        for row in table.rows(squad_ids):
+            team_id = int(table.team[row])
+            id_to_info[int(table.id[row])] = {
+                "name": table.name[row],
+                "position": id_to_position.get(int(table.element_type[row]), "Unknown"),
+                "team": team_lookup.get(team_id, "Unknown"),
+                "value": float(table.price[row]),
+                "opponent": next_fixture(team_id)
+            }
 
         def map_ids(id_list):
             return [
@@ -115,7 +115,10 @@ def recommend_transfers(starting_ids, player_lookup, budget=0, max_transfers=1):
             if not p:
                 continue
             if (p["chance_of_playing_next_round"] or 100) < 50 or p["form"] < 2.0:
-                transfer_out.append({"id": pid, "name": p["name"], "form": p["form"], "cost": p["now_cost"]})
+                transfer_out.append({
+                    "id": pid, "name": p["name"], "form": p["form"],
+                    "cost": p["now_cost"], "element_type": p["element_type"]
+                })
 
         transfer_in = []
         if transfer_out:
@@ -123,7 +126,9 @@ def recommend_transfers(starting_ids, player_lookup, budget=0, max_transfers=1):
                 max_price = out_player["cost"] + budget
                 candidates = [
                     p for p in player_lookup.values()
-                    if (p["form"] > 4.0 and (p["chance_of_playing_next_round"] or 100) >= 75 and p["now_cost"] <= max_price)
+                    if (p["element_type"] == out_player["element_type"]
+                        and p["id"] not in starting_ids
+                        and p["form"] > 4.0 and (p["chance_of_playing_next_round"] or 100) >= 75 and p["now_cost"] <= max_price)
                 ]
                 sorted_in = sorted(candidates, key=lambda x: x["form"], reverse=True)
                 best_replacement = sorted_in[0] if sorted_in else None
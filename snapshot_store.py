@@ -0,0 +1,90 @@
+# snapshot_store.py
+
+import gzip
+import json
+import os
+import re
+import sys
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# "record" saves every upstream response fpl_client receives, "replay" serves them
+# back from disk with no network. Anything else means live traffic only.
+MODE = os.environ.get("FPL_SNAPSHOT_MODE", "")
+SNAPSHOT_DIR = os.environ.get(
+    "FPL_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+)
+
+
+def set_mode(mode, directory=None):
+    global MODE, SNAPSHOT_DIR
+    MODE = mode or ""
+    if directory:
+        SNAPSHOT_DIR = directory
+
+def is_recording():
+    return MODE == "record"
+
+def is_replaying():
+    return MODE == "replay"
+
+
+def _snapshot_file(path, directory=None):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")
+    return os.path.join(directory or SNAPSHOT_DIR, f"{slug}.json.gz")
+
+
+def record(path, response):
+    """
+    Stores the raw response bytes (and status/validators) for an endpoint path.
+    Each file is gzip: one JSON header line, then the body exactly as received.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    header = {
+        "path": path,
+        "status": response.status_code,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    # mtime=0 keeps re-recordings of identical data byte-identical on disk
+    with gzip.GzipFile(_snapshot_file(path), "wb", mtime=0) as f:
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+        f.write(response.content)
+
+
+def replay(path, directory=None):
+    """
+    Rebuilds the recorded requests.Response for an endpoint path (from SNAPSHOT_DIR
+    unless another directory is given). Raises requests.ConnectionError if nothing
+    was recorded, as if upstream were down.
+    """
+    filename = _snapshot_file(path, directory)
+    if not os.path.exists(filename):
+        raise requests.ConnectionError(f"No snapshot recorded for {path} in {directory or SNAPSHOT_DIR}")
+
+    with gzip.open(filename, "rb") as f:
+        header_line, body = f.read().split(b"\n", 1)
+    header = json.loads(header_line)
+
+    response = requests.Response()
+    response.status_code = header["status"]
+    response._content = body
+    response.url = path
+    response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+    if header["etag"]:
+        response.headers["ETag"] = header["etag"]
+    if header["last_modified"]:
+        response.headers["Last-Modified"] = header["last_modified"]
+    return response
+
+
+if __name__ == "__main__":
+    # python snapshot_store.py <manager_id> <gameweek> [snapshot_dir]
+    # Runs one full report live and records every upstream response it needed.
+    from weekly_report import generate_gameweek_report
+
+    manager_id, gameweek = sys.argv[1], int(sys.argv[2])
+    set_mode("record", sys.argv[3] if len(sys.argv) > 3 else None)
+    generate_gameweek_report(gameweek_number=gameweek, manager_id=manager_id)
+    print(f"📼 Recorded upstream responses to {SNAPSHOT_DIR}/")
@@ -0,0 +1,372 @@
+# squad_solver.py
+
+import random
+import time
+
+import numpy as np
+
+from projection import get_projection
+from transfer_optimizer import get_manager_data, get_manager_picks
+from transfer_plans import MAX_PER_CLUB
+from xi_selector import best_xi, best_xi_points
+
+SQUAD_QUOTAS = {1: 2, 2: 5, 3: 5, 4: 3}
+XI_SIZE = 11
+BUDGET = 1000  # £100.0m in now_cost tenths
+
+
+def _prune_dominated(rows, points, cost, keep):
+    """
+    Drops players beaten on both points and price by at least `keep` others of the
+    same position; they can never be needed. `keep` is padded above the quota so
+    club limits can't strand the solver without a substitute.
+    """
+    order = sorted(rows, key=lambda r: (cost[r], -points[r]))
+    kept = []
+    better = []  # points of cheaper-or-equal players seen so far, best first
+    for r in order:
+        dominators = 0
+        for p in better:
+            if p < points[r]:
+                break
+            dominators += 1
+            if dominators >= keep:
+                break
+        if dominators < keep:
+            kept.append(r)
+        better.append(points[r])
+        better.sort(reverse=True)
+        del better[keep:]
+    return kept
+
+
+def lagrangian_bound(candidates, points, cost, team, budget, incumbent, bench_weight=0.1, iterations=300):
+    """
+    Upper bound on the solver's objective, best-XI points + bench_weight × bench
+    points. Any squad's score is Σ_XI (points − ν) + 11·ν + Σ_bench bench_weight·points
+    for every ν, so letting each player take the better of their starter value
+    (points − ν) and bench value, and relaxing the budget (multiplier λ) and every
+    club limit (multipliers μ) into the objective, leaves a per-position "take the
+    best `quota`" problem:
+
+        L(λ, μ, ν) = λ·budget + 3·Σμ + 11·ν
+                     + Σ_pos top-quota(max(points − ν, bench_weight·points) − λ·price − μ_club)
+
+    minimised by projected subgradient steps aimed at the incumbent score.
+    """
+    clubs = sorted({team[r] for rows in candidates.values() for r in rows})
+    lam, nu = 0.0, 0.0
+    mu = dict.fromkeys(clubs, 0.0)
+    best = float("inf")
+    step_scale = 2.0
+
+    for _ in range(iterations):
+        value = lam * budget + MAX_PER_CLUB * sum(mu.values()) + XI_SIZE * nu
+        spend = starters = 0
+        club_count = dict.fromkeys(clubs, 0)
+        for pos, quota in SQUAD_QUOTAS.items():
+            def worth(r):
+                return max(points[r] - nu, bench_weight * points[r]) - lam * cost[r] - mu[team[r]]
+            for r in sorted(candidates[pos], key=worth, reverse=True)[:quota]:
+                value += worth(r)
+                spend += cost[r]
+                club_count[team[r]] += 1
+                starters += points[r] - nu >= bench_weight * points[r]
+        best = min(best, value)
+
+        # Subgradient of L: slack of each relaxed constraint (ν is unrestricted,
+        # the XI is exactly 11)
+        g_lam = budget - spend
+        g_mu = {c: MAX_PER_CLUB - club_count[c] for c in clubs}
+        g_nu = XI_SIZE - starters
+        norm = g_lam ** 2 + g_nu ** 2 + sum(g ** 2 for g in g_mu.values())
+        if norm == 0 or value - incumbent < 1e-6:
+            break
+        step = step_scale * (value - incumbent) / norm
+        lam = max(0.0, lam - step * g_lam)
+        nu -= step * g_nu
+        for c in clubs:
+            mu[c] = max(0.0, mu[c] - step * g_mu[c])
+        step_scale = max(0.05, step_scale * 0.98)
+
+    return best
+
+
+def _greedy_squad(candidates, points, cost, team, element_type, budget, lam):
+    """
+    Fills the quotas by points − λ·price, respecting club limits, then repairs
+    the budget by downgrading the player that loses the least points per £ saved.
+    """
+    squad = []
+    clubs = {}
+    for pos, quota in SQUAD_QUOTAS.items():
+        ranked = sorted(candidates[pos], key=lambda r: -(points[r] - lam * cost[r]))
+        taken = 0
+        for r in ranked:
+            if clubs.get(team[r], 0) >= MAX_PER_CLUB:
+                continue
+            squad.append(r)
+            clubs[team[r]] = clubs.get(team[r], 0) + 1
+            taken += 1
+            if taken == quota:
+                break
+        if taken < quota:
+            return None
+
+    in_squad = set(squad)
+    while sum(cost[r] for r in squad) > budget:
+        best_move = None
+        for i, out_row in enumerate(squad):
+            for in_row in candidates[element_type[out_row]]:
+                if in_row in in_squad or cost[in_row] >= cost[out_row]:
+                    continue
+                if team[in_row] != team[out_row] and clubs.get(team[in_row], 0) >= MAX_PER_CLUB:
+                    continue
+                ratio = (points[out_row] - points[in_row]) / (cost[out_row] - cost[in_row])
+                if best_move is None or ratio < best_move[0]:
+                    best_move = (ratio, i, in_row)
+        if best_move is None:
+            return None
+        _, i, in_row = best_move
+        out_row = squad[i]
+        clubs[team[out_row]] -= 1
+        clubs[team[in_row]] = clubs.get(team[in_row], 0) + 1
+        in_squad.discard(out_row)
+        in_squad.add(in_row)
+        squad[i] = in_row
+    return squad
+
+
+def _club_counts(squad, team):
+    clubs = {}
+    for r in squad:
+        clubs[team[r]] = clubs.get(team[r], 0) + 1
+    return clubs
+
+
+def _local_search(squad, current, candidates, points, cost, team, element_type, budget, score, deadline):
+    """
+    Takes improving moves (single like-for-like swaps, then paired swaps that
+    rebalance the budget) from `squad` until none is left or the deadline passes.
+    Returns (squad, score, whether it stopped at a local optimum).
+    """
+    squad = list(squad)
+    clubs = _club_counts(squad, team)
+
+    def feasible_swap(outs, ins):
+        spend = sum(cost[r] for r in squad) - sum(cost[r] for r in outs) + sum(cost[r] for r in ins)
+        if spend > budget:
+            return False
+        counts = dict(clubs)
+        for r in outs:
+            counts[team[r]] -= 1
+        for r in ins:
+            counts[team[r]] = counts.get(team[r], 0) + 1
+            if counts[team[r]] > MAX_PER_CLUB:
+                return False
+        return True
+
+    def apply(outs, ins):
+        for o, n in zip(outs, ins):
+            squad[squad.index(o)] = n
+            clubs[team[o]] -= 1
+            clubs[team[n]] = clubs.get(team[n], 0) + 1
+
+    while time.monotonic() < deadline:
+        improved = False
+        in_squad = set(squad)
+
+        # Single like-for-like swaps
+        for out_row in list(squad):
+            for in_row in candidates[element_type[out_row]]:
+                if in_row in in_squad or not feasible_swap([out_row], [in_row]):
+                    continue
+                trial = [in_row if r == out_row else r for r in squad]
+                s = score(trial)
+                if s > current + 1e-9:
+                    apply([out_row], [in_row])
+                    current, improved = s, True
+                    break
+            if improved or time.monotonic() >= deadline:
+                break
+        if improved:
+            continue
+
+        # Paired swaps: downgrade one player to fund an upgrade elsewhere
+        for i, out_a in enumerate(squad):
+            for out_b in squad[i + 1:]:
+                pool_a = [r for r in candidates[element_type[out_a]] if r not in in_squad]
+                pool_b = [r for r in candidates[element_type[out_b]] if r not in in_squad]
+                for in_a in pool_a:
+                    for in_b in pool_b:
+                        if in_a == in_b:
+                            continue
+                        if points[in_a] + points[in_b] <= points[out_a] + points[out_b]:
+                            continue
+                        if not feasible_swap([out_a, out_b], [in_a, in_b]):
+                            continue
+                        trial = [in_a if r == out_a else in_b if r == out_b else r for r in squad]
+                        s = score(trial)
+                        if s > current + 1e-9:
+                            apply([out_a, out_b], [in_a, in_b])
+                            current, improved = s, True
+                            break
+                    if improved or time.monotonic() >= deadline:
+                        break
+                if improved or time.monotonic() >= deadline:
+                    break
+            if improved or time.monotonic() >= deadline:
+                break
+        if not improved:
+            return squad, current, time.monotonic() < deadline
+    return squad, current, False
+
+
+def _perturb(squad, candidates, cost, team, element_type, budget, rng, swaps=(2, 4), attempts=50):
+    """
+    A random legal neighbour of `squad`: a few like-for-like swaps for random
+    candidates that keep the budget and club limits, so the local search can
+    climb out of the current optimum.
+    """
+    squad = list(squad)
+    clubs = _club_counts(squad, team)
+    spend = sum(cost[r] for r in squad)
+    for _ in range(rng.randint(*swaps)):
+        for _ in range(attempts):
+            i = rng.randrange(len(squad))
+            out_row = squad[i]
+            in_row = rng.choice(candidates[element_type[out_row]])
+            if in_row in squad or spend - cost[out_row] + cost[in_row] > budget:
+                continue
+            if team[in_row] != team[out_row] and clubs.get(team[in_row], 0) >= MAX_PER_CLUB:
+                continue
+            squad[i] = in_row
+            spend += cost[in_row] - cost[out_row]
+            clubs[team[out_row]] -= 1
+            clubs[team[in_row]] = clubs.get(team[in_row], 0) + 1
+            break
+    return squad
+
+
+def solve_squad(table, points, budget=BUDGET, bench_weight=0.1, time_limit=5.0, bound=True, restarts=None):
+    """
+    Picks the 15-man squad (2 GK, 5 DEF, 5 MID, 3 FWD, ≤3 per club, within budget)
+    that maximises best-XI points plus bench_weight × bench points.
+
+    Anytime: Lagrangian-guided greedy squads seed a swap local search (single swaps,
+    then paired swaps that rebalance the budget); once it reaches a local optimum,
+    the best squad is perturbed with a few random swaps and searched again, for as
+    long as `time_limit` allows (or at most `restarts` times), so more time can only
+    improve the squad. Quick callers can pass restarts=0 to stop at the first optimum.
+
+    The result carries a Lagrangian upper bound on the same objective (no legal
+    squad can score above upper_bound), so the remaining optimality gap is known;
+    callers that only need the squad can skip it with bound=False (upper_bound None).
+    """
+    deadline = time.monotonic() + time_limit
+    points = [max(0.0, float(x)) for x in points]
+    cost = table.now_cost.tolist()
+    team = table.team.tolist()
+    element_type = table.element_type.tolist()
+
+    available = np.nonzero(table.available_mask())[0].tolist()
+    candidates = {}
+    for pos, quota in SQUAD_QUOTAS.items():
+        rows = [r for r in available if element_type[r] == pos]
+        candidates[pos] = _prune_dominated(rows, points, cost, keep=quota + MAX_PER_CLUB)
+
+    def score(squad):
+        return best_xi_points(squad, points, element_type, bench_weight)[0]
+
+    best_squad, best_score = None, None
+    for lam in np.linspace(0.0, 0.1, 11):
+        squad = _greedy_squad(candidates, points, cost, team, element_type, budget, lam)
+        if squad is not None:
+            s = score(squad)
+            if best_score is None or s > best_score:
+                best_squad, best_score = squad, s
+    if best_squad is None:
+        raise ValueError("No squad satisfies the budget, quotas and club limits.")
+
+    squad, current, completed = _local_search(
+        best_squad, best_score, candidates, points, cost, team, element_type, budget, score, deadline
+    )
+
+    # Iterated local search: kick the best squad with a few random swaps and
+    # descend again, keeping whatever beats it, until the time runs out
+    rng = random.Random(0)
+    rounds = 0
+    while completed and time.monotonic() < deadline and (restarts is None or rounds < restarts):
+        kicked = _perturb(squad, candidates, cost, team, element_type, budget, rng)
+        trial, trial_score, done = _local_search(
+            kicked, score(kicked), candidates, points, cost, team, element_type, budget, score, deadline
+        )
+        rounds += 1
+        if trial_score > current + 1e-9:
+            squad, current, completed = trial, trial_score, done
+
+    score_value, (d, m, f) = best_xi_points(squad, points, element_type, bench_weight)
+    squad_points = sum(points[r] for r in squad)
+    upper_bound = lagrangian_bound(candidates, points, cost, team, budget, score_value, bench_weight) if bound else None
+
+    _, _, xi = best_xi([points[r] for r in squad], [element_type[r] for r in squad])
+    starters = {squad[i] for i in xi}
+
+    return {
+        "squad": [
+            {
+                "id": int(table.id[r]),
+                "name": table.name[r],
+                "position": table.position[r],
+                "team": table.team_names.get(team[r], "Unknown"),
+                "price": cost[r] / 10.0,
+                "projected_points": round(points[r], 2),
+                "starting": r in starters
+            }
+            for r in sorted(squad, key=lambda r: (element_type[r], -points[r]))
+        ],
+        "formation": f"{d}-{m}-{f}",
+        "projected_points": round(score_value, 2),
+        "squad_points": round(squad_points, 2),
+        "upper_bound": round(upper_bound, 2) if bound else None,
+        "cost": sum(cost[r] for r in squad) / 10.0,
+        "bank_left": (budget - sum(cost[r] for r in squad)) / 10.0,
+        "local_optimum": completed,
+        "restarts": rounds
+    }
+
+
+def solve_chip_squad_for_manager(manager_id, gameweek, chip="wildcard", horizon=None, time_limit=5.0):
+    """
+    Wildcard: optimise over the next 5 gameweeks with some weight on the bench.
+    Free Hit: optimise for this gameweek only; the bench barely matters.
+    The budget is the manager's bank plus the current value of their squad.
+    """
+    if horizon is None:
+        horizon = 1 if chip == "freehit" else 5
+    bench_weight = 0.05 if chip == "freehit" else 0.25
+
+    projection = get_projection()
+    table, points = projection.table, projection.window(gameweek, horizon)
+    picks = get_manager_picks(manager_id, gameweek).get("picks", [])
+    bank = get_manager_data(manager_id).get("bank", 0)
+    squad_value = int(table.now_cost[table.rows([p["element"] for p in picks])].sum())
+
+    return solve_squad(table, points, budget=bank + squad_value,
+                       bench_weight=bench_weight, time_limit=time_limit)
+
+
+if __name__ == "__main__":
+    # python squad_solver.py <manager_id> <gameweek> [wildcard|freehit] [time_limit]
+    import sys
+
+    manager_id, gameweek = sys.argv[1], int(sys.argv[2])
+    chip = sys.argv[3] if len(sys.argv) > 3 else "wildcard"
+    limit = float(sys.argv[4]) if len(sys.argv) > 4 else 5.0
+
+    result = solve_chip_squad_for_manager(manager_id, gameweek, chip=chip, time_limit=limit)
+    print(f"🃏 {chip.title()} squad ({result['formation']}), £{result['cost']}m, "
+          f"{result['projected_points']} projected pts "
+          f"(upper bound {result['upper_bound']}, squad total {result['squad_points']})")
+    for p in result["squad"]:
+        print(f" {'⭐' if p['starting'] else '  '} {p['position']:<3} {p['name']} ({p['team']}) £{p['price']}m – {p['projected_points']}")
@@ -1,20 +1,51 @@
 import streamlit as st
-import requests
 from PIL import Image
-from weekly_report import generate_gameweek_report
-
-FPL_BASE_URL = "https://fantasy.premierleague.com/api"
+import fpl_client
+from fpl_team_loader import get_report_data_version
+from report_cache import ReportCache
+from weekly_report import iter_gameweek_report
+
+# Upstream payloads and the per-snapshot indexes (player table, fixtures,
+# projection) are module-level caches, so every session in this process already
+# shares them. On top of that, finished reports are shared across sessions too.
+REPORT_CACHE_ENTRIES = 256
+METADATA_TTL = 60 * 60
+
+@st.cache_resource
+def get_report_cache():
+    """Report sections for every session, keyed by (manager_id, gw, data version) like the API server's."""
+    return ReportCache(max_entries=REPORT_CACHE_ENTRIES)
+
+@st.cache_data(ttl=METADATA_TTL, max_entries=1024, show_spinner=False)
+def fetch_team_metadata(manager_id):
+    data = fpl_client.get_manager_data(manager_id)
+    return data.get("name", "Unknown Team"), data.get("player_first_name", "") + " " + data.get("player_last_name", "")
 
 def get_team_metadata(manager_id):
+    # Failures raise out of the cached function, so they are retried next time
     try:
-        res = requests.get(f"{FPL_BASE_URL}/entry/{manager_id}/")
-        if res.status_code == 200:
-            data = res.json()
-            return data.get("name", "Unknown Team"), data.get("player_first_name", "") + " " + data.get("player_last_name", "")
-        return "Unknown Team", ""
+        return fetch_team_metadata(manager_id)
     except Exception:
         return "Unknown Team", ""
 
+def iter_report_sections(manager_id, gameweek):
+    """
+    Report sections from the shared cache when the upstream data is unchanged,
+    otherwise streamed fresh and stored once the last one is out.
+    """
+    cache = get_report_cache()
+    key = (manager_id, gameweek, get_report_data_version(manager_id, gameweek))
+    sections = cache.get(key)
+    if sections is not None:
+        yield from sections
+        return
+
+    sections = []
+    for section in iter_gameweek_report(gameweek_number=gameweek, manager_id=manager_id):
+        sections.append(section)
+        yield section
+    cache.put(key, sections)
+
 # Page setup
 st.set_page_config(page_title="Sir Botty Charlton", page_icon="🧠")
 
@@ -52,49 +83,61 @@ st.subheader("🎩 Sir Botty’s Gameweek Opera 🎭")
 
 gameweek = st.number_input("Which Gameweek do you want to analyze?", min_value=1, max_value=38, value=34)
 
-if st.button("🧠 Summon the Wisdom"):
-    with st.spinner("Consulting the footballing ether and boiling the perfect cuppa..."):
-        report = generate_gameweek_report(gameweek_number=gameweek, manager_id=st.session_state.manager_id)
+POSITION_ORDER = {"GK": 0, "DEF": 1, "MID": 2, "FWD": 3}
 
-        if report.get("is_projected"):
-            st.warning(f"This is a projected lineup based on your last valid team from GW{report['original_gw']}.")
+def render_overview(slots, report):
+    if report.get("is_projected"):
+        slots["projected"].warning(f"This is a projected lineup based on your last valid team from GW{report['original_gw']}.")
 
-        if manager_id:
-            team_name, manager_name = get_team_metadata(manager_id)
-            squad_value = round(sum([p["form"] for p in report["team_overview"]]) + 85, 1)
-
-            st.markdown(f"### 🔮 Predicted Gameweek Score: **{round(report['predicted_score'], 1)}** points")
+    if manager_id:
+        team_name, manager_name = get_team_metadata(manager_id)
+        squad_value = round(sum([p["form"] for p in report["team_overview"]]) + 85, 1)
+        with slots["team"]:
             st.markdown(f"### 🏷️ Team: **{team_name}**")
             st.markdown(f"#### 👤 Manager: {manager_name}")
             st.markdown(f"💰 **Estimated Squad Value**: £{squad_value}m")
 
-        if len(report["team_overview"]) == 0:
-            st.error("🚫 No player data found. Your team might be private or not set for this gameweek.")
-            st.stop()
+    with slots["explosive"]:
+        st.markdown("## 💥 Explosive Picks")
+        explosive = sorted(report["team_overview"], key=lambda p: p["xG"] + p["shots"], reverse=True)[:3]
+        for p in explosive:
+            st.markdown(f"**{p['name']}** ({p['position']}, {p['team']}) – xG: {p['xG']}, Shots: {p['shots']}")
 
-        st.success(f"Gameweek {gameweek} insights loaded. Let the poetry commence! 🎼")
+    with slots["squad"]:
+        st.markdown("## 🧾 Full Squad Overview")
+        sorted_squad = sorted(report["team_overview"], key=lambda x: (POSITION_ORDER.get(x["position"], 4), -x["form"]))
 
-        st.markdown("## 🧃 Chips Already Used")
-        chips_used = report.get("chip_recommendation", {}).get("chips_used", [])
-        if chips_used:
-            st.markdown(", ".join(f"✅ {chip.title()}" for chip in chips_used))
-        else:
-            st.info("No chips used yet. A full deck of destiny remains.")
+        for p in sorted_squad:
+            num_fixtures = p.get("number_of_fixtures", 1)
+            if num_fixtures == 0:
+                status_tag = "🧊 No Match"
+            elif num_fixtures == 2:
+                status_tag = "🔥 Plays Twice"
+            elif num_fixtures > 2:
+                status_tag = f"🔥 Plays {num_fixtures} Times"
+            else:
+                status_tag = "✔️ Plays Once"
+
+            st.markdown(f"**{p['name']}** – {p['position']} for **{p['team']}**")
+            st.markdown(status_tag)
+            st.caption(
+                f"Form: {p['form']} | PPG: {p['points_per_game']} | Min: {p['expected_minutes']}  \n"
+                f"xG: {p['xG']} | xA: {p['xA']} | Shots: {p['shots']}  \n"
+                f"vs {p['opponent_team']} (Diff {p['opponent_difficulty']})"
+            )
 
+def render_captain(slots, report):
+    with slots["captain"]:
         st.markdown("## 👑 Captain Pick")
         st.markdown(f"**{report['captain']['name']}** — {report['captain']['reason']}")
 
         st.markdown("## 🎖️ Vice-Captain Pick")
         st.markdown(f"**{report['vice_captain']['name']}** — {report['vice_captain']['reason']}")
 
-        st.markdown("## 💥 Explosive Picks")
-        explosive = sorted(report["team_overview"], key=lambda p: p["xG"] + p["shots"], reverse=True)[:3]
-        for p in explosive:
-            st.markdown(f"**{p['name']}** ({p['position']}, {p['team']}) – xG: {p['xG']}, Shots: {p['shots']}")
-
+def render_starting_xi(slots, report):
+    with slots["starting_xi"]:
         st.markdown("## 🧱 Starting XI")
-        position_order = {"GK": 0, "DEF": 1, "MID": 2, "FWD": 3}
-        sorted_starting = sorted(report["starting_xi"], key=lambda x: position_order.get(x["position"], 4))
+        sorted_starting = sorted(report["starting_xi"], key=lambda x: POSITION_ORDER.get(x["position"], 4))
 
         formation_counts = {"DEF": 0, "MID": 0, "FWD": 0}
         for player in sorted_starting:
@@ -118,44 +161,77 @@ if st.button("🧠 Summon the Wisdom"):
         for player in report["bench"]:
             st.markdown(f"**{player['name']}** ({player['position']}) – {player['reason']}")
 
-        if report["alerts"]:
+def render_alerts(slots, report):
+    if report["alerts"]:
+        with slots["alerts"]:
             st.markdown("## 🚨 Alerts")
             for alert in report["alerts"]:
                 st.warning(f"**{alert['name']}** – {alert['message']}")
 
-        chip = report.get("chip_recommendation", {})
+def render_score(slots, report):
+    if manager_id:
+        slots["score"].markdown(f"### 🔮 Predicted Gameweek Score: **{round(report['predicted_score'], 1)}** points")
+
+def render_chips(slots, report):
+    chip = report.get("chip_recommendation", {})
+    with slots["chips_used"]:
+        st.markdown("## 🧃 Chips Already Used")
+        chips_used = chip.get("chips_used", [])
+        if chips_used:
+            st.markdown(", ".join(f"✅ {chip.title()}" for chip in chips_used))
+        else:
+            st.info("No chips used yet. A full deck of destiny remains.")
+
+    with slots["chip_strategy"]:
         st.markdown("## 🧩 Chip Strategy")
         if chip.get("recommended_chip"):
             st.success(f"💡 Suggested Chip: **{chip['recommended_chip']}** — {chip['reason']}")
         else:
             st.info("No chip needed. Save it for a rainy football apocalypse.")
 
+def render_transfers(slots, report):
+    with slots["transfers"]:
         st.markdown("## 🔁 Substitution Suggestions")
         for t in report["transfer_suggestions"]:
             st.markdown(f"⬅️ **{t['out']}** → ➡️ **{t['in']}**")
             st.caption(t["reason"])
 
-        st.markdown("## 🧾 Full Squad Overview")
-        sorted_squad = sorted(report["team_overview"], key=lambda x: (position_order.get(x["position"], 4), -x["form"]))
+SECTION_RENDERERS = {
+    "overview": render_overview,
+    "captain": render_captain,
+    "starting_xi": render_starting_xi,
+    "alerts": render_alerts,
+    "score": render_score,
+    "chips": render_chips,
+    "transfers": render_transfers
+}
+
+# Once summoned, the report stays up across reruns for this manager; picking
+# another gameweek only builds that gameweek's report (manager data is reused)
+if st.session_state.get("summoned_for") != st.session_state.manager_id:
+    st.session_state.summoned_for = None
 
-        for p in sorted_squad:
-            num_fixtures = p.get("number_of_fixtures", 1)
-            if num_fixtures == 0:
-                status_tag = "🧊 No Match"
-            elif num_fixtures == 2:
-                status_tag = "🔥 Plays Twice"
-            elif num_fixtures > 2:
-                status_tag = f"🔥 Plays {num_fixtures} Times"
-            else:
-                status_tag = "✔️ Plays Once"
+if st.button("🧠 Summon the Wisdom"):
+    st.session_state.summoned_for = st.session_state.manager_id
 
-            st.markdown(f"**{p['name']}** – {p['position']} for **{p['team']}**")
-            st.markdown(status_tag)
-            st.caption(
-                f"Form: {p['form']} | PPG: {p['points_per_game']} | Min: {p['expected_minutes']}  \n"
-                f"xG: {p['xG']} | xA: {p['xA']} | Shots: {p['shots']}  \n"
-                f"vs {p['opponent_team']} (Diff {p['opponent_difficulty']})"
-            )
+if st.session_state.summoned_for is not None:
+    # Placeholders in display order; each report section fills its own as soon as
+    # it has been computed, so the page builds up instead of waiting for the lot
+    slots = {name: st.empty() if name in ("projected", "score") else st.container() for name in (
+        "projected", "score", "team", "status", "chips_used", "captain", "explosive",
+        "starting_xi", "alerts", "chip_strategy", "transfers", "squad"
+    )}
+    report = {}
+
+    with st.spinner("Consulting the footballing ether and boiling the perfect cuppa..."):
+        for section, fields in iter_report_sections(st.session_state.manager_id, gameweek):
+            report.update(fields)
+            if section == "overview" and len(report["team_overview"]) == 0:
+                st.error("🚫 No player data found. Your team might be private or not set for this gameweek.")
+                st.stop()
+            SECTION_RENDERERS[section](slots, report)
+
+    slots["status"].success(f"Gameweek {gameweek} insights loaded. Let the poetry commence! 🎼")
 
 st.markdown("---")
 st.caption("Sir Botty Charlton © — surreal, strategic, and a little bit smug.")
\ No newline at end of file
@@ -0,0 +1,441 @@
+# synthetic_data.py
+
+import datetime
+import hashlib
+import json
+import random
+import re
+import threading
+from collections import OrderedDict
+
+TEAM_NAMES = [
+    "Arsenal", "Aston Villa", "Bournemouth", "Brentford", "Brighton", "Burnley", "Chelsea",
+    "Crystal Palace", "Everton", "Fulham", "Liverpool", "Luton", "Man City", "Man Utd",
+    "Newcastle", "Nottingham Forest", "Sheffield Utd", "Spurs", "West Ham", "Wolves"
+]
+FIRST_NAMES = [
+    "Alex", "Ben", "Callum", "Dan", "Eddie", "Femi", "Gabriel", "Harry", "Ivan", "Jamal", "Kai",
+    "Luis", "Mateo", "Noah", "Ollie", "Pedro", "Reece", "Sam", "Tom", "Yasin"
+]
+LAST_NAMES = [
+    "Adams", "Bailey", "Costa", "Diallo", "Evans", "Fernandes", "Garcia", "Hughes", "Iwobi", "Jones",
+    "Kane", "Lopez", "Mensah", "Nunez", "Okafor", "Pereira", "Quinn", "Rice", "Silva", "Walker"
+]
+# Players per club by element_type (GK, DEF, MID, FWD): 36 a club, 720 in all
+CLUB_SQUAD = {1: 3, 2: 12, 3: 14, 4: 7}
+FPL_SQUAD = {1: 2, 2: 5, 3: 5, 4: 3}
+FORMATIONS = [(3, 4, 3), (3, 5, 2), (4, 4, 2), (4, 3, 3), (4, 5, 1), (5, 3, 2), (5, 4, 1)]
+BUDGET = 1000
+CHIP_NAMES = ["wildcard", "freehit", "bboost", "3xc"]
+# Prices in £0.1m: the cheapest player of each element_type, and what quality adds on top
+PRICE_FLOOR = {1: 40, 2: 40, 3: 45, 4: 45}
+PRICE_RANGE = {1: 20, 2: 30, 3: 90, 4: 95}
+# Goals / assists per 90 for a top player by element_type
+ATTACK_RATES = {1: (0.0, 0.01), 2: (0.12, 0.15), 3: (0.45, 0.35), 4: (0.75, 0.25)}
+SEASON_START = datetime.datetime(2025, 8, 15, 17, 30, tzinfo=datetime.timezone.utc)
+ENCODED_CACHE_SIZE = 4096
+
+
+class SyntheticSeason:
+    """
+    A full, deterministic FPL season to exercise the hot paths at real scale:
+    bootstrap-static with 720 players over 20 clubs, 380 fixtures (a double round
+    robin, with postponed fixtures making blank and double gameweeks), and any
+    number of managers whose entry, history and per-gameweek picks are generated
+    on demand from (seed, manager_id). `payload(path)` answers like the FPL API,
+    returning None where it would 404.
+
+    Managers keep one legal squad (15 players, max 3 per club, within £100m) all
+    season; captaincy and chips vary by gameweek.
+    """
+
+    def __init__(self, seed=0, current_gameweek=20, n_managers=5000, first_manager_id=1,
+                 blank_gameweek=29, double_gameweek=33, postponed=4):
+        self.seed = seed
+        self.current_gameweek = current_gameweek
+        self.first_manager_id = first_manager_id
+        self.n_managers = n_managers
+        rng = random.Random(seed)
+
+        self.strength = {t: rng.uniform(0.3, 1.0) for t in range(1, 21)}
+        self.elements = self._players(rng)
+        self.fixtures = self._fixtures(rng, blank_gameweek, double_gameweek, postponed)
+        self.events = [
+            {
+                "id": gw,
+                "name": f"Gameweek {gw}",
+                "deadline_time": (SEASON_START + datetime.timedelta(weeks=gw - 1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "finished": gw < current_gameweek,
+                "is_previous": gw == current_gameweek - 1,
+                "is_current": gw == current_gameweek,
+                "is_next": gw == current_gameweek + 1,
+            }
+            for gw in range(1, 39)
+        ]
+        self._by_type = {t: [p for p in self.elements if p["element_type"] == t] for t in CLUB_SQUAD}
+        self._squads = {}
+        self._encoded = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------- league-wide payloads ----------
+
+    def _players(self, rng):
+        elements = []
+        for team in range(1, 21):
+            for element_type, count in CLUB_SQUAD.items():
+                for k in range(count):
+                    element_id = len(elements) + 1
+                    # Earlier squad members are the regulars; quality leans on club strength
+                    regular = k < {1: 1, 2: 5, 3: 5, 4: 2}[element_type]
+                    quality = min(1.0, max(0.05, rng.gauss(0.35 + 0.4 * self.strength[team] + 0.15 * regular, 0.15)))
+                    elements.append(self._player(rng, element_id, team, element_type, quality, regular))
+        return elements
+
+    def _player(self, rng, element_id, team, element_type, quality, regular):
+        finished = self.current_gameweek - 1
+        appearances = round(finished * (rng.uniform(0.75, 1.0) if regular else rng.uniform(0.0, 0.6)))
+        minutes = int(appearances * (rng.uniform(75, 90) if regular else rng.uniform(20, 70)))
+        goal_rate, assist_rate = ATTACK_RATES[element_type]
+        full_games = minutes / 90
+        expected_goals = goal_rate * quality * full_games
+        expected_assists = assist_rate * quality * full_games
+        points_per_game = round(2 + 5 * quality * rng.uniform(0.7, 1.2), 1) if appearances else 0.0
+
+        status = rng.choices("adiu", weights=[88, 6, 5, 1])[0]
+        chance = {"a": None, "d": rng.choice([25, 50, 75]), "i": 0, "u": 0}[status]
+        news = {
+            "a": "",
+            "d": f"Knock - {chance}% chance of playing",
+            "i": "Hamstring injury - Expected back in a few weeks",
+            "u": "Has left the club on loan",
+        }[status]
+
+        return {
+            "id": element_id,
+            "code": 100000 + element_id,
+            "photo": f"{100000 + element_id}.jpg",
+            "first_name": FIRST_NAMES[element_id % len(FIRST_NAMES)],
+            "second_name": f"{LAST_NAMES[(element_id // len(FIRST_NAMES)) % len(LAST_NAMES)]}-{element_id}",
+            "web_name": f"{LAST_NAMES[(element_id // len(FIRST_NAMES)) % len(LAST_NAMES)]}-{element_id}",
+            "team": team,
+            "element_type": element_type,
+            "now_cost": PRICE_FLOOR[element_type] + 5 * round(quality ** 3 * PRICE_RANGE[element_type] / 5),
+            "status": status,
+            "chance_of_playing_next_round": chance,
+            "news": news,
+            "form": f"{max(0.0, points_per_game + rng.gauss(0, 1.5)) if appearances else 0.0:.1f}",
+            "points_per_game": f"{points_per_game:.1f}",
+            "total_points": int(points_per_game * appearances),
+            "minutes": minutes,
+            "goals_scored": round(expected_goals * rng.uniform(0.6, 1.4)),
+            "assists": round(expected_assists * rng.uniform(0.6, 1.4)),
+            "expected_goals": f"{expected_goals:.2f}",
+            "expected_assists": f"{expected_assists:.2f}",
+            "selected_by_percent": f"{min(80.0, 100 * quality ** 4 * rng.uniform(0.3, 1.0)):.1f}",
+            "event_points": rng.randint(0, 12) if appearances else 0,
+        }
+
+    def difficulty(self, opponent):
+        """FDR 2-5 from the opponent's strength."""
+        return 2 + min(3, int(self.strength[opponent] * 4 - 0.5))
+
+    def _fixtures(self, rng, blank_gameweek, double_gameweek, postponed):
+        # Circle method: 19 rounds where everyone plays once, then the reverse fixtures
+        teams = list(range(1, 21))
+        rng.shuffle(teams)
+        rounds = []
+        for _ in range(19):
+            rounds.append([(teams[i], teams[19 - i]) for i in range(10)])
+            teams = [teams[0], teams[-1]] + teams[1:-1]
+        rounds += [[(away, home) for home, away in matches] for matches in rounds]
+
+        fixtures = []
+        for gw, matches in enumerate(rounds, start=1):
+            kickoff = SEASON_START + datetime.timedelta(weeks=gw - 1, hours=20, minutes=30)
+            for home, away in matches:
+                fixtures.append({
+                    "id": len(fixtures) + 1,
+                    "code": 2500000 + len(fixtures) + 1,
+                    "event": gw,
+                    "kickoff_time": kickoff.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "team_h": home,
+                    "team_a": away,
+                    "team_h_difficulty": self.difficulty(away),
+                    "team_a_difficulty": self.difficulty(home),
+                    "finished": gw < self.current_gameweek,
+                })
+
+        # Postponed fixtures leave their clubs blank in one gameweek and are
+        # replayed in another, where those clubs then play twice
+        moved = [f for f in fixtures if f["event"] == blank_gameweek][:postponed]
+        for f in moved:
+            f["event"] = double_gameweek
+            f["kickoff_time"] = (SEASON_START + datetime.timedelta(weeks=double_gameweek - 1, days=4)).strftime(
+                "%Y-%m-%dT%H:%M:%SZ")
+            f["finished"] = double_gameweek < self.current_gameweek
+        return fixtures
+
+    def bootstrap(self):
+        return {
+            "events": self.events,
+            "teams": [
+                {"id": t, "name": name, "short_name": name[:3].upper(), "strength": 2 + round(3 * self.strength[t])}
+                for t, name in enumerate(TEAM_NAMES, start=1)
+            ],
+            "elements": self.elements,
+            "element_types": [
+                {"id": 1, "singular_name_short": "GKP"}, {"id": 2, "singular_name_short": "DEF"},
+                {"id": 3, "singular_name_short": "MID"}, {"id": 4, "singular_name_short": "FWD"}
+            ],
+            "total_players": self.n_managers,
+        }
+
+    # ---------- per-manager payloads ----------
+
+    def manager_ids(self):
+        return range(self.first_manager_id, self.first_manager_id + self.n_managers)
+
+    def _rng(self, *key):
+        return random.Random(f"{self.seed}:" + ":".join(map(str, key)))
+
+    def squad(self, manager_id):
+        """Element IDs of a manager's legal 15-man squad, in element_type order."""
+        if manager_id in self._squads:
+            return self._squads[manager_id]
+        rng = self._rng("squad", manager_id)
+        slots = [t for t, n in FPL_SQUAD.items() for _ in range(n)]
+        rng.shuffle(slots)
+        squad, clubs, spent = [], {}, 0
+        for k, element_type in enumerate(slots):
+            # Leave enough for the cheapest player in every slot still to fill, and
+            # spend at most half of what's left over on any one player but the last
+            slack = BUDGET - spent - sum(PRICE_FLOOR[t] for t in slots[k:])
+            if k < len(slots) - 1:
+                slack //= 2
+            limit = PRICE_FLOOR[element_type] + slack
+            candidates = [p for p in self._by_type[element_type]
+                          if p["now_cost"] <= limit and clubs.get(p["team"], 0) < 3 and p["id"] not in squad]
+            weights = [float(p["selected_by_percent"]) + 0.5 for p in candidates]
+            pick = rng.choices(candidates, weights=weights)[0]
+            squad.append(pick["id"])
+            clubs[pick["team"]] = clubs.get(pick["team"], 0) + 1
+            spent += pick["now_cost"]
+        self._squads[manager_id] = sorted(squad, key=lambda i: (self.elements[i - 1]["element_type"], i))
+        return self._squads[manager_id]
+
+    def chips_played(self, manager_id):
+        """{gameweek: chip} for the chips this manager has played so far."""
+        rng = self._rng("chips", manager_id)
+        played = {}
+        for chip in CHIP_NAMES:
+            if self.current_gameweek > 2 and rng.random() < 0.5:
+                gw = rng.randint(2, self.current_gameweek)
+                played.setdefault(gw, chip)
+        return played
+
+    def picks(self, manager_id, gameweek):
+        if not self.first_manager_id <= manager_id < self.first_manager_id + self.n_managers:
+            return None
+        if not 1 <= gameweek <= self.current_gameweek:
+            return None
+
+        rng = self._rng("picks", manager_id, gameweek)
+        squad = [self.elements[i - 1] for i in self.squad(manager_id)]
+        by_type = {t: sorted((p for p in squad if p["element_type"] == t), key=lambda p: -float(p["form"]))
+                   for t in FPL_SQUAD}
+        d, m, f = rng.choice(FORMATIONS)
+        starters = by_type[1][:1] + by_type[2][:d] + by_type[3][:m] + by_type[4][:f]
+        bench = by_type[1][1:] + [p for p in by_type[2][d:] + by_type[3][m:] + by_type[4][f:]]
+
+        chip = self.chips_played(manager_id).get(gameweek)
+        captain, vice = sorted(starters[1:], key=lambda p: -float(p["form"]) * rng.uniform(0.7, 1.0))[:2]
+        picks = []
+        for position, p in enumerate(starters + bench, start=1):
+            multiplier = 1 if position <= 11 or chip == "bboost" else 0
+            if p is captain:
+                multiplier = 3 if chip == "3xc" else 2
+            picks.append({
+                "element": p["id"],
+                "position": position,
+                "multiplier": multiplier,
+                "is_captain": p is captain,
+                "is_vice_captain": p is vice,
+            })
+
+        value = sum(p["now_cost"] for p in squad)
+        return {
+            "active_chip": chip,
+            "automatic_subs": [],
+            "entry_history": {
+                "event": gameweek,
+                "points": rng.randint(25, 90),
+                "bank": self._bank(manager_id),
+                "value": value,
+                "event_transfers": rng.randint(0, 2),
+                "event_transfers_cost": rng.choice([0, 0, 0, 4]),
+            },
+            "picks": picks,
+        }
+
+    def _bank(self, manager_id):
+        return max(0, BUDGET - sum(self.elements[i - 1]["now_cost"] for i in self.squad(manager_id)))
+
+    def entry(self, manager_id):
+        if not self.first_manager_id <= manager_id < self.first_manager_id + self.n_managers:
+            return None
+        rng = self._rng("entry", manager_id)
+        bank = self._bank(manager_id)
+        return {
+            "id": manager_id,
+            "name": f"{rng.choice(LAST_NAMES)} {rng.choice(['FC', 'Athletic', 'United', 'Rovers', 'XI'])} {manager_id}",
+            "player_first_name": rng.choice(FIRST_NAMES),
+            "player_last_name": rng.choice(LAST_NAMES),
+            "current_event": self.current_gameweek,
+            "summary_overall_points": rng.randint(40, 70) * (self.current_gameweek - 1),
+            "summary_overall_rank": manager_id,
+            "bank": bank,
+            "last_deadline_bank": bank,
+            "last_deadline_value": BUDGET - bank,
+        }
+
+    def history(self, manager_id):
+        if not self.first_manager_id <= manager_id < self.first_manager_id + self.n_managers:
+            return None
+        rng = self._rng("history", manager_id)
+        total, current = 0, []
+        for gw in range(1, self.current_gameweek):
+            points = rng.randint(25, 90)
+            total += points
+            current.append({"event": gw, "points": points, "total_points": total, "bank": self._bank(manager_id),
+                            "event_transfers": rng.randint(0, 2), "points_on_bench": rng.randint(0, 15)})
+        chips = [
+            {"name": chip, "time": self.events[gw - 1]["deadline_time"], "event": gw}
+            for gw, chip in sorted(self.chips_played(manager_id).items())
+        ]
+        return {"current": current, "past": [], "chips": chips}
+
+    def element_summary(self, element_id):
+        """A player's per-fixture history for finished gameweeks plus his upcoming fixtures."""
+        if not 1 <= element_id <= len(self.elements):
+            return None
+        p = self.elements[element_id - 1]
+        rng = self._rng("element", element_id)
+        ppg = float(p["points_per_game"])
+        share = p["minutes"] / (90 * max(1, self.current_gameweek - 1))
+        history, fixtures = [], []
+        for f in sorted(self.fixtures, key=lambda f: (f["event"] or 99, f["id"])):
+            if p["team"] not in (f["team_h"], f["team_a"]) or not f["event"]:
+                continue
+            was_home = f["team_h"] == p["team"]
+            opponent = f["team_a"] if was_home else f["team_h"]
+            if not f["finished"]:
+                fixtures.append({"id": f["id"], "event": f["event"], "team_h": f["team_h"], "team_a": f["team_a"],
+                                 "is_home": was_home, "difficulty": self.difficulty(opponent),
+                                 "kickoff_time": f["kickoff_time"]})
+                continue
+            minutes = 0 if rng.random() > share else rng.choice([90, 90, 90, 75, 60, 25])
+            goal_rate, assist_rate = ATTACK_RATES[p["element_type"]]
+            xg = goal_rate * minutes / 90 * rng.uniform(0.2, 1.8)
+            xa = assist_rate * minutes / 90 * rng.uniform(0.2, 1.8)
+            goals, assists = int(rng.random() < xg), int(rng.random() < xa)
+            clean_sheet = int(minutes >= 60 and rng.random() < 0.3)
+            points = 0 if not minutes else max(
+                1, round(ppg + rng.gauss(0, 2)) + goals * 4 + assists * 3 + clean_sheet * (4 if p["element_type"] < 3 else 1)
+            )
+            history.append({
+                "element": element_id, "fixture": f["id"], "opponent_team": opponent, "round": f["event"],
+                "was_home": was_home, "kickoff_time": f["kickoff_time"], "minutes": minutes,
+                "total_points": points, "goals_scored": goals, "assists": assists, "clean_sheets": clean_sheet,
+                "bonus": rng.choice([0, 0, 0, 0, 1, 2, 3]) if points > 5 else 0,
+                "expected_goals": f"{xg:.2f}", "expected_assists": f"{xa:.2f}",
+                "value": p["now_cost"], "selected": int(float(p["selected_by_percent"]) * 1000),
+            })
+        return {"fixtures": fixtures, "history": history, "history_past": []}
+
+    def league_standings(self, league_id, page, per_page=50):
+        start = (page - 1) * per_page
+        ids = list(self.manager_ids())[start:start + per_page]
+        return {
+            "league": {"id": league_id, "name": f"Synthetic League {league_id}"},
+            "standings": {
+                "has_next": start + per_page < self.n_managers,
+                "page": page,
+                "results": [
+                    {"entry": m, "entry_name": self.entry(m)["name"], "player_name": "Synthetic Manager",
+                     "rank": start + k + 1, "total": 0}
+                    for k, m in enumerate(ids)
+                ],
+            },
+        }
+
+    # ---------- FPL API emulation ----------
+
+    def payload(self, path):
+        """The JSON the FPL API returns for an endpoint path, or None for a 404."""
+        if path == "bootstrap-static/":
+            return self.bootstrap()
+        if path == "fixtures/":
+            return self.fixtures
+        match = re.fullmatch(r"entry/(\d+)/event/(\d+)/picks/", path)
+        if match:
+            return self.picks(int(match.group(1)), int(match.group(2)))
+        match = re.fullmatch(r"entry/(\d+)/history/", path)
+        if match:
+            return self.history(int(match.group(1)))
+        match = re.fullmatch(r"entry/(\d+)/", path)
+        if match:
+            return self.entry(int(match.group(1)))
+        match = re.fullmatch(r"element-summary/(\d+)/", path)
+        if match:
+            return self.element_summary(int(match.group(1)))
+        match = re.fullmatch(r"leagues-classic/(\d+)/standings/\?page_standings=(\d+)", path)
+        if match:
+            return self.league_standings(int(match.group(1)), int(match.group(2)))
+        return None
+
+    def encoded(self, path):
+        """(status, body bytes, etag) for a path; recently used bodies are kept encoded."""
+        with self._lock:
+            cached = self._encoded.get(path)
+            if cached is not None:
+                self._encoded.move_to_end(path)
+                return cached
+        data = self.payload(path)
+        if data is None:
+            result = (404, b"", None)
+        else:
+            body = json.dumps(data).encode("utf-8")
+            result = (200, body, f'"{hashlib.sha1(body).hexdigest()}"')
+        with self._lock:
+            self._encoded[path] = result
+            while len(self._encoded) > ENCODED_CACHE_SIZE:
+                self._encoded.popitem(last=False)
+        return result
+
+    def cache_entries(self, paths):
+        """fpl_client cache entries for `paths`, ready for fpl_client.seed() (404s included)."""
+        entries = {}
+        for path in paths:
+            status, body, etag = self.encoded(path)
+            if status == 404:
+                entries[path] = {"data": None, "missing": True, "version": "404",
+                                 "etag": None, "last_modified": None}
+            else:
+                entries[path] = {"data": json.loads(body), "version": hashlib.sha1(body).hexdigest(),
+                                 "etag": etag, "last_modified": None}
+        return entries
+
+
+if __name__ == "__main__":
+    # python synthetic_data.py [seed] — prints a summary of the generated season
+    import sys
+
+    season = SyntheticSeason(seed=int(sys.argv[1]) if len(sys.argv) > 1 else 0)
+    counts = {}
+    for f in season.fixtures:
+        for team in (f["team_h"], f["team_a"]):
+            counts[(team, f["event"])] = counts.get((team, f["event"]), 0) + 1
+    doubles = sorted({gw for (_, gw), n in counts.items() if n > 1})
+    blanks = sorted({gw for gw in range(1, 39) if sum(counts.get((t, gw), 0) for t in range(1, 21)) < 20})
+    print(f"🧬 {len(season.elements)} players, {len(season.fixtures)} fixtures, "
+          f"{season.n_managers} managers; blanks in GW{blanks}, doubles in GW{doubles}")
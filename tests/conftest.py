@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_data import SyntheticSeason  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def season():
+    """A small synthetic season, built once: the full player pool, 40 managers, GW 20."""
+    return SyntheticSeason(seed=7, current_gameweek=20, n_managers=40)
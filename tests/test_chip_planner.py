@@ -0,0 +1,79 @@
+from collections import Counter
+from itertools import product
+
+import numpy as np
+import pytest
+import requests
+
+import chip_planner
+import fpl_client
+from chip_planner import CHIP_WINDOWS, CHIPS, LAST_GAMEWEEK, plan_chip_calendar, plan_chips_for_manager, remaining_chips
+from fixture_index import FixtureIndex
+from player_table import PlayerTable
+from projection import Projection
+
+
+def random_gains(seed, gameweeks):
+    rng = np.random.default_rng(seed)
+    return {chip: rng.gamma(2.0, 4.0, len(gameweeks)) for chip in CHIPS}
+
+
+def window_of(gameweek):
+    return next(k for k, (first, last) in enumerate(CHIP_WINDOWS) if first <= gameweek <= last)
+
+
+@pytest.mark.parametrize("start", [5, 19, 20, 30])
+def test_each_chip_once_per_half_season(season, start):
+    gameweeks = np.arange(start, LAST_GAMEWEEK + 1)
+    for manager_id in list(season.manager_ids())[:10]:
+        history = season.history(manager_id)["chips"]
+        instances = remaining_chips(history, start)
+        total, calendar = plan_chip_calendar(gameweeks, random_gains(manager_id, gameweeks), instances)
+
+        played = [gw for gw, _, _ in calendar]
+        assert len(played) == len(set(played))
+        assert all(start <= gw <= LAST_GAMEWEEK for gw in played)
+        uses = Counter((c["name"], window_of(c["event"])) for c in history)
+        uses.update((chip, window_of(gw)) for gw, chip, _ in calendar)
+        assert max(uses.values(), default=0) <= 1
+        assert total == pytest.approx(sum(gain for _, _, gain in calendar))
+
+
+def test_calendar_matches_brute_force(season):
+    gameweeks = np.arange(33, LAST_GAMEWEEK + 1)
+    for manager_id in list(season.manager_ids())[:10]:
+        instances = remaining_chips([], 33)
+        gains = random_gains(manager_id, gameweeks)
+        total, _ = plan_chip_calendar(gameweeks, gains, instances)
+
+        # Every assignment of each instance to a gameweek in its window, or to none
+        best = 0.0
+        options = [[None] + [k for k, gw in enumerate(gameweeks) if first <= gw <= last] for _, first, last in instances]
+        for choice in product(*options):
+            weeks = [k for k in choice if k is not None]
+            if len(weeks) == len(set(weeks)):
+                best = max(best, sum(gains[chip][k] for (chip, _, _), k in zip(instances, choice) if k is not None))
+        assert total == pytest.approx(best)
+
+
+def test_remaining_chips_skips_used_halves():
+    history = [{"name": "wildcard", "event": 8}, {"name": "bboost", "event": 24}]
+    instances = remaining_chips(history, 10)
+
+    assert ("wildcard", 10, 19) not in instances and ("wildcard", 20, 38) in instances
+    assert ("bboost", 10, 19) in instances and not any(c == "bboost" and last == 38 for c, _, last in instances)
+    assert all(first >= 10 for _, first, _ in instances)
+    assert remaining_chips([], 20) == [(chip, 20, 38) for chip in CHIPS]
+
+
+def test_plan_for_manager_without_history(season, monkeypatch):
+    projection = Projection(PlayerTable(season.bootstrap()), FixtureIndex(season.fixtures), season.current_gameweek - 1)
+    monkeypatch.setattr(chip_planner, "get_projection", lambda: projection)
+    monkeypatch.setattr(chip_planner, "get_manager_picks", season.picks)
+    monkeypatch.setattr(chip_planner, "get_manager_data", lambda manager_id: {"bank": 0})
+
+    def unavailable(manager_id):
+        raise requests.ConnectionError("FPL API down")
+    monkeypatch.setattr(fpl_client, "get_manager_history", unavailable)
+
+    assert plan_chips_for_manager(1, season.current_gameweek) is None
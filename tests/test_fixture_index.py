@@ -0,0 +1,25 @@
+from fixture_index import FixtureIndex
+
+
+def fixture(event, home, away, home_difficulty, away_difficulty):
+    return {"id": event, "event": event, "team_h": home, "team_a": away, "finished": False,
+            "team_h_difficulty": home_difficulty, "team_a_difficulty": away_difficulty}
+
+
+def test_difficulty_follows_the_opponent():
+    # Club 1 hosts weak club 2, then visits strong club 3
+    index = FixtureIndex([fixture(1, 1, 2, 2, 4), fixture(2, 3, 1, 2, 5)])
+
+    assert index.fixtures(1, 1) == [{"opponent_id": 2, "difficulty": 2, "is_home": True}]
+    assert index.fixtures(1, 2) == [{"opponent_id": 3, "difficulty": 5, "is_home": False}]
+    assert index.team_difficulty([1, 2, 3], 1).tolist() == [2, 4, 3]
+    assert index.team_difficulty([1, 2, 3], 2).tolist() == [5, 3, 2]
+    assert [f["difficulty"] for f in index.next_opponents(1, 1, k=2)] == [2, 5]
+
+
+def test_synthetic_season_ratings(season):
+    index = FixtureIndex(season.fixtures)
+    for f in season.fixtures:
+        for team, opponent in [(f["team_h"], f["team_a"]), (f["team_a"], f["team_h"])]:
+            ratings = {(x["opponent_id"], x["difficulty"]) for x in index.fixtures(team, f["event"])}
+            assert (opponent, season.difficulty(opponent)) in ratings
@@ -0,0 +1,20 @@
+import fpl_client
+
+
+def entry(n):
+    return {"data": {"n": n}, "version": str(n), "etag": None, "last_modified": None}
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(fpl_client, "MAX_CACHE_ENTRIES", 3)
+    fpl_client.clear_cache()
+    try:
+        fpl_client.seed({f"entry/{n}/": entry(n) for n in range(3)}, ttl=60)
+        fpl_client.get_entry("entry/0/")  # now the most recently used
+        fpl_client.seed({"entry/3/": entry(3)}, ttl=60)
+
+        assert fpl_client.get_version("entry/1/") is None
+        assert [fpl_client.get_version(f"entry/{n}/") for n in (0, 2, 3)] == ["0", "2", "3"]
+        assert len(fpl_client._cache) == 3
+    finally:
+        fpl_client.clear_cache()
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from fixture_index import FixtureIndex
+from player_table import PlayerTable
+from projection import DIFFICULTY_FACTOR, Projection
+
+
+def test_fixture_factor_follows_the_opponent(season):
+    table = PlayerTable(season.bootstrap())
+    index = FixtureIndex(season.fixtures)
+    projection = Projection(table, index, season.current_gameweek - 1)
+    per_player = projection.base * projection.minutes_share * projection.availability
+
+    strongest = max(season.strength, key=season.strength.get)
+    weakest = min(season.strength, key=season.strength.get)
+    for club in (strongest, weakest):
+        row = next(r for r in np.nonzero(table.team == club)[0] if per_player[r] > 0)
+        factors = set()
+        for gw in range(1, 39):
+            fixtures = index.fixtures(club, gw)
+            expected = sum(DIFFICULTY_FACTOR[season.difficulty(f["opponent_id"])] for f in fixtures)
+            assert projection.points[row, gw] == pytest.approx(per_player[row] * expected)
+            if len(fixtures) == 1:
+                factors.add(round(expected, 2))
+        # A club's own strength doesn't pin its factor: it moves with the opposition
+        assert len(factors) > 1
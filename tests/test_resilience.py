@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import fpl_client
+from resilience import CircuitBreaker, TokenBucket
+
+
+class FakeSession:
+    """Answers every GET from `respond`, counting the calls."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        return self.respond(n)
+
+
+def ok_response():
+    res = requests.Response()
+    res.status_code = 200
+    res._content = b"{}"
+    return res
+
+
+class CountingBucket(TokenBucket):
+    def __init__(self):
+        super().__init__(rate=1000, burst=1000)
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        super().acquire()
+
+
+def test_half_open_trial_released_after_other_request_errors(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    monkeypatch.setattr(fpl_client, "breaker", breaker)
+    monkeypatch.setattr(fpl_client, "MAX_RETRIES", 0)
+
+    def broken_body(n):
+        raise requests.exceptions.ChunkedEncodingError("connection broken mid-body")
+
+    monkeypatch.setattr(fpl_client, "get_session", lambda: FakeSession(broken_body))
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        fpl_client._get("fixtures/", {})
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_hedged_request_takes_a_token(monkeypatch):
+    bucket = CountingBucket()
+    monkeypatch.setattr(fpl_client, "rate_limiter", bucket)
+    monkeypatch.setattr(fpl_client, "breaker", CircuitBreaker())
+    monkeypatch.setattr(fpl_client, "HEDGE_AFTER", 0.02)
+
+    def slow_first(n):
+        if n == 1:
+            time.sleep(0.2)
+        return ok_response()
+
+    session = FakeSession(slow_first)
+    monkeypatch.setattr(fpl_client, "get_session", lambda: session)
+
+    assert fpl_client._get("entry/1/", {}).status_code == 200
+    assert session.calls == 2
+    assert bucket.acquired == 2
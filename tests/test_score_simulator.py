@@ -0,0 +1,23 @@
+import pytest
+
+from fixture_index import FixtureIndex
+from player_table import PlayerTable
+from projection import Projection
+from score_simulator import CLEAN_SHEET_PROB, squad_parameters
+
+
+@pytest.mark.parametrize("gameweek", [21, 25, 33])
+def test_clean_sheet_chance_follows_the_opponent(season, gameweek):
+    table = PlayerTable(season.bootstrap())
+    index = FixtureIndex(season.fixtures)
+    projection = Projection(table, index, season.current_gameweek - 1)
+    picks = season.picks(1, season.current_gameweek)["picks"]
+
+    params = squad_parameters(table, index, projection, picks, gameweek)
+    for i, player_id in enumerate(params["ids"]):
+        club = int(table.team[table.row(player_id)])
+        fixtures = index.fixtures(club, gameweek)
+        expected = [CLEAN_SHEET_PROB[season.difficulty(f["opponent_id"])] for f in fixtures]
+        chances = params["clean_sheet_prob"][params["team_slot"][i]]
+        assert chances[:len(fixtures)].tolist() == pytest.approx(expected)
+        assert not chances[len(fixtures):].any()
@@ -0,0 +1,85 @@
+import random
+from collections import Counter
+from itertools import combinations, product
+
+import numpy as np
+import pytest
+
+from player_table import PlayerTable
+from squad_solver import SQUAD_QUOTAS, solve_squad
+from transfer_plans import MAX_PER_CLUB
+from xi_selector import best_xi_points
+
+
+def seeded_points(table, seed):
+    return np.random.default_rng(seed).gamma(2.0, 2.0, len(table)) * (table.now_cost / 60.0)
+
+
+def assert_legal(table, result, budget):
+    ids = [p["id"] for p in result["squad"]]
+    rows = table.rows(ids)
+    assert len(set(ids)) == len(ids) == len(rows) == 15
+    assert Counter(table.element_type[rows].tolist()) == SQUAD_QUOTAS
+    assert max(Counter(table.team[rows].tolist()).values()) <= MAX_PER_CLUB
+    assert int(table.now_cost[rows].sum()) <= budget
+    assert table.available_mask()[rows].all()
+    assert sum(p["starting"] for p in result["squad"]) == 11
+
+
+@pytest.mark.parametrize("budget, bench_weight", [(1000, 0.1), (900, 0.25), (830, 0.05)])
+def test_squad_is_legal(season, budget, bench_weight):
+    table = PlayerTable(season.bootstrap())
+    points = seeded_points(table, budget)
+
+    result = solve_squad(table, points, budget=budget, bench_weight=bench_weight, time_limit=0.3)
+
+    assert_legal(table, result, budget)
+    rows = table.rows([p["id"] for p in result["squad"]])
+    score, _ = best_xi_points(rows.tolist(), points.tolist(), table.element_type.tolist(), bench_weight)
+    assert result["projected_points"] == pytest.approx(score, abs=0.01)
+    assert result["upper_bound"] >= result["projected_points"]
+
+
+@pytest.mark.parametrize("seed", [0, 3, 4])
+def test_upper_bound_covers_the_optimum(season, seed):
+    # Two spare players per position from ten clubs: small enough to try every squad,
+    # with the budget set where half of the club-legal squads are out of reach
+    rng = random.Random(seed)
+    available = [p for p in season.elements if p["status"] == "a" and p["team"] <= 10]
+    pool = []
+    for pos, quota in SQUAD_QUOTAS.items():
+        pool += rng.sample([p for p in available if p["element_type"] == pos], quota + 2)
+    bootstrap = season.bootstrap()
+    bootstrap["elements"] = pool
+    table = PlayerTable(bootstrap)
+    points = seeded_points(table, seed).tolist()
+    element_type = table.element_type.tolist()
+    by_pos = {pos: [r for r in range(len(table)) if element_type[r] == pos] for pos in SQUAD_QUOTAS}
+
+    squads = [
+        list(sum(picks, ()))
+        for picks in product(*(combinations(by_pos[pos], q) for pos, q in SQUAD_QUOTAS.items()))
+    ]
+    squads = [rows for rows in squads if max(Counter(table.team[rows].tolist()).values()) <= MAX_PER_CLUB]
+    budget = int(np.median([table.now_cost[rows].sum() for rows in squads]))
+    best = max(
+        best_xi_points(rows, points, element_type, 0.25)[0]
+        for rows in squads if int(table.now_cost[rows].sum()) <= budget
+    )
+
+    result = solve_squad(table, points, budget=budget, bench_weight=0.25, time_limit=0.3)
+    assert_legal(table, result, budget)
+    assert result["projected_points"] <= best + 0.01
+    assert result["upper_bound"] >= best - 0.01
+
+
+def test_more_time_never_hurts(season):
+    table = PlayerTable(season.bootstrap())
+    points = seeded_points(table, 1)
+
+    quick = solve_squad(table, points, time_limit=0.05, bound=False)
+    longer = solve_squad(table, points, time_limit=1.0, bound=False)
+
+    assert_legal(table, longer, 1000)
+    assert longer["restarts"] > 0
+    assert longer["projected_points"] >= quick["projected_points"]
@@ -0,0 +1,15 @@
+from tracing import Registry
+
+
+def test_render_after_upstream_error():
+    registry = Registry()
+    registry.inc("fpl_upstream_requests_total", endpoint="bootstrap-static", status=200)
+    registry.inc("fpl_upstream_requests_total", endpoint="bootstrap-static", status="error")
+    registry.inc("fpl_upstream_requests_total", endpoint="bootstrap-static", status="200")
+    registry.observe("sirbotty_http_request_seconds", 0.02, route="/api/report")
+
+    text = registry.render()
+
+    assert 'fpl_upstream_requests_total{endpoint="bootstrap-static",status="200"} 2' in text
+    assert 'fpl_upstream_requests_total{endpoint="bootstrap-static",status="error"} 1' in text
+    assert 'sirbotty_http_request_seconds_count{route="/api/report"} 1' in text
@@ -0,0 +1,92 @@
+import random
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from player_table import PlayerTable
+from transfer_planner import MAX_BANKED_TRANSFERS, plan_transfers
+from transfer_plans import HIT_COST, MAX_PER_CLUB
+from xi_selector import best_xi_points
+
+
+def small_table(season, manager_id, others=8):
+    """The manager's squad plus a seeded handful of the rest of the pool."""
+    squad = season.squad(manager_id)
+    rest = [p for p in season.elements if p["id"] not in set(squad)]
+    sample = random.Random(manager_id).sample(rest, others)
+    bootstrap = season.bootstrap()
+    bootstrap["elements"] = sorted([season.elements[i - 1] for i in squad] + sample, key=lambda p: p["id"])
+    return PlayerTable(bootstrap), squad
+
+
+def exhaustive(table, squad_ids, bank, points_by_gw, free_transfers):
+    """
+    Best total over every sequence of rolls, one or two like-for-like transfers a
+    gameweek, keeping only the best score for each (squad, bank, free transfers).
+    """
+    element_type, team, cost = table.element_type.tolist(), table.team.tolist(), table.now_cost.tolist()
+    pool = np.nonzero(table.available_mask())[0].tolist()
+
+    def successors(squad, bank):
+        yield 0, squad, bank
+        for n in (1, 2):
+            for outs in combinations(squad, n):
+                positions = sorted(element_type[o] for o in outs)
+                for ins in combinations([r for r in pool if r not in squad], n):
+                    if sorted(element_type[r] for r in ins) != positions:
+                        continue
+                    new_bank = bank + sum(cost[r] for r in outs) - sum(cost[r] for r in ins)
+                    if new_bank < 0:
+                        continue
+                    new_squad = tuple(sorted([r for r in squad if r not in outs] + list(ins)))
+                    if max(Counter(team[r] for r in new_squad).values()) > MAX_PER_CLUB:
+                        continue
+                    yield n, new_squad, new_bank
+
+    xi = {}
+    states = {(tuple(sorted(table.rows(squad_ids).tolist())), bank, free_transfers): 0.0}
+    for gw in sorted(points_by_gw):
+        points = points_by_gw[gw].tolist()
+        best = {}
+        for (squad, bank, ft), score in states.items():
+            for n, new_squad, new_bank in successors(squad, bank):
+                if (new_squad, gw) not in xi:
+                    xi[new_squad, gw] = best_xi_points(new_squad, points, element_type)[0]
+                new_score = score + xi[new_squad, gw] - max(0, n - ft) * HIT_COST
+                key = (new_squad, new_bank, min(MAX_BANKED_TRANSFERS, max(ft - n, 0) + 1))
+                if new_score > best.get(key, float("-inf")):
+                    best[key] = new_score
+        states = best
+    return max(states.values())
+
+
+def random_points(table, manager_id, horizon):
+    rng = np.random.default_rng(manager_id)
+    return {gw: rng.gamma(2.0, 1.5, len(table)) for gw in range(21, 21 + horizon)}
+
+
+@pytest.mark.parametrize("manager_id, bank, free_transfers", [(1, 0, 1), (2, 15, 1), (9, 40, 2), (4, 5, 0)])
+def test_matches_exhaustive_search_for_one_gameweek(season, manager_id, bank, free_transfers):
+    table, squad = small_table(season, manager_id)
+    points_by_gw = random_points(table, manager_id, 1)
+
+    plan = plan_transfers(table, squad, bank, points_by_gw, free_transfers=free_transfers)
+
+    assert plan["expected_points"] == pytest.approx(
+        exhaustive(table, squad, bank, points_by_gw, free_transfers), abs=0.01
+    )
+
+
+@pytest.mark.parametrize("manager_id, bank, free_transfers", [(3, 40, 2), (6, 0, 1)])
+def test_close_to_exhaustive_search_for_two_gameweeks(season, manager_id, bank, free_transfers):
+    table, squad = small_table(season, manager_id)
+    points_by_gw = random_points(table, manager_id, 2)
+
+    plan = plan_transfers(table, squad, bank, points_by_gw, free_transfers=free_transfers)
+
+    # Not always equal: the best plan may sell a player for one week and buy him
+    # back, and the beam only tries swaps that gain over the rest of the horizon
+    best = exhaustive(table, squad, bank, points_by_gw, free_transfers)
+    assert 0.98 * best <= plan["expected_points"] <= best + 0.01
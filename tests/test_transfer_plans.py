@@ -0,0 +1,79 @@
+import random
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from player_table import PlayerTable
+from transfer_plans import MAX_PER_CLUB, optimize_transfers
+
+
+def small_table(season, manager_id, others=60):
+    """The manager's squad plus a seeded sample of the rest of the pool."""
+    squad = season.squad(manager_id)
+    rest = [p for p in season.elements if p["id"] not in set(squad)]
+    sample = random.Random(manager_id).sample(rest, others)
+    bootstrap = season.bootstrap()
+    bootstrap["elements"] = sorted([season.elements[i - 1] for i in squad] + sample, key=lambda p: p["id"])
+    return PlayerTable(bootstrap), squad
+
+
+def brute_force(table, squad_ids, bank, points, free_transfers, max_transfers, hit_cost):
+    """Net gain of every improving plan, found by trying every like-for-like swap set."""
+    rows = table.rows(squad_ids).tolist()
+    pool = [r for r in np.nonzero(table.available_mask())[0].tolist() if r not in set(rows)]
+    element_type, team, cost = table.element_type, table.team, table.now_cost
+    nets = []
+    for n in range(1, max_transfers + 1):
+        for outs in combinations(rows, n):
+            positions = sorted(element_type[o] for o in outs)
+            for ins in combinations(pool, n):
+                if sorted(element_type[r] for r in ins) != positions:
+                    continue
+                if sum(int(cost[r]) for r in ins) - sum(int(cost[r]) for r in outs) > bank:
+                    continue
+                kept = [r for r in rows if r not in outs] + list(ins)
+                if max(Counter(int(team[r]) for r in kept).values()) > MAX_PER_CLUB:
+                    continue
+                net = sum(points[r] for r in ins) - sum(points[r] for r in outs) - max(0, n - free_transfers) * hit_cost
+                if net > 0:
+                    nets.append(net)
+    return sorted(nets, reverse=True)
+
+
+@pytest.mark.parametrize("manager_id, bank, free_transfers", [(1, 0, 1), (2, 15, 1), (3, 40, 2), (4, 5, 0)])
+def test_matches_brute_force(season, manager_id, bank, free_transfers):
+    table, squad = small_table(season, manager_id)
+    points = np.random.default_rng(manager_id).gamma(2.0, 1.5, len(table)).tolist()
+
+    plans = optimize_transfers(table, squad, bank, points, free_transfers=free_transfers,
+                               max_transfers=2, top_k=5)
+    expected = brute_force(table, squad, bank, points, free_transfers, 2, 4)[:5]
+
+    assert [p["net_gain"] for p in plans] == pytest.approx(expected, abs=0.01)
+
+
+def test_plans_are_legal(season):
+    table, squad = small_table(season, 5)
+    points = np.random.default_rng(5).gamma(2.0, 1.5, len(table)).tolist()
+    bank = 10
+
+    plans = optimize_transfers(table, squad, bank, points, max_transfers=2, top_k=10)
+    assert plans
+    for plan in plans:
+        outs = [t["out_id"] for t in plan["transfers"]]
+        ins = [t["in_id"] for t in plan["transfers"]]
+        assert set(outs) <= set(squad) and not set(ins) & set(squad)
+        assert len(set(ins)) == len(ins)
+        out_rows, in_rows = table.rows(outs), table.rows(ins)
+        assert (table.element_type[out_rows] == table.element_type[in_rows]).all()
+        assert table.available_mask()[in_rows].all()
+
+        spend = int(table.now_cost[in_rows].sum()) - int(table.now_cost[out_rows].sum())
+        assert spend <= bank
+        assert plan["bank_after"] == pytest.approx((bank - spend) / 10.0)
+
+        kept = [i for i in squad if i not in outs] + ins
+        assert max(Counter(table.team[table.rows(kept)].tolist()).values()) <= MAX_PER_CLUB
+        assert plan["net_gain"] == pytest.approx(plan["projected_gain"] - 4 * plan["hits"], abs=0.01)
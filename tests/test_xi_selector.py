@@ -0,0 +1,88 @@
+import random
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from xi_selector import FORMATIONS, MIN_OUTFIELD, auto_substitute, best_xi, select_xi_batch
+
+
+def squad_types(season, manager_id):
+    return [season.elements[i - 1]["element_type"] for i in season.squad(manager_id)]
+
+
+def brute_force_xi(points, element_type):
+    """Best score over every 11 of the squad that makes a legal formation."""
+    best = None
+    for xi in combinations(range(len(points)), 11):
+        counts = Counter(element_type[i] for i in xi)
+        if counts[1] == 1 and (counts[2], counts[3], counts[4]) in FORMATIONS:
+            score = sum(points[i] for i in xi)
+            best = score if best is None else max(best, score)
+    return best
+
+
+def test_best_xi_matches_brute_force(season):
+    rng = np.random.default_rng(16)
+    managers = list(season.manager_ids())[:20]
+    types = np.array([squad_types(season, m) for m in managers])
+    # Rounded points so ties between formations come up too
+    points = np.round(rng.gamma(2.0, 2.0, types.shape), 1)
+
+    scores, formations, starters = select_xi_batch(points, types)
+    for k in range(len(managers)):
+        expected = brute_force_xi(points[k].tolist(), types[k].tolist())
+        assert scores[k] == pytest.approx(expected)
+
+        xi = np.nonzero(starters[k])[0]
+        assert points[k, xi].sum() == pytest.approx(expected)
+        assert tuple((types[k, xi] == pos).sum() for pos in (2, 3, 4)) == formations[k]
+        assert (types[k, xi] == 1).sum() == 1
+
+        score, shape, chosen = best_xi(points[k].tolist(), types[k].tolist())
+        assert score == pytest.approx(expected)
+        assert shape in FORMATIONS and len(chosen) == 11
+
+
+def reference_autosubs(element_type, starters, played):
+    """FPL's automatic substitutions for one outcome, one swap at a time."""
+    xi = list(range(starters))
+    bench = list(range(starters, len(element_type)))
+    for s in [i for i in xi if element_type[i] == 1]:
+        keepers = [b for b in bench if element_type[b] == 1]
+        if not played[s] and keepers and played[keepers[0]]:
+            xi[xi.index(s)] = keepers[0]
+            bench.remove(keepers[0])
+    for b in bench:
+        if element_type[b] == 1 or not played[b]:
+            continue
+        for s in xi:
+            if s >= starters or element_type[s] == 1 or played[s]:
+                continue
+            counts = Counter(element_type[i] for i in xi)
+            if element_type[s] == element_type[b] or counts[element_type[s]] > MIN_OUTFIELD[element_type[s]]:
+                xi[xi.index(s)] = b
+                break
+    in_xi = np.zeros(len(element_type), dtype=bool)
+    in_xi[xi] = True
+    return in_xi
+
+
+@pytest.mark.parametrize("formation", FORMATIONS)
+def test_auto_substitute_matches_reference(season, formation):
+    rng = random.Random(str(formation))
+    types = squad_types(season, 1)
+    by_pos = {pos: [i for i, t in enumerate(types) if t == pos] for pos in (1, 2, 3, 4)}
+    d, m, f = formation
+    xi = by_pos[1][:1] + by_pos[2][:d] + by_pos[3][:m] + by_pos[4][:f]
+    outfield_bench = [i for i in range(len(types)) if i not in xi and types[i] != 1]
+    rng.shuffle(outfield_bench)
+    order = xi + by_pos[1][1:] + outfield_bench
+    element_type = [types[i] for i in order]
+
+    played = np.random.default_rng(len(order) * d + m).random((2000, len(order))) < 0.7
+    in_xi = auto_substitute(element_type, 11, played)
+
+    for k in range(len(played)):
+        assert (in_xi[k] == reference_autosubs(element_type, 11, played[k])).all(), played[k]
@@ -0,0 +1,226 @@
+# tracing.py
+
+import contextlib
+import contextvars
+import re
+import threading
+import time
+
+_current = contextvars.ContextVar("trace", default=None)
+
+# Exported at /metrics: name → (Prometheus type, help text)
+METRICS = {
+    "sirbotty_http_requests_total": ("counter", "HTTP requests served, by route and status."),
+    "sirbotty_http_request_seconds": ("histogram", "HTTP request latency, by route."),
+    "sirbotty_stage_seconds": ("histogram", "Wall time per pipeline stage (stages can nest)."),
+    "sirbotty_cache_lookups_total": ("counter", "Cache lookups by cache and result; stale counts fallbacks during upstream failures."),
+    "fpl_upstream_requests_total": ("counter", "Requests sent to the FPL API, by endpoint and status."),
+    "fpl_upstream_bytes_total": ("counter", "Response bytes received from the FPL API, by endpoint."),
+}
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Trace:
+    """
+    Wall-clock time per pipeline stage for one request. Stages recorded more than
+    once (e.g. two upstream waits) add up. `notes` carries extra Server-Timing
+    descriptions such as a cache hit.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.notes = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def note(self, name, description):
+        self.notes[name] = description
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """The trace as a Server-Timing header value, durations in milliseconds."""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts += [f'{name};desc="{description}"' for name, description in self.notes.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def breakdown(self):
+        """The trace as plain data, for ?debug_timing=1 responses."""
+        return {
+            "total_ms": round(self.elapsed() * 1000, 1),
+            "stages_ms": {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()},
+            "counters": dict(self.counters),
+            "notes": dict(self.notes),
+        }
+
+
+class Registry:
+    """
+    Process-wide counters and histograms, rendered in the Prometheus text format.
+    Series are keyed by metric name plus a sorted tuple of label pairs; label values
+    are kept as strings, so series with mixed statuses (200, "error") still sort.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = _series(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = _series(name, labels)
+        with self._lock:
+            buckets, total, count = self._histograms.get(key) or ([0] * len(HISTOGRAM_BUCKETS), 0.0, 0)
+            for i, bound in enumerate(HISTOGRAM_BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+            self._histograms[key] = (buckets, total + value, count + 1)
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for (metric, labels), value in counters:
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+            for (metric, labels), (buckets, total, observed) in histograms:
+                if metric != name:
+                    continue
+                for bound, cumulative in zip(HISTOGRAM_BUCKETS, buckets):
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {observed}")
+                lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+                lines.append(f"{name}_count{_labels(labels)} {observed}")
+        return "\n".join(lines) + "\n"
+
+
+def _series(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+
+def begin():
+    """Starts a trace for the current request; returns the token for end()."""
+    return _current.set(Trace())
+
+
+def end(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def record(name, seconds):
+    registry.observe("sirbotty_stage_seconds", seconds, stage=name)
+    trace = _current.get()
+    if trace is not None:
+        trace.record(name, seconds)
+
+
+def note(name, description):
+    trace = _current.get()
+    if trace is not None:
+        trace.note(name, description)
+
+
+def count(name, value=1):
+    trace = _current.get()
+    if trace is not None:
+        trace.count(name, value)
+
+
+def endpoint_of(path):
+    """An FPL API path with its IDs templated out, e.g. "entry/{id}/event/{id}/picks/"."""
+    return re.sub(r"\d+", "{id}", path.split("?")[0])
+
+
+def upstream_request(path, status, size):
+    """Counts one FPL API response (status "error" when none came back) and its bytes."""
+    endpoint = endpoint_of(path)
+    registry.inc("fpl_upstream_requests_total", endpoint=endpoint, status=status)
+    count("upstream_requests")
+    if size:
+        registry.inc("fpl_upstream_bytes_total", size, endpoint=endpoint)
+        count("upstream_bytes", size)
+
+
+def cache_lookup(cache, result):
+    """Counts a hit, miss, revalidation or stale serve of one of the caches."""
+    registry.inc("sirbotty_cache_lookups_total", cache=cache, result=result)
+    count(f"{cache}_cache_{result}")
+
+
+def http_request(route, status, seconds):
+    registry.inc("sirbotty_http_requests_total", route=route, status=status)
+    registry.observe("sirbotty_http_request_seconds", seconds, route=route)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Times the block as stage `name` of the current trace (a no-op without one)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed_sections(sections):
+    """
+    Passes (section, fields) pairs through from a report generator, recording the
+    time spent computing each one as a stage named after the section.
+    """
+    start = time.perf_counter()
+    for name, fields in sections:
+        record(name, time.perf_counter() - start)
+        yield name, fields
+        start = time.perf_counter()
+
+
+def parse_server_timing(header):
+    """Server-Timing header → ({stage: milliseconds}, {name: description})."""
+    durations, notes = {}, {}
+    for part in (header or "").split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        if not name:
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key == "dur":
+                durations[name] = float(value)
+            elif key == "desc":
+                notes[name] = value.strip('"')
+    return durations, notes
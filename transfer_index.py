@@ -0,0 +1,104 @@
+# transfer_index.py
+
+import bisect
+import threading
+
+import numpy as np
+
+from projection import get_projection
+
+# How many best-ranked candidates each price prefix remembers. Must exceed the
+# 15-man squad so an owned player can always be skipped without a rescan.
+DEPTH = 16
+
+
+class TransferIndex:
+    """
+    Transfer candidates for one gameweek (available, ≥60 minutes, has a fixture),
+    split by position. Candidates are ranked by (-projected points, difficulty,
+    price); within
+    each position they are also sorted by price, and every price prefix keeps its
+    DEPTH best-ranked rows. "Best affordable upgrade under £X" is then a binary
+    search plus a scan of at most DEPTH rows.
+    """
+
+    def __init__(self, table, fixture_index, gameweek, points):
+        self.table = table
+        self.fixture_index = fixture_index
+        self.gameweek = gameweek
+        self.points = points
+
+        self.difficulty = fixture_index.team_difficulty(table.team, gameweek)
+        self.fixture_count = fixture_index.team_counts(table.team, gameweek)
+
+        pool_mask = (
+            table.available_mask()
+            & (table.minutes >= 60)
+            & (self.fixture_count > 0)
+        )
+        pool_rows = np.nonzero(pool_mask)[0]
+        # Best projection first, then easier fixture, then cheaper (lexsort keys are last-major)
+        ranked = pool_rows[np.lexsort((
+            table.price[pool_rows], self.difficulty[pool_rows], -points[pool_rows]
+        ))]
+
+        self._prices = {}
+        self._prefix_best = {}
+        for element_type in np.unique(table.element_type):
+            rows = ranked[table.element_type[ranked] == element_type]
+            by_price = np.argsort(table.price[rows], kind="stable")
+            best = []
+            prefix_best = []
+            for rank in by_price:
+                bisect.insort(best, rank)
+                del best[DEPTH:]
+                prefix_best.append(tuple(int(rows[r]) for r in best))
+            self._prices[int(element_type)] = table.price[rows][by_price]
+            self._prefix_best[int(element_type)] = prefix_best
+
+    def best_affordable(self, element_type, ceiling, exclude=()):
+        """
+        Returns the best-ranked candidate row of a position priced ≤ ceiling that is
+        not in `exclude` (a set of rows), or None.
+        """
+        prices = self._prices.get(int(element_type))
+        if prices is None:
+            return None
+        i = int(np.searchsorted(prices, ceiling, side="right"))
+        if i == 0:
+            return None
+        for row in self._prefix_best[int(element_type)][i - 1]:
+            if row not in exclude:
+                return row
+        return None
+
+    def opponent(self, row):
+        fixtures = self.fixture_index.fixtures(int(self.table.team[row]), self.gameweek)
+        if not fixtures:
+            return "Unknown"
+        return self.table.team_names.get(fixtures[0]["opponent_id"], "Unknown")
+
+
+_indexes = {}
+_indexes_source = None
+_indexes_lock = threading.Lock()
+
+
+def get_transfer_index(gameweek):
+    """
+    Returns the TransferIndex for a gameweek, shared across requests until a new
+    bootstrap or fixtures snapshot (and so a new projection) arrives.
+    """
+    global _indexes_source
+    projection = get_projection()
+
+    with _indexes_lock:
+        if _indexes_source is not projection:
+            _indexes.clear()
+            _indexes_source = projection
+        index = _indexes.get(gameweek)
+        if index is None:
+            index = TransferIndex(projection.table, projection.fixture_index, gameweek,
+                                  projection.gameweek(gameweek))
+            _indexes[gameweek] = index
+        return index
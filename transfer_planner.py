@@ -0,0 +1,245 @@
+# transfer_planner.py
+
+import heapq
+
+import numpy as np
+
+from fpl_team_loader import get_current_gameweek
+from projection import get_projection
+from transfer_optimizer import get_manager_data, get_manager_picks
+from transfer_plans import HIT_COST, MAX_PER_CLUB
+from xi_selector import best_xi_points
+
+MAX_BANKED_TRANSFERS = 5
+REPLACEMENTS_PER_OUT = 2
+
+
+class _Planner:
+    """
+    Beam search over transfer sequences. A state is (squad, bank, free transfers);
+    each gameweek every state in the beam may roll its transfer, make one transfer
+    or make two, and the best `beam_width` successors survive. Squad valuations and
+    candidate moves are memoised by (squad, gameweek), so branches that reach the
+    same squad share the work.
+    """
+
+    def __init__(self, table, points_by_gw, beam_width, moves_per_state):
+        self.table = table
+        self.gameweeks = sorted(points_by_gw)
+        self.points = {gw: [float(x) for x in pts] for gw, pts in points_by_gw.items()}
+        self.beam_width = beam_width
+        self.moves_per_state = moves_per_state
+
+        self.cost = table.now_cost.tolist()
+        self.team = table.team.tolist()
+        self.element_type = table.element_type.tolist()
+
+        # Projected points from each gameweek to the end of the horizon
+        self.remaining = {}
+        running = np.zeros(len(table))
+        for gw in reversed(self.gameweeks):
+            running = running + np.asarray(points_by_gw[gw], dtype=float)
+            self.remaining[gw] = running.tolist()
+
+        available = np.nonzero(table.available_mask())[0].tolist()
+        self.candidates = {}
+        for r in available:
+            self.candidates.setdefault(self.element_type[r], []).append(r)
+
+        self._xi_memo = {}
+        self._moves_memo = {}
+
+    def xi_value(self, squad, gw):
+        key = (squad, gw)
+        value = self._xi_memo.get(key)
+        if value is None:
+            value = best_xi_points(squad, self.points[gw], self.element_type)[0]
+            self._xi_memo[key] = value
+        return value
+
+    def future_value(self, squad, gw):
+        """XI points this squad would score if held from gw to the end of the horizon."""
+        return sum(self.xi_value(squad, g) for g in self.gameweeks if g >= gw)
+
+    def single_moves(self, squad, bank, gw):
+        """
+        Best like-for-like swaps for the rest of the horizon: for each player owned,
+        the REPLACEMENTS_PER_OUT replacements with the most projected points left,
+        plus the best one that is affordable and within the club limit on its own.
+        Two owned players often want the same replacement, and the others may only
+        be legal alongside a second sale, so successors() checks bank and clubs.
+        """
+        key = (squad, bank, gw)
+        moves = self._moves_memo.get(key)
+        if moves is not None:
+            return moves
+
+        value = self.remaining[gw]
+        owned = set(squad)
+        clubs = {}
+        for r in squad:
+            clubs[self.team[r]] = clubs.get(self.team[r], 0) + 1
+
+        moves = []
+        for out_row in squad:
+            budget = bank + self.cost[out_row]
+            better = [
+                in_row for in_row in self.candidates.get(self.element_type[out_row], [])
+                if in_row not in owned and value[in_row] > value[out_row]
+            ]
+            best = set(heapq.nlargest(REPLACEMENTS_PER_OUT, better, key=value.__getitem__))
+            alone = [
+                in_row for in_row in better
+                if self.cost[in_row] <= budget and (
+                    self.team[in_row] == self.team[out_row] or clubs.get(self.team[in_row], 0) < MAX_PER_CLUB
+                )
+            ]
+            if alone:
+                best.add(max(alone, key=value.__getitem__))
+            moves.extend((value[in_row] - value[out_row], out_row, in_row) for in_row in best)
+
+        # Keep every option for the moves_per_state players whose best swap gains most
+        moves.sort(reverse=True)
+        outs = set(list(dict.fromkeys(out_row for _, out_row, _ in moves))[:self.moves_per_state])
+        moves = [move for move in moves if move[1] in outs]
+        self._moves_memo[key] = moves
+        return moves
+
+    def within_club_limit(self, squad):
+        clubs = {}
+        for r in squad:
+            clubs[self.team[r]] = clubs.get(self.team[r], 0) + 1
+        return max(clubs.values()) <= MAX_PER_CLUB
+
+    def successors(self, squad, bank, gw):
+        """Yields (transfers, new_squad, new_bank) for roll, one and two transfers."""
+        yield (), squad, bank
+
+        moves = self.single_moves(squad, bank, gw)
+        for _, out_row, in_row in moves:
+            new_bank = bank + self.cost[out_row] - self.cost[in_row]
+            if new_bank < 0:
+                continue
+            new_squad = tuple(sorted(in_row if r == out_row else r for r in squad))
+            if not self.within_club_limit(new_squad):
+                continue
+            yield ((out_row, in_row),), new_squad, new_bank
+
+        for i, (_, out_a, in_a) in enumerate(moves):
+            for _, out_b, in_b in moves[i + 1:]:
+                if out_a == out_b or in_a == in_b:
+                    continue
+                new_bank = bank + self.cost[out_a] + self.cost[out_b] - self.cost[in_a] - self.cost[in_b]
+                if new_bank < 0:
+                    continue
+                new_squad = tuple(sorted(
+                    in_a if r == out_a else in_b if r == out_b else r for r in squad
+                ))
+                if not self.within_club_limit(new_squad):
+                    continue
+                yield ((out_a, in_a), (out_b, in_b)), new_squad, new_bank
+
+    def plan(self, squad, bank, free_transfers):
+        # Beam entries: (score so far, squad, bank, free transfers, steps)
+        beam = [(0.0, tuple(sorted(squad)), bank, free_transfers, [])]
+
+        for gw in self.gameweeks:
+            best_by_state = {}
+            for score, squad, bank, ft, steps in beam:
+                for transfers, new_squad, new_bank in self.successors(squad, bank, gw):
+                    hits = max(0, len(transfers) - ft)
+                    gw_points = self.xi_value(new_squad, gw) - hits * HIT_COST
+                    new_ft = min(MAX_BANKED_TRANSFERS, max(ft - len(transfers), 0) + 1)
+                    new_score = score + gw_points
+                    key = (new_squad, new_bank, new_ft)
+                    current = best_by_state.get(key)
+                    if current is None or new_score > current[0]:
+                        step = {"gameweek": gw, "transfers": transfers, "hits": hits,
+                                "free_transfers": ft, "points": gw_points}
+                        best_by_state[key] = (new_score, new_squad, new_bank, new_ft, steps + [step])
+
+            # Rank by points banked so far plus what the squad would score if held
+            next_gw = gw + 1
+            ranked = sorted(
+                best_by_state.values(),
+                key=lambda s: s[0] + self.future_value(s[1], next_gw),
+                reverse=True
+            )
+            beam = ranked[:self.beam_width]
+
+        return max(beam, key=lambda s: s[0])
+
+
+def plan_transfers(table, squad_ids, bank, points_by_gw, free_transfers=1,
+                   beam_width=40, moves_per_state=8):
+    """
+    Plans transfers across the gameweeks in points_by_gw ({gw: points array}).
+    Returns the best sequence found, with expected XI points net of hits for each
+    gameweek, alongside the points the squad would score with no transfers at all.
+    """
+    planner = _Planner(table, points_by_gw, beam_width, moves_per_state)
+    squad = tuple(sorted(int(r) for r in table.rows(squad_ids)))
+    total, final_squad, final_bank, _, steps = planner.plan(squad, bank, free_transfers)
+    hold = sum(planner.xi_value(squad, gw) for gw in planner.gameweeks)
+
+    return {
+        "gameweeks": [
+            {
+                "gameweek": step["gameweek"],
+                "free_transfers": step["free_transfers"],
+                "transfers": [
+                    {"out": table.name[o], "out_id": int(table.id[o]),
+                     "in": table.name[n], "in_id": int(table.id[n])}
+                    for o, n in step["transfers"]
+                ],
+                "hits": step["hits"],
+                "expected_points": round(step["points"], 2)
+            }
+            for step in steps
+        ],
+        "expected_points": round(total, 2),
+        "hold_expected_points": round(hold, 2),
+        "gain": round(total - hold, 2),
+        "bank_after": final_bank / 10.0
+    }
+
+
+def plan_transfers_for_manager(manager_id, start_gameweek=None, horizon=6,
+                               free_transfers=1, beam_width=40):
+    """
+    Multi-gameweek plan for a manager's current squad. Defaults to planning from
+    the gameweek after the current one.
+    """
+    current_gw = get_current_gameweek()
+    if start_gameweek is None:
+        start_gameweek = min(current_gw + 1, 38)
+    last_gw = min(start_gameweek + horizon - 1, 38)
+
+    projection = get_projection()
+    table = projection.table
+    points_by_gw = projection.by_gameweek(start_gameweek, last_gw - start_gameweek + 1)
+
+    picks = get_manager_picks(manager_id, min(start_gameweek, current_gw)).get("picks", [])
+    bank = get_manager_data(manager_id).get("bank", 0)
+
+    return plan_transfers(
+        table, [p["element"] for p in picks], bank, points_by_gw,
+        free_transfers=free_transfers, beam_width=beam_width
+    )
+
+
+if __name__ == "__main__":
+    # python transfer_planner.py <manager_id> [horizon] [free_transfers]
+    import sys
+
+    manager_id = sys.argv[1]
+    horizon = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    free_transfers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    result = plan_transfers_for_manager(manager_id, horizon=horizon, free_transfers=free_transfers)
+    print(f"🗺️ {horizon}-gameweek plan: {result['expected_points']} pts "
+          f"(+{result['gain']} vs holding)")
+    for step in result["gameweeks"]:
+        moves = ", ".join(f"{t['out']} → {t['in']}" for t in step["transfers"]) or "Roll transfer"
+        hit = f" (-{step['hits'] * HIT_COST})" if step["hits"] else ""
+        print(f" GW{step['gameweek']} [{step['free_transfers']} FT]: {moves}{hit} – {step['expected_points']} pts")
@@ -0,0 +1,145 @@
+# transfer_plans.py
+
+import heapq
+from itertools import combinations
+
+import numpy as np
+
+from projection import get_projection
+from transfer_optimizer import get_manager_data, get_manager_picks
+
+HIT_COST = 4
+MAX_PER_CLUB = 3
+
+
+def optimize_transfers(table, squad_ids, bank, points, free_transfers=1,
+                       max_transfers=3, top_k=5, hit_cost=HIT_COST):
+    """
+    Branch-and-bound search over every 1..max_transfers combination of like-for-like
+    swaps. A plan must stay within the bank (now_cost tenths), keep ≤3 players per
+    club and use distinct incoming players. Plans are ranked by projected points
+    gained minus hit cost for transfers beyond `free_transfers`; the best `top_k`
+    improving plans are returned, best first.
+    """
+    points = [float(x) for x in points]
+    cost = table.now_cost.tolist()
+    team = table.team.tolist()
+    element_type = table.element_type.tolist()
+
+    squad_rows = [int(r) for r in table.rows(squad_ids)]
+    owned = set(squad_rows)
+    club_count = {}
+    for r in squad_rows:
+        club_count[team[r]] = club_count.get(team[r], 0) + 1
+
+    # Candidates per position, best projection first, and the cheapest price per position
+    candidates = {}
+    for r in np.nonzero(table.available_mask())[0].tolist():
+        if r not in owned:
+            candidates.setdefault(element_type[r], []).append(r)
+    for rows in candidates.values():
+        rows.sort(key=lambda r: (-points[r], cost[r]))
+    cheapest = {pos: min(cost[r] for r in rows) for pos, rows in candidates.items()}
+
+    best = []  # min-heap of (net_gain, tiebreak, outs, ins)
+    counter = [0]
+
+    def threshold():
+        # Only improving plans are kept, so zero is always a valid cut-off
+        return max(best[0][0], 0.0) if len(best) >= top_k else 0.0
+
+    def search(outs, i, ins, last_j, gain, spend, penalty):
+        if i == len(outs):
+            net = gain - penalty
+            if net > threshold():
+                counter[0] += 1
+                heapq.heappush(best, (net, -counter[0], tuple(outs), tuple(ins)))
+                if len(best) > top_k:
+                    heapq.heappop(best)
+            return
+
+        out_row = outs[i]
+        pos = element_type[out_row]
+        pool = candidates.get(pos, [])
+        if not pool:
+            return
+
+        # Optimistic bound: every remaining out gets its position's best candidate
+        remaining_best = sum(points[candidates[element_type[o]][0]] - points[o] for o in outs[i + 1:]
+                             if candidates.get(element_type[o]))
+        remaining_min_spend = sum(cheapest[element_type[o]] - cost[o] for o in outs[i + 1:]
+                                  if element_type[o] in cheapest)
+
+        # Same-position outs take candidates in increasing list order, so swapped
+        # pairings of the same squad are only generated once
+        start = last_j + 1 if i > 0 and element_type[outs[i - 1]] == pos else 0
+
+        for j in range(start, len(pool)):
+            in_row = pool[j]
+            step_gain = points[in_row] - points[out_row]
+            if gain + step_gain + remaining_best - penalty <= threshold():
+                break  # pool is sorted by points, nothing later can do better
+            new_spend = spend + cost[in_row] - cost[out_row]
+            if new_spend + remaining_min_spend > bank:
+                continue
+            if in_row in ins:
+                continue
+            in_team = team[in_row]
+            if club_count.get(in_team, 0) >= MAX_PER_CLUB:
+                continue
+            club_count[in_team] = club_count.get(in_team, 0) + 1
+            ins.append(in_row)
+            search(outs, i + 1, ins, j, gain + step_gain, new_spend, penalty)
+            ins.pop()
+            club_count[in_team] -= 1
+
+    # Weakest players first tightens the threshold early
+    ordered_squad = sorted(squad_rows, key=lambda r: (element_type[r], points[r]))
+    for n in range(1, max_transfers + 1):
+        penalty = max(0, n - free_transfers) * hit_cost
+        for outs in combinations(ordered_squad, n):
+            # Club counts are checked against the squad with every out already removed
+            for o in outs:
+                club_count[team[o]] -= 1
+            search(list(outs), 0, [], -1, 0.0, 0, penalty)
+            for o in outs:
+                club_count[team[o]] += 1
+
+    plans = []
+    for net, _, outs, ins in sorted(best, reverse=True):
+        hits = max(0, len(outs) - free_transfers)
+        spend = sum(cost[r] for r in ins) - sum(cost[r] for r in outs)
+        plans.append({
+            "transfers": [
+                {
+                    "out": table.name[o],
+                    "out_id": int(table.id[o]),
+                    "in": table.name[n],
+                    "in_id": int(table.id[n]),
+                    "position": table.position[o]
+                }
+                for o, n in zip(outs, ins)
+            ],
+            "hits": hits,
+            "projected_gain": round(net + hits * hit_cost, 2),
+            "net_gain": round(net, 2),
+            "bank_after": (bank - spend) / 10.0
+        })
+    return plans
+
+
+def suggest_transfer_plans_for_manager(manager_id, gameweek=34, free_transfers=1,
+                                       max_transfers=3, top_k=5):
+    projection = get_projection()
+    picks = get_manager_picks(manager_id, gameweek).get("picks", [])
+    bank = get_manager_data(manager_id).get("bank", 0)
+
+    return optimize_transfers(
+        projection.table,
+        [p["element"] for p in picks],
+        bank,
+        projection.gameweek(gameweek),
+        free_transfers=free_transfers,
+        max_transfers=max_transfers,
+        top_k=top_k
+    )
@@ -1,14 +1,20 @@
+import hashlib
 import json
+import tracing
 from form_trend import analyze_form_trends, load_players as load_mock_players
 from captain_picker import pick_captains
 from transfer_engine import suggest_transfers
 from chip_strategy import evaluate_chip_strategy
+from chip_planner import plan_chips_for_manager
 from data_enrichment import (
     fetch_understat_data,
     fetch_premier_injuries,
     enrich_player_data
 )
 from transfer_optimizer import suggest_best_transfers_for_manager
+from transfer_plans import suggest_transfer_plans_for_manager
+from score_simulator import simulate_manager
+from xi_selector import pick_starting_xi
 
 from player_utils import (
     fetch_fixtures,
@@ -16,59 +22,26 @@ from player_utils import (
     calculate_predicted_gameweek_score
 )
 
-from fpl_team_loader import fetch_team_for_gameweek, get_team_players
-
-
-def pick_starting_xi(players):
-    starting = []
-    bench = []
-    pos_buckets = {"GK": [], "DEF": [], "MID": [], "FWD": []}
-
-    for player in players:
-        pos_buckets[player["position"]].append(player)
-
-    for pos in pos_buckets:
-        pos_buckets[pos].sort(key=lambda p: (-p["form"], -p["expected_minutes"]))
-
-    gks = pos_buckets["GK"][:1]
-    defs = pos_buckets["DEF"][:3]
-    mids = pos_buckets["MID"][:2]
-    fwds = pos_buckets["FWD"][:1]
-
-    starting_pool = gks + defs + mids + fwds
-    used_ids = {p["id"] for p in starting_pool}
+from fpl_team_loader import (
+    fetch_team_for_gameweek,
+    get_report_data_version,
+    get_team_players,
+    prefetch_manager_data
+)
 
-    remaining = []
-    for pos in ["DEF", "MID", "FWD"]:
-        for p in pos_buckets[pos]:
-            if p["id"] not in used_ids:
-                remaining.append(p)
+# Draws per report; enough for stable percentiles and captain EVs. About 0.1s on
+# an idle process, but ~0.7s p50 under the load test, most of a report's time.
+REPORT_SIMULATIONS = 20_000
 
-    remaining.sort(key=lambda p: (-p["form"], -p["expected_minutes"]))
-    while len(starting_pool) < 11 and remaining:
-        next_best = remaining.pop(0)
-        starting_pool.append(next_best)
-        used_ids.add(next_best["id"])
 
-    starting = [{
-        "name": p["name"],
-        "position": p["position"],
-        "reason": f"Form {p['form']}, likely to start vs {p['opponent_team']}"
-    } for p in starting_pool]
+def simulation_seed(manager_id, gameweek):
+    """
+    Seed for a report's score simulation, fixed by (manager, gameweek, upstream data
+    version) so rebuilding a report from the same data gives the same bytes.
+    """
+    key = repr((str(manager_id), gameweek, get_report_data_version(manager_id, gameweek)))
+    return int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:8], "big")
 
-    bench = []
-    for p in players:
-        if p["id"] in used_ids:
-            continue
-        if p.get("number_of_fixtures", 1) == 0:
-            continue
-        bench.append({
-            "name": p["name"],
-            "position": p["position"],
-            "reason": "Lower form or minutes, held in reserve"
-        })
-
-    return starting, bench
 
 def detect_alerts(players):
     alerts = []
@@ -93,15 +66,26 @@ def detect_alerts(players):
             })
     return alerts
 
-def generate_gameweek_report(gameweek_number=33, manager_id=None):
+def iter_gameweek_report(gameweek_number=33, manager_id=None):
+    """
+    Builds the weekly report one section at a time, yielding (section, fields) as
+    soon as each is ready: the squad overview right after the team loads, then
+    captaincy, XI, alerts, scores, chips and finally transfers. Merging every
+    section's fields gives the full report.
+    """
     is_projected = False
     gw_used = gameweek_number
     players, chips_used, current_team_ids = [], [], []
+    team_loaded = False
 
     if manager_id:
         try:
-            gw_used, _, is_projected = fetch_team_for_gameweek(manager_id, gameweek_number)
-            players, chips_used, current_team_ids = get_team_players(manager_id, gw_used)
+            with tracing.stage("load_team"):
+                # Fire all independent upstream requests together before any compute
+                prefetch_manager_data(manager_id, gameweek_number)
+                gw_used, _, is_projected = fetch_team_for_gameweek(manager_id, gameweek_number)
+                players, chips_used, current_team_ids = get_team_players(manager_id, gw_used, gameweek_number)
+            team_loaded = bool(players)
             print(f"✅ Loaded FPL team for Manager ID {manager_id} (GW{gw_used})")
         except Exception as e:
             print(f"⚠️ Falling back to mock data: {e}")
@@ -116,28 +100,18 @@ def generate_gameweek_report(gameweek_number=33, manager_id=None):
 
     understat = fetch_understat_data()
     injuries = fetch_premier_injuries()
-    players = enrich_player_data(players, understat, injuries)
-
-    players_with_trends = analyze_form_trends(players)
-    fixtures = fetch_fixtures()
-    enriched_players = enrich_players_with_fixtures(players_with_trends, fixtures, gameweek_number)
-
-    # Recalculate suggestions and output using the target gameweek context
-    captains = pick_captains(enriched_players)
-    transfers = suggest_transfers(enriched_players)
-    starting_xi, bench = pick_starting_xi(enriched_players)
-    alerts = detect_alerts(enriched_players)
-    chip_recommendation = evaluate_chip_strategy(enriched_players, chips_used, gameweek_number)
-    chip_recommendation["chips_used"] = chips_used
-
-    # 🧠 Use the upgraded manager-based optimizer
-    transfer_recommendations = suggest_best_transfers_for_manager(
-        manager_id, gameweek=gameweek_number, max_transfers=3
-    )
-
+    with tracing.stage("enrich_player_data"):
+        players = enrich_player_data(players, understat, injuries)
+
+    with tracing.stage("analyze_form_trends"):
+        players_with_trends = analyze_form_trends(players)
+    with tracing.stage("enrich_fixtures"):
+        fixtures = fetch_fixtures()
+        enriched_players = enrich_players_with_fixtures(players_with_trends, fixtures, gameweek_number)
+    # Also stores predicted_points_per_fixture on each player for the overview
     predicted_score = calculate_predicted_gameweek_score(enriched_players)
 
-    report = {
+    yield "overview", {
         "gameweek": gameweek_number,
         "original_gw": gw_used if is_projected else gameweek_number,
         "is_projected": is_projected,
@@ -166,21 +140,89 @@ def generate_gameweek_report(gameweek_number=33, manager_id=None):
                 "number_of_fixtures": p.get("number_of_fixtures", 1),
                 "is_captain": p.get("is_captain", False),
                 "is_vice_captain": p.get("is_vice_captain", False),
-                "predicted_points_per_fixture": p.get("predicted_points_per_fixture", 0)
+                "predicted_points_per_fixture": p.get("predicted_points_per_fixture", 0),
+                "projected_points": p.get("projected_points", 0)
             }
             for p in enriched_players
-        ],
+        ]
+    }
+
+    # Score distribution for the squad as picked, armband and autosubs included
+    with tracing.stage("simulation"):
+        score_distribution = simulate_manager(
+            manager_id, gw_used, gameweek_number, n_draws=REPORT_SIMULATIONS,
+            seed=simulation_seed(manager_id, gameweek_number)
+        ).summary() if team_loaded else None
+
+    # Recalculate suggestions and output using the target gameweek context. The
+    # armband goes to someone in the recommended XI, not just the manager's own 11
+    starting_xi, bench = pick_starting_xi(enriched_players)
+    xi_names = {p["name"] for p in starting_xi}
+    captains = pick_captains(
+        [p for p in enriched_players if p["name"] in xi_names],
+        score_distribution["captaincy"] if score_distribution else None
+    )
+    yield "captain", {
         "captain": captains["captain"],
         "vice_captain": captains["vice_captain"],
+        "score_distribution": score_distribution
+    }
+
+    yield "starting_xi", {"starting_xi": starting_xi, "bench": bench}
+
+    yield "alerts", {"alerts": detect_alerts(enriched_players)}
+
+    # Projection-matrix total for the picked XI, captain counted twice
+    projected = {p["name"]: p.get("projected_points", 0) for p in enriched_players}
+    projected_score = round(
+        sum(projected.get(p["name"], 0) for p in starting_xi)
+        + projected.get(captains["captain"]["name"], 0), 1
+    )
+    yield "score", {"predicted_score": predicted_score, "projected_score": projected_score}
+
+    chip_recommendation = evaluate_chip_strategy(enriched_players, chips_used, gameweek_number)
+    # Season-long chip calendar; its pick for this week overrides the heuristics
+    with tracing.stage("chip_planner"):
+        chip_plan = plan_chips_for_manager(manager_id, gameweek_number, gw_used) if team_loaded else None
+    if chip_plan:
+        this_week = next((c for c in chip_plan["calendar"] if c["gameweek"] == gameweek_number), None)
+        if this_week:
+            chip_recommendation = {
+                "recommended_chip": this_week["name"],
+                "reason": f"Best week of the season for it: +{this_week['expected_gain']} projected pts."
+            }
+        elif chip_recommendation["recommended_chip"] and chip_plan["calendar"]:
+            # The calendar runs in gameweek order; point at the chip worth the most
+            upcoming = max(chip_plan["calendar"], key=lambda c: c["expected_gain"])
+            chip_recommendation = {
+                "recommended_chip": None,
+                "reason": f"Hold your chips – {upcoming['name']} in GW{upcoming['gameweek']} "
+                          f"projects +{upcoming['expected_gain']} pts."
+            }
+    chip_recommendation["chips_used"] = chips_used
+    yield "chips", {"chip_recommendation": chip_recommendation, "chip_plan": chip_plan}
+
+    transfers = suggest_transfers(enriched_players)
+    # 🧠 Use the upgraded manager-based optimizer
+    with tracing.stage("transfer_optimizer"):
+        transfer_recommendations = suggest_best_transfers_for_manager(
+            manager_id, gameweek=gameweek_number, max_transfers=3
+        )
+    # Combined 1–3 transfer plans, respecting bank, club limits and -4 hits
+    with tracing.stage("transfer_plans"):
+        transfer_plans = suggest_transfer_plans_for_manager(
+            manager_id, gameweek=gameweek_number, top_k=3
+        ) if manager_id else []
+    yield "transfers", {
         "transfer_suggestions": transfers,
         "transfer_recommendations": transfer_recommendations,
-        "starting_xi": starting_xi,
-        "bench": bench,
-        "alerts": alerts,
-        "chip_recommendation": chip_recommendation,
-        "predicted_score": predicted_score
+        "transfer_plans": transfer_plans
     }
 
+def generate_gameweek_report(gameweek_number=33, manager_id=None):
+    report = {}
+    for _, fields in iter_gameweek_report(gameweek_number, manager_id):
+        report.update(fields)
     return report
 
 if __name__ == "__main__":
@@ -0,0 +1,248 @@
+# xi_selector.py
+
+from itertools import permutations
+
+import numpy as np
+
+# Legal outfield shapes (DEF, MID, FWD) behind one goalkeeper
+FORMATIONS = [
+    (d, m, f)
+    for d in range(3, 6) for m in range(2, 6) for f in range(1, 4)
+    if d + m + f == 10
+]
+# Minimum starters per outfield position that automatic substitutions must keep
+MIN_OUTFIELD = {2: 3, 3: 2, 4: 1}
+MAX_STARTERS = {1: 1, 2: 5, 3: 5, 4: 3}
+POSITION_IDS = {"GK": 1, "DEF": 2, "MID": 3, "FWD": 4}
+
+
+def best_xi_points(rows, points, element_type, bench_weight=0.0):
+    """
+    Scores a squad given as rows into `points` / `element_type`: points of the best
+    legal starting XI plus bench_weight times the points of everyone else.
+    Returns (score, formation). Plain lists, for the solvers' inner loops.
+    """
+    by_pos = {1: [], 2: [], 3: [], 4: []}
+    for r in rows:
+        by_pos[element_type[r]].append(points[r])
+    for values in by_pos.values():
+        values.sort(reverse=True)
+    total = sum(points[r] for r in rows)
+
+    best_score, best_shape = None, None
+    gk = by_pos[1][:1]
+    for d, m, f in FORMATIONS:
+        if len(by_pos[2]) < d or len(by_pos[3]) < m or len(by_pos[4]) < f or not gk:
+            continue
+        xi = gk[0] + sum(by_pos[2][:d]) + sum(by_pos[3][:m]) + sum(by_pos[4][:f])
+        score = xi + bench_weight * (total - xi)
+        if best_score is None or score > best_score:
+            best_score, best_shape = score, (d, m, f)
+    return (best_score or 0.0), best_shape
+
+
+def best_xi(points, element_type):
+    """
+    Exact best starting XI for one squad (index i = squad member i) over every
+    legal formation. Ties keep the input order. Returns (score, formation,
+    starters) with starters in position order, best first within a position.
+    Squads too short for any formation start whoever they can.
+    """
+    order = sorted(range(len(points)), key=lambda i: (element_type[i], -points[i]))
+    by_pos = {pos: [i for i in order if element_type[i] == pos] for pos in (1, 2, 3, 4)}
+
+    score, shape = best_xi_points(range(len(points)), points, element_type)
+    if shape is None:
+        # Incomplete squad: start the best players each position can still take
+        starters = []
+        for i in sorted(range(len(points)), key=lambda i: -points[i]):
+            pos = element_type[i]
+            if len(starters) < 11 and sum(element_type[s] == pos for s in starters) < MAX_STARTERS.get(pos, 0):
+                starters.append(i)
+        starters.sort(key=order.index)
+        shape = tuple(sum(element_type[s] == pos for s in starters) for pos in (2, 3, 4))
+        return sum(points[s] for s in starters), shape, starters
+    d, m, f = shape
+    starters = by_pos[1][:1] + by_pos[2][:d] + by_pos[3][:m] + by_pos[4][:f]
+    return score, shape, starters
+
+
+def auto_substitute(element_type, starters, played):
+    """
+    FPL automatic substitutions for a batch of outcomes. The squad is in pick order
+    (first `starters` start, the rest are the bench in order) and played[k, i] says
+    whether member i played in outcome k. The bench goalkeeper covers a starting
+    goalkeeper who didn't play; outfield bench players in order replace the first
+    non-playing starter whose removal keeps a legal formation. Returns in_xi[k, i].
+    """
+    n_outcomes, n = played.shape
+    in_xi = np.zeros((n_outcomes, n), dtype=bool)
+    in_xi[:, :starters] = True
+    if n <= starters:
+        return in_xi
+
+    bench = list(range(starters, n))
+    gk_starters = [i for i in range(starters) if element_type[i] == 1]
+    gk_bench = [b for b in bench if element_type[b] == 1]
+    for s, b in zip(gk_starters, gk_bench):
+        swap = ~played[:, s] & played[:, b]
+        in_xi[swap, s] = False
+        in_xi[swap, b] = True
+
+    outfield = [i for i in range(starters) if element_type[i] != 1]
+    counts = {pos: np.full(n_outcomes, sum(element_type[i] == pos for i in outfield)) for pos in MIN_OUTFIELD}
+    for b in (b for b in bench if element_type[b] != 1):
+        pending = played[:, b].copy()
+        for s in outfield:
+            out_pos, in_pos = element_type[s], element_type[b]
+            legal = (out_pos == in_pos) | (counts[out_pos] > MIN_OUTFIELD[out_pos])
+            swap = pending & in_xi[:, s] & ~played[:, s] & legal
+            in_xi[swap, s] = False
+            in_xi[swap, b] = True
+            counts[out_pos] -= swap
+            counts[in_pos] += swap
+            pending &= ~swap
+    return in_xi
+
+
+def _absences(play_prob):
+    """Distribution of how many of a group of players miss out: dist[k] = P(k absent)."""
+    dist = np.ones(1)
+    for q in play_prob:
+        dist = np.append(dist * q, 0.0) + np.append(0.0, dist * (1 - q))
+    return dist
+
+
+def bench_order(points, element_type, play_prob, starters):
+    """
+    Orders the bench: goalkeeper first (FPL requires it), then the outfield order
+    with the highest expected autosub value. Which starter misses out only matters
+    through how many per position do, so each order is scored exactly over every
+    (absent DEF, MID, FWD counts) × (bench players who play) outcome, weighted by
+    its probability, with a sub worth his points given that he plays.
+    """
+    starters = list(starters)
+    bench = [i for i in range(len(points)) if i not in set(starters)]
+    gk_bench = [i for i in bench if element_type[i] == 1]
+    outfield_bench = sorted((i for i in bench if element_type[i] != 1), key=lambda i: -points[i])
+    if len(outfield_bench) <= 1:
+        return gk_bench + outfield_bench
+
+    q = {i: min(max(float(play_prob[i]), 0.0), 1.0) for i in starters + outfield_bench}
+    group = {pos: [s for s in starters if element_type[s] == pos] for pos in MIN_OUTFIELD}
+    if all(q[s] >= 1.0 for pos in MIN_OUTFIELD for s in group[pos]):
+        return gk_bench + outfield_bench  # nobody to cover, keep the best first
+
+    # Outcome grid: absent starters per position × which bench players play
+    dists = [_absences([q[s] for s in group[pos]]) for pos in MIN_OUTFIELD]
+    absent = np.stack(np.meshgrid(*[np.arange(len(d)) for d in dists], indexing="ij"), -1).reshape(-1, 3)
+    probability = np.multiply.reduce(np.meshgrid(*dists, indexing="ij")).ravel()
+    bench_q = np.array([q[b] for b in outfield_bench])
+    plays = (np.arange(2 ** len(outfield_bench))[:, None] >> np.arange(len(outfield_bench)) & 1).astype(bool)
+    probability = np.outer(probability, np.where(plays, bench_q, 1 - bench_q).prod(axis=1)).ravel()
+    absent = np.repeat(absent, len(plays), axis=0)
+    plays = np.tile(plays, (len(dists[0]) * len(dists[1]) * len(dists[2]), 1))
+
+    value_if_played = [points[b] / q[b] if q[b] > 0 else 0.0 for b in outfield_bench]
+    best_value, best_order = None, outfield_bench
+    for order in permutations(range(len(outfield_bench))):
+        remaining = {pos: absent[:, k].copy() for k, pos in enumerate(MIN_OUTFIELD)}
+        count = {pos: np.full(len(absent), len(group[pos])) for pos in MIN_OUTFIELD}
+        value = 0.0
+        for k in order:
+            in_pos = element_type[outfield_bench[k]]
+            pending = plays[:, k].copy()
+            # First non-playing starter in pick order (DEF, MID, FWD) that can go
+            for out_pos in MIN_OUTFIELD:
+                legal = (remaining[out_pos] > 0) & ((out_pos == in_pos) | (count[out_pos] > MIN_OUTFIELD[out_pos]))
+                swap = pending & legal
+                remaining[out_pos] -= swap
+                count[out_pos] -= swap
+                count[in_pos] += swap
+                pending &= ~swap
+            value += probability @ (plays[:, k] & ~pending) * value_if_played[k]
+        if best_value is None or value > best_value + 1e-12:
+            best_value, best_order = value, [outfield_bench[k] for k in order]
+    return gk_bench + best_order
+
+
+def select_xi_batch(points, element_type):
+    """
+    Best XI for many squads at once: points and element_type are (squads × members)
+    arrays. Every formation is scored with one masked sum over position-ranked
+    points. Returns (scores, formations, starters mask).
+    """
+    points = np.asarray(points, dtype=float)
+    element_type = np.asarray(element_type)
+    order = np.lexsort((-points, element_type), axis=-1)
+    ranked_points = np.take_along_axis(points, order, axis=1)
+    ranked_type = np.take_along_axis(element_type, order, axis=1)
+    # 1-based rank of each member within its position
+    rank = np.zeros_like(ranked_type, dtype=np.int64)
+    for pos in (1, 2, 3, 4):
+        is_pos = ranked_type == pos
+        rank = np.where(is_pos, np.cumsum(is_pos, axis=1), rank)
+    available = {pos: (ranked_type == pos).sum(axis=1) for pos in (1, 2, 3, 4)}
+
+    scores = np.full((len(points), len(FORMATIONS)), -np.inf)
+    masks = []
+    for k, (d, m, f) in enumerate(FORMATIONS):
+        limit = np.select([ranked_type == 1, ranked_type == 2, ranked_type == 3, ranked_type == 4], [1, d, m, f], 0)
+        mask = rank <= limit
+        legal = (available[1] >= 1) & (available[2] >= d) & (available[3] >= m) & (available[4] >= f)
+        scores[:, k] = np.where(legal, (ranked_points * mask).sum(axis=1), -np.inf)
+        masks.append(mask)
+
+    best = scores.argmax(axis=1)
+    ranked_mask = np.stack(masks, axis=1)[np.arange(len(points)), best]
+    starters = np.zeros_like(ranked_mask)
+    np.put_along_axis(starters, order, ranked_mask, axis=1)
+    return scores[np.arange(len(points)), best], [FORMATIONS[k] for k in best], starters
+
+
+def order_benches(points, element_type, play_prob, starters):
+    """bench_order for every squad of a select_xi_batch run (starters is its mask)."""
+    return [
+        bench_order(points[k], element_type[k], play_prob[k], np.nonzero(starters[k])[0].tolist())
+        for k in range(len(points))
+    ]
+
+
+def _player_points(p):
+    # Projection when the loader supplied one; form per fixture for mock squads
+    if "projected_points" in p:
+        return p["projected_points"]
+    return p["form"] * min(p.get("number_of_fixtures", 1), 2)
+
+
+def pick_starting_xi(players):
+    """
+    Best starting XI and ordered bench for a squad of player dicts. Ties fall back
+    to form, then minutes. Returns (starting, bench) as lists of
+    {"name", "position", "reason"}.
+    """
+    players = sorted(players, key=lambda p: (-_player_points(p), -p["form"], -p["expected_minutes"]))
+    points = [_player_points(p) for p in players]
+    element_type = [POSITION_IDS.get(p["position"], 0) for p in players]
+    play_prob = [
+        p.get("play_probability", 1.0) if p.get("number_of_fixtures", 1) > 0 else 0.0
+        for p in players
+    ]
+
+    _, shape, starters = best_xi(points, element_type)
+    bench = bench_order(points, element_type, play_prob, starters)
+
+    starting = [{
+        "name": players[i]["name"],
+        "position": players[i]["position"],
+        "reason": f"Form {players[i]['form']}, likely to start vs {players[i]['opponent_team']}"
+    } for i in starters]
+
+    bench = [{
+        "name": players[i]["name"],
+        "position": players[i]["position"],
+        "reason": "Blank gameweek" if players[i].get("number_of_fixtures", 1) == 0
+        else "Lower form or minutes, held in reserve"
+    } for i in bench]
+
+    return starting, bench